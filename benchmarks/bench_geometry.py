@@ -0,0 +1,29 @@
+from skyfield.api import wgs84
+
+from cubesat_simradio.emusats_configs import NORBI_CONFIG
+from cubesat_simradio.sat_path import angle_points
+from benchmarks.common import STATION, START, window
+
+
+class TimeAnglePoints:
+    # skyfield needs ~16 KB per time point, so the 24 hours window is sampled at 0.1 Hz instead of 3.3 Hz
+    params = [(10, 3.3333), (24 * 60, 0.1)]
+    param_names = ['window']
+    timeout = 120
+
+    def setup(self, window_params):
+        self.observer = wgs84.latlon(*STATION)
+        self.t_1, self.t_2 = window(window_params[0])
+        self.sampling_rate = window_params[1]
+
+    def time_angle_points(self, window_params):
+        angle_points(NORBI_CONFIG.tle, 'NORBI', self.observer, self.t_1, self.t_2, self.sampling_rate)
+
+
+class TimeFindNearest:
+    def setup(self):
+        self.path = angle_points(NORBI_CONFIG.tle, 'NORBI', wgs84.latlon(*STATION), *window(10))
+        self.timestamp = START + (self.path.t_points[-1] - START) / 2
+
+    def time_find_nearest(self):
+        self.path.find_nearest(self.path.dist_rate, self.timestamp)
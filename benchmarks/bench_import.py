@@ -0,0 +1,80 @@
+""" import time of the package modules, each measured in a fresh interpreter with `python -X importtime`
+
+    python -m benchmarks.bench_import    report every module against its budget, exit 1 when one is over
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+
+# cumulative import time budget in ms and the heavy dependencies the module may load at import
+IMPORT_BUDGETS: dict[str, tuple[float, tuple[str, ...]]] = {
+    'cubesat_simradio': (5.0, ()),
+    'cubesat_simradio.models': (15.0, ()),
+    'cubesat_simradio.crc': (120.0, ()),
+    'cubesat_simradio.airtime': (120.0, ()),
+    'cubesat_simradio.sat_path': (150.0, ()),
+    'cubesat_simradio.satellite_profiles': (30.0, ()),
+    'cubesat_simradio.doppler': (150.0, ()),
+    'cubesat_simradio.throughput': (150.0, ()),
+    'cubesat_simradio.path_cache': (150.0, ()),
+    'cubesat_simradio.frame_index': (120.0, ()),
+    'cubesat_simradio.timer_wheel': (80.0, ()),
+    'cubesat_simradio.emusat': (250.0, ()),
+    'cubesat_simradio.radio_mock': (250.0, ()),
+    'cubesat_simradio.cli': (50.0, ()),
+    'cubesat_simradio.emusats_configs': (300.0, ('pydantic',)),
+    'cubesat_simradio.tle_store': (400.0, ('skyfield',)),
+    'cubesat_simradio.batch_decode': (600.0, ('pandas',)),
+    'cubesat_simradio.capture_index': (600.0, ('pandas',)),
+    'cubesat_simradio.telemetry_archive': (600.0, ('pandas',)),
+}
+HEAVY_MODULES: tuple[str, ...] = ('skyfield', 'pandas', 'pydantic')
+ROOT_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(module: str) -> tuple[float, list[str]]:
+    """ (cumulative import time in ms, heavy modules loaded) in a new interpreter """
+    code: str = f'import sys, {module}; print(" ".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                            check=True, cwd=ROOT_DIR)
+    cumulative_us: int = 0
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if line.startswith('import time:') and line.rsplit('|', 1)[-1].strip() == module:
+            cumulative_us = int(line.split('|')[1])
+    return cumulative_us / 1000, result.stdout.split()
+
+
+class TrackImportTime:
+    """ cumulative `import <module>` time in a fresh interpreter, best of `runs` """
+    params = list(IMPORT_BUDGETS)
+    param_names = ['module']
+    unit = 'ms'
+    higher_is_better = False
+    runs = 5
+    timeout = 120
+
+    def track_import_ms(self, module):
+        return min(measure_import(module)[0] for _ in range(self.runs))
+
+
+def main() -> int:
+    over_budget: int = 0
+    for module, (budget, allowed) in IMPORT_BUDGETS.items():
+        samples: list[tuple[float, list[str]]] = [measure_import(module) for _ in range(TrackImportTime.runs)]
+        elapsed: float = min(sample[0] for sample in samples)
+        unexpected: list[str] = [name for name in samples[0][1] if name not in allowed]
+        status: str = 'ok'
+        if elapsed > budget:
+            status = 'OVER BUDGET'
+        if unexpected:
+            status = f'loads {", ".join(unexpected)}'
+        over_budget += status != 'ok'
+        print(f'{module:36s} {elapsed:8.1f} ms / {budget:6.1f} ms  {" ".join(samples[0][1]) or "-":24s} {status}')
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import numpy as np
+
+from cubesat_simradio.crc import crc16
+from cubesat_simradio.examples.frame_parser import frame_parser
+from cubesat_simradio.onboard_time import struct_times, to_datetime64, to_strings
+from cubesat_simradio.radio_packet import RadioPacket
+from cubesat_simradio.telemetry import load_layouts
+from benchmarks.common import norbi_frames, norbi2_frames
+
+
+class TimeRadioPacket:
+    def setup(self):
+        self.frame = norbi_frames()[4]
+
+    def time_parse(self):
+        RadioPacket(self.frame)
+
+    def time_crc_check(self):
+        RadioPacket(self.frame).is_crc_valid
+
+    def time_crc16(self):
+        crc16(self.frame)
+
+
+class TimeFrameParser:
+    params = list(range(len(load_layouts('NORBI'))))
+    param_names = ['tmi']
+
+    def setup(self, tmi):
+        self.frame = norbi_frames()[tmi]
+
+    def time_norbi(self, tmi):
+        frame_parser(self.frame, 'NORBI')
+
+
+class TimeFrameParserPss:
+    params = list(range(len(load_layouts('NORBI-2'))))
+    param_names = ['tmi_pss']
+
+    def setup(self, tmi_pss):
+        self.frame = norbi2_frames()[tmi_pss]
+
+    def time_norbi2(self, tmi_pss):
+        frame_parser(self.frame, 'NORBI-2')
+
+
+class TimeOnboardTime:
+    """ time columns of 100k decoded frames """
+
+    def setup(self):
+        rng = np.random.default_rng(0)
+        self.seconds = rng.integers(0, 2 ** 32, 100_000, dtype=np.uint32)
+        bounds = ((20, 30), (1, 13), (1, 29), (0, 24), (0, 60), (0, 60), (0, 1))
+        self.struct = np.column_stack([rng.integers(low, high, 100_000) for low, high in bounds]).astype(np.uint8)
+
+    def time_to_datetime64(self):
+        to_datetime64(self.seconds)
+
+    def time_to_strings(self):
+        to_strings(self.seconds)
+
+    def time_struct_times(self):
+        struct_times(self.struct)
@@ -0,0 +1,46 @@
+from datetime import timedelta
+import time
+from uuid import uuid4
+
+from cubesat_simradio.emusats_configs import NORBI2_CONFIG, NORBI_CONFIG
+from cubesat_simradio.pass_planner import PassPlanner, Station
+from cubesat_simradio.scheduler import Scheduler, load_sessions
+from benchmarks.common import START
+
+STATIONS = [Station(f'station_{i}', 40.0 + 5 * (i % 6), -120.0 + 30 * i, 100.0) for i in range(8)]
+SATELLITES = {'NORBI': NORBI_CONFIG.tle, 'NORBI-2': NORBI2_CONFIG.tle}
+
+
+class TrackPassPlanner:
+    """ (satellite, station, day) work units per second; compare the workers params for core scaling """
+    params = [1, 2, 4]
+    param_names = ['workers']
+    unit = 'units/s'
+    days = 2
+    timeout = 300
+
+    def track_units_per_second(self, workers):
+        planner = PassPlanner(workers)
+        start = time.perf_counter()
+        planner.plan(SATELLITES, STATIONS, START, self.days)
+        return len(SATELLITES) * len(STATIONS) * self.days / (time.perf_counter() - start)
+
+
+class TimeScheduler:
+    """ scheduling of conflict-free requests, short ones included """
+    requests = 200
+
+    def setup(self):
+        user_id = uuid4()
+        self.sessions = load_sessions([
+            {'_id': uuid4(), 'user_id': user_id, 'username': 'bench', 'script_id': None, 'sat_name': 'NORBI',
+             'is_user_tle': False, 'station': 'station_0', 'registration_time': START, 'priority': 0,
+             'start': START + timedelta(minutes=10 * i), 'duration_sec': 15 + i % 120,
+             'finish': START + timedelta(minutes=10 * i, seconds=15 + i % 120), 'parts': 1, 'max_elevation': 0.0,
+             'initial_start': START + timedelta(minutes=10 * i), 'initial_duration_sec': 15 + i % 120}
+            for i in range(self.requests)])
+        booked = len(Scheduler().schedule(self.sessions).sessions)
+        assert booked == self.requests, f'{booked} of {self.requests} conflict-free requests are booked'
+
+    def time_schedule(self):
+        Scheduler().schedule(self.sessions)
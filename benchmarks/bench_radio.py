@@ -0,0 +1,81 @@
+import time
+
+from cubesat_simradio.models import SX127x_Modulation
+from cubesat_simradio.radio_mock import RadioMock
+from cubesat_simradio.timer_wheel import TimerWheel
+from cubesat_simradio.utils import ZeroDelayClock
+from benchmarks.common import norbi_frames, quiet_logger
+
+TMI_REQUEST = [14, 10, 6, 1, 201, 1, 1, 1, 1, 0, 0, 0, 0, 0, 1]
+
+
+class TimeRadioMock:
+    def setup(self):
+        quiet_logger()
+        self.radio = RadioMock(name='NORBI', clock=ZeroDelayClock())
+        self.frame = norbi_frames()[4]
+
+    def teardown(self):
+        self.radio.disconnect()
+
+    def time_calculate_packet(self):
+        self.radio.calculate_packet(self.frame)
+
+    def time_calculate_packet_fsk(self):
+        self.radio.modulation = SX127x_Modulation.FSK
+        self.radio.calculate_packet(self.frame)
+
+
+class TrackLink:
+    """ end to end RadioMock -> EMUSAT -> RadioMock exchanges under a zero delay clock """
+    round_trips = 5
+    unit = 'packets/s'
+    timeout = 60
+
+    def setup(self):
+        quiet_logger()
+        self.radio = RadioMock(name='NORBI', clock=ZeroDelayClock())
+        self.radio.satellite.radio_config.mode = SX127x_Modulation.LORA
+        self.radio.satellite.BEACON_PERIOD = 10 ** 9
+        self.radio.satellite.refresh_beacon_timer()
+
+    def teardown(self):
+        self.radio.disconnect()
+
+    def track_packets_per_second(self):
+        start = time.perf_counter()
+        answered = 0
+        for _ in range(self.round_trips):
+            self.radio.send_single(TMI_REQUEST)
+            answered += self.radio.wait_read(5) is not None
+        return answered / (time.perf_counter() - start)
+
+
+class TrackTimerWheelLink(TrackLink):
+    """ `TrackLink` with the satellite driven by a shared timer wheel instead of its own thread """
+
+    def setup(self):
+        quiet_logger()
+        self.timers = TimerWheel()
+        self.radio = RadioMock(name='NORBI', clock=ZeroDelayClock(), timers=self.timers)
+        self.radio.satellite.radio_config.mode = SX127x_Modulation.LORA
+        self.radio.satellite.BEACON_PERIOD = 10 ** 9
+        self.radio.satellite.refresh_beacon_timer()
+
+    def teardown(self):
+        self.radio.disconnect()
+        self.timers.stop()
+
+
+class TimeTimerWheel:
+    """ beacon timer reset of a 1000 satellite fleet: cancel and schedule on one wheel """
+
+    def setup(self):
+        self.timers = TimerWheel()
+        self.now = self.timers.clock.time()
+        self.beacons = [self.timers.call_at(self.now + 60 * i / 1000, int) for i in range(1000)]
+
+    def time_reschedule_fleet(self):
+        for i, timer in enumerate(self.beacons):
+            timer.cancel()
+            self.beacons[i] = self.timers.call_at(self.now + 60, int)
@@ -0,0 +1,41 @@
+import time
+
+from cubesat_simradio.emusat import EMUSAT
+from cubesat_simradio.examples.register_commands import (BRK_VAR_ID, calculate_crc, init_crc, write_register,
+                                                         write_registers_message)
+from cubesat_simradio.utils import ZeroDelayClock
+from benchmarks.common import quiet_logger
+
+GROUND = bytes([1, 1, 1, 1])
+SATELLITE = bytes([10, 6, 1, 203])
+
+
+class TimeRegisterCommands:
+    def setup(self):
+        self.words = list(range(0x10000000, 0x10000000 + 60))
+        self.registers = [(BRK_VAR_ID(3, 5, offset), bytes(range(32))) for offset in range(0, 192, 32)]
+
+    def time_calculate_crc(self):
+        calculate_crc(init_crc(0x281CF7D9), self.words)
+
+    def time_write_registers_message(self):
+        write_registers_message(self.registers, 0x281CF7D9)
+
+
+class TrackRegisterUpload:
+    """ 200 byte register writes handled by EMUSAT, signed with the board time of its beacon """
+    writes = 200
+    unit = 'bytes/s'
+
+    def setup(self):
+        quiet_logger()
+        self.satellite = EMUSAT('NORBI-2', clock=ZeroDelayClock())
+        board_time = int.from_bytes(self.satellite.get_beacon()[21:25], 'little')
+        self.frames = [self.satellite.accept_uplink(write_register(GROUND, SATELLITE, i, [(3, 7, 0, bytes(200))],
+                                                                   board_time)) for i in range(self.writes)]
+
+    def track_bytes_per_second(self):
+        start = time.perf_counter()
+        for frame in self.frames:
+            self.satellite._cmd_handler(frame)  # pylint: disable=protected-access
+        return 200 * self.writes / (time.perf_counter() - start)
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta, timezone
+import sys
+from loguru import logger
+
+from cubesat_simradio.emusat import EMUSAT
+from cubesat_simradio.telemetry import load_layouts
+
+STATION = (60.006770, 30.379205, 40.0)
+START = datetime(2023, 8, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def quiet_logger() -> None:
+    logger.remove()
+    logger.add(sys.stderr, level='ERROR')
+
+
+def norbi_frames() -> list[bytes]:
+    quiet_logger()
+    satellite = EMUSAT('NORBI')
+    return [satellite.generate_answer_tmi(i) for i in range(len(load_layouts('NORBI')))]
+
+
+def norbi2_frames() -> list[bytes]:
+    quiet_logger()
+    satellite = EMUSAT('NORBI-2')
+    return [satellite.generate_answer_pss_tmi(i) for i in range(len(load_layouts('NORBI-2')))]
+
+
+def window(minutes: int) -> tuple[datetime, datetime]:
+    return START, START + timedelta(minutes=minutes)
@@ -0,0 +1,109 @@
+""" asv compatible benchmark runner with stored baselines
+
+    python -m benchmarks.run                  compare against benchmarks/baseline.json
+    python -m benchmarks.run --save           store current results as the new baseline
+    python -m benchmarks.run -k angle_points  run only matching benchmarks
+"""
+from __future__ import annotations
+
+import argparse
+from functools import partial
+import importlib
+import inspect
+import itertools
+import json
+import os
+import pkgutil
+import sys
+import timeit
+from typing import Any, Callable, Iterator
+
+BENCHMARKS_DIR: str = os.path.dirname(__file__)
+BASELINE_PATH: str = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+DEFAULT_THRESHOLD: float = 1.5  # slowdown factor reported as regression
+
+
+def iter_benchmarks() -> Iterator[tuple[str, type, str, tuple]]:
+    for module_info in pkgutil.iter_modules([BENCHMARKS_DIR]):
+        if not module_info.name.startswith('bench_'):
+            continue
+        module = importlib.import_module(f'benchmarks.{module_info.name}')
+        for class_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            params: list = getattr(cls, 'params', [])
+            combinations: list[tuple] = [()] if not params else \
+                list(itertools.product(*params)) if isinstance(params[0], list) else [(p,) for p in params]
+            for method in sorted(name for name in dir(cls) if name.startswith(('time_', 'track_'))):
+                for combination in combinations:
+                    yield f'{module_info.name}.{class_name}.{method}', cls, method, combination
+
+
+def full_name(name: str, params: tuple) -> str:
+    return f'{name}({", ".join(map(str, params))})' if params else name
+
+
+def run_one(cls: type, method: str, params: tuple, repeat: int) -> float:
+    instance = cls()
+    if hasattr(instance, 'setup'):
+        instance.setup(*params)
+    try:
+        func: Callable[[], Any] = partial(getattr(instance, method), *params)
+        if method.startswith('track_'):
+            return float(func())
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        return min(timer.repeat(repeat, number)) / number  # the fastest run is the least disturbed by the machine
+    finally:
+        if hasattr(instance, 'teardown'):
+            instance.teardown(*params)
+
+
+def compare(name: str, value: float, baseline: float | None, threshold: float, higher_is_better: bool) -> str:
+    if baseline is None:
+        return 'new'
+    ratio: float = baseline / value if higher_is_better else value / baseline
+    if ratio > threshold:
+        return f'REGRESSION x{ratio:.2f}'
+    if ratio < 1 / threshold:
+        return f'improved x{1 / ratio:.2f}'
+    return f'ok x{ratio:.2f}'
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='cubesat_simradio benchmarks')
+    parser.add_argument('-k', '--filter', default='', help='substring of benchmark name')
+    parser.add_argument('--save', action='store_true', help='store results as baseline')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    baseline: dict[str, float] = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+    results: dict[str, float] = {}
+    regressions: int = 0
+    for name, cls, method, params in iter_benchmarks():
+        key: str = full_name(name, params)
+        if args.filter not in key:
+            continue
+        value: float = run_one(cls, method, params, args.repeat)
+        results[key] = value
+        threshold: float = getattr(cls, 'regression_threshold', args.threshold)
+        higher_is_better: bool = getattr(cls, 'higher_is_better', method.startswith('track_'))
+        status: str = compare(key, value, baseline.get(key), threshold, higher_is_better)
+        regressions += status.startswith('REGRESSION')
+        shown: str = f'{value:12.3f} {getattr(cls, "unit", "")}' if method.startswith('track_') \
+            else f'{value * 1e6:12.1f} us'
+        print(f'{key:70s} {shown:20s} {status}', flush=True)
+    if args.save:
+        baseline.update(results)
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        return 0
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,43 @@
+""" CubeSat radio emulator.
+
+Top level names are resolved on first access, so `import cubesat_simradio` does not load skyfield, pandas or
+pydantic until geometry or validation is actually used. """
+from __future__ import annotations
+
+from importlib import import_module
+
+_LAZY_ATTRIBUTES: dict[str, str] = {
+    'EMUSAT': 'cubesat_simradio.emusat',
+    'RadioMock': 'cubesat_simradio.radio_mock',
+    'RadioPacket': 'cubesat_simradio.radio_packet',
+    'SatellitePath': 'cubesat_simradio.sat_path',
+    'angle_points': 'cubesat_simradio.sat_path',
+    'RadioConfig': 'cubesat_simradio.emusats_configs',
+    'RadioModel': 'cubesat_simradio.schemas',
+    'SessionModel': 'cubesat_simradio.schemas',
+    'SatelliteRegistry': 'cubesat_simradio.satellite_profiles',
+    'TleStore': 'cubesat_simradio.tle_store',
+    'UplinkRouter': 'cubesat_simradio.uplink_router',
+    'PassPlanner': 'cubesat_simradio.pass_planner',
+    'Scheduler': 'cubesat_simradio.scheduler',
+    'EmulatorServer': 'cubesat_simradio.server',
+    'CaptureIndex': 'cubesat_simradio.capture_index',
+    'FrameIndex': 'cubesat_simradio.frame_index',
+    'TelemetryArchive': 'cubesat_simradio.telemetry_archive',
+    'TimerWheel': 'cubesat_simradio.timer_wheel',
+}
+
+__all__ = sorted(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    module_name: str | None = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
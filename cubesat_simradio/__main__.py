@@ -1,4 +1,6 @@
-from cubesat_simradio.examples.example import main
+import sys
+
+from cubesat_simradio.cli import main
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(main())
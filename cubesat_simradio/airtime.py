@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from ast import literal_eval
+from functools import lru_cache
+import numpy as np
+
+from cubesat_simradio.models import SX127x_BW, SX127x_CR, SX127x_DcFree, SX127x_Modulation
+
+MAX_PAYLOAD_SIZE: int = 255  # SX127x FIFO, packets up to this size are looked up in the airtime tables
+FSK_BITRATE: int = 4800  # bps, SX127x RegBitrate reset value
+FSK_SYNC_WORD_SIZE: int = 4  # bytes, SX127x RegSyncConfig reset value
+
+
+@lru_cache(maxsize=None)
+def bandwidth_khz(bandwidth: SX127x_BW) -> float:
+    return literal_eval(bandwidth.name.replace('BW', '').replace('_', '.'))
+
+
+def lora_airtime_ms(payload_size: int | np.ndarray, spread_factor: int, bandwidth: float, coding_rate: int,
+                    preamble_length: int = 8, crc: bool = True, implicit_header: bool = False,
+                    low_data_rate_optimize: bool = True) -> float | np.ndarray:
+    """ SX127x LoRa time on air in ms; `bandwidth` in kHz, `coding_rate` 1..4 for 4/5..4/8, payload may be array """
+    t_sym: float = 2 ** spread_factor / bandwidth
+    preamble_time: float = (preamble_length + 4.25) * t_sym
+    tmp_poly = np.maximum(8 * np.asarray(payload_size) - 4 * spread_factor + 28 + 16 * crc - 20 * implicit_header, 0)
+    payload_symbol_nb = 8 + (tmp_poly / (4 * (spread_factor - 2 * low_data_rate_optimize))) * (4 + coding_rate)
+    airtime = payload_symbol_nb * t_sym + preamble_time
+    return float(airtime) if np.ndim(airtime) == 0 else airtime
+
+
+def fsk_airtime_ms(payload_size: int | np.ndarray, bitrate: float = FSK_BITRATE, preamble_length: int = 3,
+                   sync_word_size: int = FSK_SYNC_WORD_SIZE, crc: bool = True, variable_length: bool = True,
+                   address_filtering: bool = False,
+                   dc_free: SX127x_DcFree = SX127x_DcFree.OFF) -> float | np.ndarray:
+    """ SX127x FSK packet mode time on air in ms; preamble in bytes, Manchester coding doubles the bits after the
+    sync word, whitening keeps the length """
+    header_bytes: int = preamble_length + sync_word_size
+    coded_bytes = np.asarray(payload_size) + variable_length + address_filtering + 2 * crc
+    if dc_free == SX127x_DcFree.MANCHESTER:
+        coded_bytes = 2 * coded_bytes
+    airtime = 8 * (header_bytes + coded_bytes) / bitrate * 1000
+    return float(airtime) if np.ndim(airtime) == 0 else airtime
+
+
+@lru_cache(maxsize=64)
+def lora_airtime_table(spread_factor: int, bandwidth: float, coding_rate: int, preamble_length: int = 8,
+                       crc: bool = True, implicit_header: bool = False,
+                       low_data_rate_optimize: bool = True) -> np.ndarray:
+    """ read-only `lora_airtime_ms` of payloads 0..MAX_PAYLOAD_SIZE """
+    table: np.ndarray = lora_airtime_ms(np.arange(MAX_PAYLOAD_SIZE + 1), spread_factor, bandwidth, coding_rate,
+                                        preamble_length, crc, implicit_header, low_data_rate_optimize)
+    table.flags.writeable = False
+    return table
+
+
+@lru_cache(maxsize=64)
+def fsk_airtime_table(bitrate: float = FSK_BITRATE, preamble_length: int = 3, sync_word_size: int = FSK_SYNC_WORD_SIZE,
+                      crc: bool = True, variable_length: bool = True, address_filtering: bool = False,
+                      dc_free: SX127x_DcFree = SX127x_DcFree.OFF) -> np.ndarray:
+    """ read-only `fsk_airtime_ms` of payloads 0..MAX_PAYLOAD_SIZE """
+    table: np.ndarray = fsk_airtime_ms(np.arange(MAX_PAYLOAD_SIZE + 1), bitrate, preamble_length, sync_word_size,
+                                       crc, variable_length, address_filtering, dc_free)
+    table.flags.writeable = False
+    return table
+
+
+def lora_packet_ms(payload_size: int, spread_factor: int, bandwidth: float, coding_rate: int,
+                   preamble_length: int = 8, crc: bool = True, implicit_header: bool = False,
+                   low_data_rate_optimize: bool = True) -> float:
+    """ `lora_airtime_ms` of one packet, looked up in `lora_airtime_table` """
+    if payload_size > MAX_PAYLOAD_SIZE:
+        return lora_airtime_ms(payload_size, spread_factor, bandwidth, coding_rate, preamble_length, crc,
+                               implicit_header, low_data_rate_optimize)
+    return float(lora_airtime_table(spread_factor, bandwidth, coding_rate, preamble_length, crc, implicit_header,
+                                    low_data_rate_optimize)[payload_size])
+
+
+def fsk_packet_ms(payload_size: int, bitrate: float = FSK_BITRATE, preamble_length: int = 3,
+                  sync_word_size: int = FSK_SYNC_WORD_SIZE, crc: bool = True, variable_length: bool = True,
+                  address_filtering: bool = False, dc_free: SX127x_DcFree = SX127x_DcFree.OFF) -> float:
+    """ `fsk_airtime_ms` of one packet, looked up in `fsk_airtime_table` """
+    if payload_size > MAX_PAYLOAD_SIZE:
+        return fsk_airtime_ms(payload_size, bitrate, preamble_length, sync_word_size, crc, variable_length,
+                              address_filtering, dc_free)
+    return float(fsk_airtime_table(bitrate, preamble_length, sync_word_size, crc, variable_length, address_filtering,
+                                   dc_free)[payload_size])
+
+
+def config_airtime_ms(payload_size: int | np.ndarray, spread_factor: int, bandwidth: SX127x_BW,
+                      coding_rate: SX127x_CR, mode: SX127x_Modulation = SX127x_Modulation.LORA,
+                      bitrate: float = FSK_BITRATE, **kwargs) -> float | np.ndarray:
+    """ time on air of a `RadioConfig`; FSK takes `crc` from kwargs and the SX127x defaults for the rest """
+    if mode == SX127x_Modulation.FSK:
+        return fsk_airtime_ms(payload_size, bitrate, crc=kwargs.get('crc', True))
+    return lora_airtime_ms(payload_size, spread_factor, bandwidth_khz(bandwidth), coding_rate.value >> 1, **kwargs)
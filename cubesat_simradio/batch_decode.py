@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+import json
+import mmap
+import os
+import re
+import sys
+from typing import Callable, Iterable, Iterator
+import numpy as np
+import pandas as pd
+
+from cubesat_simradio.crc import check_frames
+from cubesat_simradio.onboard_time import struct_times, to_datetime64
+from cubesat_simradio.telemetry import HEADER_SIZE, TmiLayout, frame_format, get_layouts
+
+HEX_LINE = re.compile(r'(?:rx < )?((?:[0-9A-Fa-f]{2} ?){15,})\s*$')
+HEX_LINE_BYTES = re.compile(HEX_LINE.pattern.encode())
+TIMESTAMP_SIZE: int = 19  # 'YYYY-MM-DD HH:MM:SS' of `LoRaRxPacket.__str__`, the UTC offset is dropped
+
+def is_text_capture(content: mmap.mmap | bytes) -> bool:
+    """ printable ASCII at the start of the file: a hex text capture, else a binary one """
+    head: bytes = content[:4096]
+    try:
+        return bool(head) and all(char.isprintable() or char.isspace() for char in head.decode('ascii'))
+    except UnicodeDecodeError:
+        return False
+
+
+def parse_line(line: bytes) -> bytes | None:
+    """ frame of a received `LoRaRxPacket` log line or a bare hex line, the regular expression is the fallback """
+    if b'tx >' in line:
+        return None
+    marker: int = line.find(b'rx < ')
+    if marker >= 0:
+        try:
+            return bytes.fromhex(line[marker + 5:].decode('ascii'))
+        except (ValueError, UnicodeDecodeError):
+            pass
+    match: re.Match | None = HEX_LINE_BYTES.search(line)
+    return bytes.fromhex(match.group(1).decode()) if match else None
+
+
+def scan_text(content: mmap.mmap, start: int, end: int | None = None) -> Iterator[tuple[int, int, str, bytes]]:
+    """ (offset, length, timestamp, frame) of the received lines between bytes `start` and `end`, without `end` the
+    unterminated last line is left out as it may still be written """
+    stop: int = len(content) if end is None else end
+    position: int = start
+    while position < stop:
+        line_end: int = content.find(b'\n', position, stop)
+        if line_end < 0:
+            if end is None:
+                return
+            line_end = stop
+        line: bytes = content[position:line_end].rstrip(b'\r')
+        frame: bytes | None = parse_line(line)
+        if frame is not None:
+            timestamp: str = 'NaT'
+            if line[4:5] == b'-' and line[10:11] in (b' ', b'T'):
+                timestamp = line[:TIMESTAMP_SIZE].decode('ascii', 'replace')
+            yield position, len(line), timestamp, frame
+        position = line_end + 1
+
+
+def scan_binary(content: mmap.mmap, start: int, end: int | None = None) -> Iterator[tuple[int, int, str, bytes]]:
+    """ (offset, length, timestamp, frame) of the complete length-prefixed frames between bytes `start` and `end` """
+    stop: int = len(content) if end is None else end
+    position: int = start
+    while position < stop:
+        length: int = content[position] + 1
+        if position + length > stop:
+            return
+        yield position, length, 'NaT', content[position:position + length]
+        position += length
+
+
+def read_frames(path: str, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+    """ frames of a hex text capture (one frame per line, `LoRaRxPacket` log lines too) or of raw binary
+    length-prefixed frames, streamed from the memory-mapped file between bytes `start` and `end` """
+    if not os.path.getsize(path):
+        return
+    with open(path, 'rb') as capture, mmap.mmap(capture.fileno(), 0, access=mmap.ACCESS_READ) as content:
+        scan = scan_text if is_text_capture(content) else scan_binary
+        for _, _, _, frame in scan(content, start, len(content) if end is None else end):
+            yield frame
+
+
+def split_capture(path: str, chunk_size: int) -> Iterator[tuple[int, int]]:
+    """ (start, end) byte ranges of `chunk_size` lines or binary frames each, only the range bounds are read """
+    size: int = os.path.getsize(path)
+    if not size:
+        return
+    with open(path, 'rb') as capture, mmap.mmap(capture.fileno(), 0, access=mmap.ACCESS_READ) as content:
+        is_text: bool = is_text_capture(content)
+        start: int = 0
+        while start < size:
+            end: int = start
+            for _ in range(chunk_size):
+                if is_text:
+                    line_end: int = content.find(b'\n', end)
+                    end = size if line_end < 0 else line_end + 1
+                else:
+                    end += content[end] + 1
+                if end >= size:
+                    break
+            yield start, min(end, size)
+            start = end
+
+
+def unique_names(layout: TmiLayout) -> list[str]:
+    names: list[str] = []
+    for field in layout.fields:
+        name: str = field.name
+        suffix: int = 2
+        while name in names:
+            name = f'{field.name} ({suffix})'
+            suffix += 1
+        names.append(name)
+    return names
+
+
+def decode_block(layout: TmiLayout, messages: np.ndarray) -> dict[str, np.ndarray | list]:
+    """ decodes (N, layout.size) uint8 messages column by column """
+    records: np.ndarray = messages.view(layout.dtype).reshape(-1)
+    columns: dict[str, np.ndarray | list] = {}
+    for i, (name, field) in enumerate(zip(unique_names(layout), layout.fields)):
+        column: np.ndarray = records[f'f{i}']
+        if field.data_type == 'string':
+            columns[name] = [bytes(value).rstrip(b'\x00').decode('ascii', 'replace') for value in column]
+        elif field.data_type == 'struct time_t':
+            columns[name] = struct_times(column)
+        elif field.is_raw:
+            columns[name] = [bytes(value).hex().upper() for value in column]
+        elif column.ndim > 1:
+            columns[name] = column.tolist()
+        elif column.dtype.kind == 'u' and 'время' in field.name.lower():
+            columns[name] = to_datetime64(column)
+        else:
+            columns[name] = column
+    return columns
+
+
+def decode_chunk(source: str, first_index: int, frames: list[bytes],
+                 sat_name: str = 'auto') -> dict[str, pd.DataFrame]:
+    """ returns decoded frames grouped by '<satellite>_<layout name>' """
+    groups: dict[tuple[str, str, int], list[int]] = {}
+    for i, frame in enumerate(frames):
+        if len(frame) <= HEADER_SIZE + 4:
+            continue
+        groups.setdefault(frame_format(frame, sat_name), []).append(i)
+    result: dict[str, pd.DataFrame] = {}
+    for (sat, family, tmi_num), indexes in groups.items():
+        if not family:
+            continue
+        layouts: list[TmiLayout] = get_layouts(family)
+        if tmi_num >= len(layouts):
+            continue
+        layout: TmiLayout = layouts[tmi_num]
+        indexes = [i for i in indexes if len(frames[i]) == HEADER_SIZE + layout.size]
+        if not indexes:
+            continue
+        raw: np.ndarray = np.frombuffer(b''.join(frames[i] for i in indexes), dtype=np.uint8)
+        raw = raw.reshape(len(indexes), HEADER_SIZE + layout.size)
+        header: dict[str, list | np.ndarray] = {
+            'source': [source] * len(indexes),
+            'frame_index': first_index + np.asarray(indexes),
+            'crc_ok': check_frames([frames[i] for i in indexes]),
+            'rx_addr': ['.'.join(map(str, frames[i][1:5])) for i in indexes],
+            'tx_addr': ['.'.join(map(str, frames[i][5:9])) for i in indexes],
+        }
+        columns = decode_block(layout, np.ascontiguousarray(raw[:, HEADER_SIZE:]))
+        result[f'{sat}_{layout.name}'] = pd.DataFrame({**header, **columns})
+    return result
+
+
+class OutputWriter:
+    def __init__(self, out_dir: str, output_format: str) -> None:
+        self.out_dir: str = out_dir
+        self.output_format: str = output_format
+        self._parquet_writers: dict = {}
+        self._created: set[str] = set()
+        os.makedirs(out_dir, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.out_dir, f'{key}.{self.output_format}')
+
+    def write(self, key: str, frame: pd.DataFrame) -> None:
+        path: str = self.path(key)
+        is_new: bool = key not in self._created
+        self._created.add(key)
+        if self.output_format == 'csv':
+            frame.to_csv(path, mode='w' if is_new else 'a', header=is_new, index=False)
+        elif self.output_format == 'jsonl':
+            with open(path, 'w' if is_new else 'a', encoding='utf-8') as output:
+                for record in frame.to_dict('records'):
+                    output.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        elif self.output_format == 'parquet':
+            try:
+                import pyarrow as pa  # pylint: disable=import-outside-toplevel
+                import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+            except ImportError as err:
+                raise RuntimeError('parquet output requires pyarrow: pip install pyarrow') from err
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if key not in self._parquet_writers:
+                self._parquet_writers[key] = pq.ParquetWriter(path, table.schema)
+            self._parquet_writers[key].write_table(table)
+        else:
+            raise ValueError(f'unknown output format: {self.output_format}')
+
+    def close(self) -> None:
+        for writer in self._parquet_writers.values():
+            writer.close()
+        self._parquet_writers.clear()
+
+
+def iter_chunks(paths: Iterable[str], chunk_size: int) -> Iterator[tuple[str, int, int]]:
+    for path in paths:
+        for start, end in split_capture(path, chunk_size):
+            yield path, start, end
+
+
+def decode_range(path: str, start: int, end: int,
+                 sat_name: str = 'auto') -> tuple[int, int, dict[str, pd.DataFrame]]:
+    """ (start, number of frames, `decode_chunk` result) of the capture bytes [start, end), run by the workers """
+    frames: list[bytes] = list(read_frames(path, start, end))
+    return start, len(frames), decode_chunk(path, 0, frames, sat_name)
+
+
+def ordered_imap(executor: Executor, func: Callable, items: Iterable[tuple], window: int) -> Iterator:
+    """ like Executor.map but submits at most `window` items ahead, so inputs are not all loaded at once """
+    pending: deque[Future] = deque()
+    for item in items:
+        pending.append(executor.submit(func, *item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def decode_files(paths: list[str], out_dir: str, output_format: str = 'csv', sat_name: str = 'auto',
+                 workers: int | None = None, chunk_size: int = 10000,
+                 progress: Callable[[int, int], None] | None = None) -> dict[str, int]:
+    """ decodes capture files over a process pool, returns number of rows written per output """
+    writer = OutputWriter(out_dir, output_format)
+    rows: dict[str, int] = {}
+    frames_done: int = 0
+    workers = workers or os.cpu_count() or 1
+    chunks = ((path, start, end, sat_name) for path, start, end in iter_chunks(paths, chunk_size))
+    first_index: int = 0  # workers number the frames of their range from 0
+    try:
+        with ProcessPoolExecutor(workers) as executor:
+            results = ordered_imap(executor, decode_range, chunks, workers * 2)
+            for chunk_number, (start, count, decoded) in enumerate(results, 1):
+                if not start:
+                    first_index = 0
+                for key, frame in decoded.items():
+                    frame['frame_index'] += first_index
+                    writer.write(key, frame)
+                    rows[key] = rows.get(key, 0) + len(frame)
+                first_index += count
+                frames_done = sum(rows.values())
+                if progress:
+                    progress(chunk_number, frames_done)
+    finally:
+        writer.close()
+    return rows
+
+
+def print_progress(chunks: int, frames: int) -> None:
+    print(f'\rdecoded chunks: {chunks} frames: {frames}', end='', file=sys.stderr, flush=True)
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+from typing import Iterable
+import numpy as np
+import pandas as pd
+
+from cubesat_simradio.batch_decode import decode_chunk, is_text_capture, parse_line, scan_binary, scan_text
+from cubesat_simradio.crc import check_frames
+from cubesat_simradio.satellite_profiles import SatelliteProfile, get_registry
+from cubesat_simradio.telemetry import HEADER_SIZE, frame_format, satellite_name
+
+INDEX_SUFFIX: str = '.idx.npy'
+INDEX_VERSION: int = 2  # stored with the satellite code table, a different version rebuilds the index
+INDEX_DTYPE: np.dtype = np.dtype([('offset', '<u8'), ('length', '<u4'), ('timestamp', '<M8[s]'),
+                                  ('satellite', 'u1'), ('family', 'u1'), ('msg_id', '<u2'), ('tmi', '<i2'),
+                                  ('crc_ok', '?')])
+FAMILIES: tuple[str, ...] = ('NORBI', 'NORBI-2', '')  # '' is not decoded, see `frame_format`
+UNKNOWN_SATELLITE: str = 'unknown'  # `select` name of the senders without a registry profile
+UNKNOWN_SATELLITE_CODE: int = 0xFF
+BLOCK_RECORDS: int = 1 << 18  # frames held in memory before packing their records into the structured array
+
+
+def satellite_codes() -> dict[str, int]:
+    """ index codes of the registry profiles in registry order """
+    return {profile.name: code for code, profile in enumerate(get_registry())}
+
+
+def pack_records(items: list[tuple[int, int, str, bytes]], codes: dict[str, int]) -> np.ndarray:
+    """ index records of scanned (offset, length, timestamp, frame) items, `codes` numbers the satellites """
+    records: np.ndarray = np.zeros(len(items), INDEX_DTYPE)
+    if not items:
+        return records
+    offsets, lengths, timestamps, frames = zip(*items)
+    records['offset'] = offsets
+    records['length'] = lengths
+    records['timestamp'] = np.array(timestamps, 'datetime64[s]')
+    records['crc_ok'] = check_frames(list(frames))
+    formats: list[tuple[int, int, int, int]] = []  # satellite, family, msg_id, tmi
+    for frame in frames:
+        if len(frame) < HEADER_SIZE:
+            formats.append((UNKNOWN_SATELLITE_CODE, FAMILIES.index(''), 0, -1))
+            continue
+        if len(frame) <= HEADER_SIZE + 4:
+            formats.append((codes.get(satellite_name(frame), UNKNOWN_SATELLITE_CODE), FAMILIES.index(''),
+                            int.from_bytes(frame[13:15], 'big'), -1))
+            continue
+        sat_name, family, tmi_num = frame_format(frame, 'auto')
+        formats.append((codes.get(sat_name, UNKNOWN_SATELLITE_CODE), FAMILIES.index(family),
+                        int.from_bytes(frame[13:15], 'big'), min(tmi_num, 0x7FFF)))
+    for name, values in zip(('satellite', 'family', 'msg_id', 'tmi'), zip(*formats)):
+        records[name] = values
+    return records
+
+
+class CaptureIndex:
+    """ Sidecar index of a hex text or binary capture, see `read_frames` for the formats.
+
+    One streaming pass over the memory-mapped capture stores (byte offset, length, timestamp, satellite, TMI family,
+    msg_id, TMI number, CRC flag) of every received frame in `<capture>.idx.npy`. Captures are append-only logs: an
+    index older than a grown capture is extended from its last record, a shorter capture is indexed again. Queries
+    filter the index and read only the matching records.
+
+    Satellite codes are the registry order when the index is built. The code table is stored in `<capture>.idx.json`,
+    an index built with another table or version is built again. """
+
+    def __init__(self, path: str, index_path: str | None = None) -> None:
+        self.path: str = path
+        self.index_path: str = index_path or path + INDEX_SUFFIX
+        self.table_path: str = os.path.splitext(self.index_path)[0] + '.json'
+        self.records: np.ndarray = np.empty(0, INDEX_DTYPE)
+        self.satellites: list[str] = []  # satellite names by code of the records
+        self.is_text: bool = True
+
+    @classmethod
+    def open(cls, path: str, index_path: str | None = None, rebuild: bool = False) -> CaptureIndex:
+        """ loads the sidecar index and brings it up to date with the capture """
+        index = cls(path, index_path)
+        if not rebuild and os.path.exists(index.index_path) and os.path.exists(index.table_path):
+            with open(index.table_path, encoding='utf-8') as table_file:
+                table: dict = json.load(table_file)
+            if table.get('version') == INDEX_VERSION:
+                index.records = np.load(index.index_path)
+                index.satellites = table.get('satellites', [])
+        index.update()
+        return index
+
+    def save(self) -> None:
+        np.save(self.index_path, self.records)
+        with open(self.table_path, 'w', encoding='utf-8') as table_file:
+            json.dump({'version': INDEX_VERSION, 'satellites': self.satellites}, table_file, ensure_ascii=False)
+
+    def end(self) -> int:
+        """ capture offset after the last indexed record """
+        if not len(self.records):
+            return 0
+        return int(self.records['offset'][-1]) + int(self.records['length'][-1])
+
+    def update(self) -> int:
+        """ indexes the records appended to the capture since the last pass, returns their number """
+        size: int = os.path.getsize(self.path)
+        codes: dict[str, int] = satellite_codes()
+        rebuilt: bool = size < self.end() or self.records.dtype != INDEX_DTYPE or self.satellites != list(codes)
+        if rebuilt:
+            self.records = np.empty(0, INDEX_DTYPE)
+            self.satellites = list(codes)
+        if not size:
+            return 0
+        blocks: list[np.ndarray] = [self.records]
+        with open(self.path, 'rb') as capture, mmap.mmap(capture.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            self.is_text = is_text_capture(content)
+            scan = scan_text if self.is_text else scan_binary
+            items: list[tuple[int, int, str, bytes]] = []
+            for item in scan(content, self.end()):
+                items.append(item)
+                if len(items) >= BLOCK_RECORDS:
+                    blocks.append(pack_records(items, codes))
+                    items = []
+            blocks.append(pack_records(items, codes))
+        added: int = sum(len(block) for block in blocks[1:])
+        if added or rebuilt or not os.path.exists(self.index_path):
+            self.records = np.concatenate(blocks)
+            self.save()
+        return added
+
+    def select(self, satellite: str | None = None, tmi: int | None = None, family: str | None = None,
+               msg_id: int | None = None, start: str | np.datetime64 | None = None,
+               end: str | np.datetime64 | None = None, crc_ok: bool | None = None) -> np.ndarray:
+        """ numbers of the records matching every given filter, [start, end) is reception time """
+        mask: np.ndarray = np.ones(len(self.records), bool)
+        if satellite is not None:
+            profile: SatelliteProfile | None = get_registry().get(satellite)
+            if profile is not None:
+                code: int = self.satellites.index(profile.name) if profile.name in self.satellites else -1
+                mask &= self.records['satellite'] == code
+            elif satellite == UNKNOWN_SATELLITE:
+                mask &= self.records['satellite'] == UNKNOWN_SATELLITE_CODE
+            else:
+                mask[:] = False
+        if family is not None:
+            mask &= self.records['family'] == FAMILIES.index(family)
+        if tmi is not None:
+            mask &= self.records['tmi'] == tmi
+        if msg_id is not None:
+            mask &= self.records['msg_id'] == msg_id
+        if crc_ok is not None:
+            mask &= self.records['crc_ok'] == crc_ok
+        if start is not None:
+            mask &= self.records['timestamp'] >= np.datetime64(start, 's')
+        if end is not None:
+            mask &= self.records['timestamp'] < np.datetime64(end, 's')
+        return np.flatnonzero(mask)
+
+    def frames(self, numbers: Iterable[int]) -> list[bytes]:
+        """ reads the frames of the given records from the capture """
+        frames: list[bytes] = []
+        with open(self.path, 'rb') as capture, mmap.mmap(capture.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            for offset, length in self.records[['offset', 'length']][np.asarray(numbers, np.int64)].tolist():
+                data: bytes = content[offset:offset + length]
+                frames.append((parse_line(data) or b'') if self.is_text else data)
+        return frames
+
+    def decode(self, **filters) -> dict[str, pd.DataFrame]:
+        """ decoded frames of the records matching `select(**filters)` grouped like `decode_chunk` """
+        numbers: np.ndarray = self.select(**filters)
+        result: dict[str, pd.DataFrame] = decode_chunk(self.path, 0, self.frames(numbers))
+        for frame in result.values():
+            record_numbers: np.ndarray = numbers[frame['frame_index'].to_numpy()]
+            frame['frame_index'] = record_numbers
+            frame.insert(1, 'received', self.records['timestamp'][record_numbers])
+        return result
+
+
+def decode_captures(paths: Iterable[str], **filters) -> dict[str, pd.DataFrame]:
+    """ `CaptureIndex.decode` over several captures, indexes are built or updated on the way """
+    parts: dict[str, list[pd.DataFrame]] = {}
+    for path in paths:
+        for key, frame in CaptureIndex.open(path).decode(**filters).items():
+            parts.setdefault(key, []).append(frame)
+    return {key: pd.concat(frames, ignore_index=True) for key, frames in parts.items()}
+
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import math
+import numpy as np
+
+from cubesat_simradio.airtime import FSK_BITRATE
+from cubesat_simradio.models import SX127x_Modulation
+
+
+def lora_ber(snr_db: float, spread_factor: int = 10) -> float:
+    """ union bound for noncoherent orthogonal 2**SF-ary chirp demodulation """
+    symbols: int = 1 << spread_factor
+    es_n0: float = 10 ** (snr_db / 10) * symbols
+    symbol_error: float = min(1.0, (symbols - 1) / 2 * math.exp(-es_n0 / 2))
+    return symbol_error * (symbols / 2) / (symbols - 1)
+
+
+def fsk_ber(snr_db: float, bandwidth_hz: float, bitrate: float) -> float:
+    """ noncoherent binary FSK """
+    eb_n0: float = 10 ** (snr_db / 10) * bandwidth_hz / bitrate
+    return 0.5 * math.exp(-eb_n0 / 2)
+
+
+class GilbertElliott:
+    """ two state burst error process, transition probabilities are per bit """
+
+    def __init__(self, p_good_to_bad: float, p_bad_to_good: float, bad_ber: float = 0.1) -> None:
+        self.p_good_to_bad: float = p_good_to_bad
+        self.p_bad_to_good: float = p_bad_to_good
+        self.bad_ber: float = bad_ber
+
+    @property
+    def bad_fraction(self) -> float:
+        return self.p_good_to_bad / (self.p_good_to_bad + self.p_bad_to_good)
+
+
+class ChannelModel:
+    """ Bit level corruption of packets: BER from SNR, Gilbert-Elliott bursts, truncation and preamble misses.
+
+    The BER follows the link modulation: `lora_ber` for LoRa, `fsk_ber` with `bandwidth_hz` and `bitrate` for FSK. """
+
+    def __init__(self, snr_db: float = 10.0, spread_factor: int = 10, burst: GilbertElliott | None = None,
+                 truncation_prob: float = 0.0, preamble_miss_prob: float = 0.0, seed: int | None = None,
+                 modulation: SX127x_Modulation = SX127x_Modulation.LORA, bandwidth_hz: float = 250_000.0,
+                 bitrate: float = FSK_BITRATE) -> None:
+        self.snr_db: float = snr_db
+        self.spread_factor: int = spread_factor
+        self.modulation: SX127x_Modulation = modulation
+        self.bandwidth_hz: float = bandwidth_hz
+        self.bitrate: float = bitrate
+        self.burst: GilbertElliott | None = burst
+        self.truncation_prob: float = truncation_prob
+        self.preamble_miss_prob: float = preamble_miss_prob
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+        self.ber: float = self.link_ber(snr_db)
+        self._is_bad: bool = False
+        self._run_left: int = 0
+
+    @classmethod
+    def from_interference(cls, interference_level: int, spread_factor: int = 10, **kwargs) -> ChannelModel:
+        """ clean link where roughly `interference_level` % of 143 bytes frames catch a 32 bits burst """
+        if interference_level <= 0:
+            return cls(spread_factor=spread_factor, **kwargs)
+        frame_bits: int = 143 * 8
+        p_good_to_bad: float = -math.log(1 - min(interference_level, 99) / 100) / frame_bits
+        return cls(spread_factor=spread_factor, burst=GilbertElliott(p_good_to_bad, 1 / 32), **kwargs)
+
+    def link_ber(self, snr_db: float) -> float:
+        if self.modulation == SX127x_Modulation.FSK:
+            return fsk_ber(snr_db, self.bandwidth_hz, self.bitrate)
+        return lora_ber(snr_db, self.spread_factor)
+
+    def set_snr(self, snr_db: float) -> None:
+        self.snr_db = snr_db
+        self.ber = self.link_ber(snr_db)
+
+    def set_link(self, modulation: SX127x_Modulation, spread_factor: int, bandwidth_hz: float,
+                 bitrate: float = FSK_BITRATE) -> None:
+        """ radio settings of the link the next packets go through """
+        if (modulation, spread_factor, bandwidth_hz, bitrate) != (self.modulation, self.spread_factor,
+                                                                  self.bandwidth_hz, self.bitrate):
+            self.modulation, self.spread_factor, self.bandwidth_hz, self.bitrate = (modulation, spread_factor,
+                                                                                    bandwidth_hz, bitrate)
+            self.ber = self.link_ber(self.snr_db)
+
+    def _draw_run(self, is_bad: bool) -> int:
+        assert self.burst is not None
+        return int(self.rng.geometric(self.burst.p_bad_to_good if is_bad else self.burst.p_good_to_bad))
+
+    def _bad_intervals(self, bits: int) -> tuple[np.ndarray, np.ndarray]:
+        """ (starts, lengths) of bad state runs in the next `bits` bits of the stream """
+        starts: list[int] = []
+        lengths: list[int] = []
+        position: int = 0
+        is_bad: bool = self._is_bad
+        run: int = self._run_left or self._draw_run(is_bad)
+        while True:
+            if is_bad:
+                starts.append(position)
+                lengths.append(run)
+            if position + run >= bits:
+                self._is_bad = is_bad
+                self._run_left = position + run - bits
+                break
+            position += run
+            is_bad = not is_bad
+            run = self._draw_run(is_bad)
+        return np.array(starts, np.int64), np.array(lengths, np.int64)
+
+    def _flip_bits(self, buffer: np.ndarray) -> int:
+        bits: int = buffer.shape[0] * 8
+        # positions are drawn without replacement: a bit drawn twice would be flipped back
+        positions: list[np.ndarray] = [self.rng.choice(bits, self.rng.binomial(bits, self.ber), replace=False)]
+        if self.burst is not None:
+            starts, lengths = self._bad_intervals(bits)
+            lengths = np.minimum(lengths, bits - starts)
+            total: int = int(lengths.sum())
+            if total > 0:
+                offsets: np.ndarray = self.rng.choice(total, self.rng.binomial(total, self.burst.bad_ber),
+                                                      replace=False)
+                ends: np.ndarray = np.cumsum(lengths)
+                run: np.ndarray = np.searchsorted(ends, offsets, 'right')
+                positions.append(starts[run] + offsets - (ends[run] - lengths[run]))
+        # a bit hit by both the background and the burst errors flips once
+        flips: np.ndarray = np.unique(np.concatenate(positions)) if len(positions) > 1 else positions[0]
+        np.bitwise_xor.at(buffer, flips >> 3, (1 << (flips & 7)).astype(np.uint8))
+        return flips.shape[0]
+
+    def apply(self, data: bytes) -> bytes | None:
+        """ returns corrupted copy of the packet or None if the receiver missed its preamble """
+        if self.preamble_miss_prob and self.rng.random() < self.preamble_miss_prob:
+            return None
+        buffer: np.ndarray = np.frombuffer(data, dtype=np.uint8).copy()
+        self._flip_bits(buffer)
+        if self.truncation_prob and buffer.shape[0] > 1 and self.rng.random() < self.truncation_prob:
+            buffer = buffer[:self.rng.integers(1, buffer.shape[0])]
+        return buffer.tobytes()
+
+    def apply_batch(self, frames: np.ndarray,
+                    lengths: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ corrupts a (N, L) uint8 batch as one bit stream, returns (frames, lengths, received mask) """
+        frames = np.array(frames, dtype=np.uint8, copy=True)
+        count: int = frames.shape[0]
+        lengths = np.full(count, frames.shape[1], np.int64) if lengths is None else np.array(lengths, np.int64)
+        self._flip_bits(frames.reshape(-1))
+        truncated: np.ndarray = (self.rng.random(count) < self.truncation_prob) & (lengths > 1)
+        lengths[truncated] = self.rng.integers(1, lengths[truncated])
+        received: np.ndarray = self.rng.random(count) >= self.preamble_miss_prob
+        return frames, lengths, received
@@ -0,0 +1,61 @@
+import argparse
+import asyncio
+import sys
+
+
+def decode(args: argparse.Namespace) -> int:
+    # pandas and the emulator are imported by the command that needs them
+    from cubesat_simradio.batch_decode import decode_files, print_progress  # pylint: disable=import-outside-toplevel
+    rows: dict[str, int] = decode_files(args.files, args.output, args.format, args.sat, args.workers, args.chunk_size,
+                                        None if args.quiet else print_progress)
+    if not args.quiet:
+        print(file=sys.stderr)
+    for key, count in sorted(rows.items()):
+        print(f'{key}: {count} frames')
+    return 0
+
+
+def serve(args: argparse.Namespace) -> int:
+    from cubesat_simradio.server import EmulatorServer  # pylint: disable=import-outside-toplevel
+    server = EmulatorServer(args.host, args.port, args.unix, args.queue_size, args.max_sessions, args.realtime,
+                            args.sat, args.interference)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cubesat_simradio',
+                                     description='CubeSat radio emulator. Without a command starts the interactive '
+                                                 'example session.')
+    commands = parser.add_subparsers(dest='command')
+    decode_parser = commands.add_parser('decode', help='decode TMI frames from capture files')
+    decode_parser.add_argument('files', nargs='+', help='hex text or binary capture files')
+    decode_parser.add_argument('-o', '--output', default='decoded', help='output directory')
+    decode_parser.add_argument('-f', '--format', choices=['csv', 'jsonl', 'parquet'], default='csv')
+    decode_parser.add_argument('--sat', choices=['auto', 'NORBI', 'NORBI-2'], default='auto',
+                               help='satellite of the frames, auto detects it by address')
+    decode_parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: all cores)')
+    decode_parser.add_argument('--chunk-size', type=int, default=10000, help='frames per work unit')
+    decode_parser.add_argument('-q', '--quiet', action='store_true', help='do not report progress')
+    decode_parser.set_defaults(handler=decode)
+
+    serve_parser = commands.add_parser('serve', help='serve emulated satellites over TCP or a UNIX socket')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=5555)
+    serve_parser.add_argument('--unix', default=None, help='UNIX socket path instead of TCP')
+    serve_parser.add_argument('--queue-size', type=int, default=64, help='outgoing frames buffered per connection')
+    serve_parser.add_argument('--max-sessions', type=int, default=1024)
+    serve_parser.add_argument('--realtime', action='store_true', help='wait packet airtime before answering')
+    serve_parser.add_argument('--sat', default='NORBI', help='satellite of connections without HELLO')
+    serve_parser.add_argument('--interference', type=int, default=0, help='downlink interference level, %%')
+    serve_parser.set_defaults(handler=serve)
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        from cubesat_simradio.examples.example import main as example_main  # pylint: disable=import-outside-toplevel
+        example_main()
+        return 0
+    return args.handler(args)
@@ -0,0 +1,76 @@
+import numpy as np
+
+
+# CRC-16/X-25 (poly 0x1021 reflected, init 0xFFFF, xorout 0xFFFF) as used by the NORBI TMI checksum.
+# It covers the message part of a radio frame (after the 15 bytes header) and is stored little endian.
+CRC16_POLY: int = 0x8408
+CRC16_INIT: int = 0xFFFF
+CRC16_XOROUT: int = 0xFFFF
+CRC16_OFFSET: int = 15
+
+
+def _make_table() -> list[int]:
+    table: list[int] = []
+    for byte in range(256):
+        crc: int = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ CRC16_POLY if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+CRC16_TABLE: list[int] = _make_table()
+CRC16_TABLE_NP: np.ndarray = np.array(CRC16_TABLE, dtype=np.uint16)
+
+
+def crc16(data: bytes | bytearray | memoryview) -> int:
+    crc: int = CRC16_INIT
+    table: list[int] = CRC16_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc ^ CRC16_XOROUT
+
+
+def crc16_batch(data: np.ndarray, lengths: np.ndarray | None = None) -> np.ndarray:
+    """ CRC16 of every row of a (N, L) uint8 array; `lengths` limits each row to its first lengths[i] bytes """
+    data = np.asarray(data, dtype=np.uint8)
+    crc: np.ndarray = np.full(data.shape[0], CRC16_INIT, dtype=np.uint16)
+    for column in range(data.shape[1]):
+        updated: np.ndarray = (crc >> 8) ^ CRC16_TABLE_NP[(crc ^ data[:, column]) & 0xFF]
+        if lengths is None:
+            crc = updated
+        else:
+            crc = np.where(column < lengths, updated, crc)
+    return crc ^ np.uint16(CRC16_XOROUT)
+
+
+def seal_frame(data: bytearray) -> bytearray:
+    """ writes CRC16 of the frame message into its last two bytes """
+    data[-2:] = crc16(memoryview(data)[CRC16_OFFSET:-2]).to_bytes(2, 'little')
+    return data
+
+
+def seal_frames(frames: np.ndarray) -> np.ndarray:
+    frames[:, -2:] = crc16_batch(frames[:, CRC16_OFFSET:-2]).astype('<u2')[:, None].view(np.uint8)
+    return frames
+
+
+def check_frame(data: bytes) -> bool:
+    if len(data) < CRC16_OFFSET + 2:
+        return False
+    return crc16(memoryview(data)[CRC16_OFFSET:-2]) == int.from_bytes(data[-2:], 'little')
+
+
+def check_frames(frames: list[bytes]) -> np.ndarray:
+    """ `check_frame` of every frame, frames of one length are checked together with `crc16_batch` """
+    result: np.ndarray = np.zeros(len(frames), dtype=bool)
+    by_length: dict[int, list[int]] = {}
+    for i, frame in enumerate(frames):
+        by_length.setdefault(len(frame), []).append(i)
+    for length, indexes in by_length.items():
+        if length < CRC16_OFFSET + 2:
+            continue
+        rows: np.ndarray = np.frombuffer(b''.join(frames[i] for i in indexes), dtype=np.uint8).reshape(-1, length)
+        stored: np.ndarray = rows[:, -2].astype(np.uint16) | rows[:, -1].astype(np.uint16) << 8
+        result[indexes] = crc16_batch(rows[:, CRC16_OFFSET:-2]) == stored
+    return result
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator
+import numpy as np
+
+from cubesat_simradio.utils import Clock
+
+if TYPE_CHECKING:
+    from cubesat_simradio.sat_path import SatellitePath
+
+LIGHT_SPEED = 299_792_458  # m/s
+FSTEP: float = 32e6 / 2 ** 19  # SX127x synthesizer step (Fxosc / 2^19), ~61 Hz
+
+
+def doppler_shift(frequency: float, range_rate_km_s: np.ndarray | float) -> np.ndarray | float:
+    """ received minus transmitted frequency, positive while the satellite approaches """
+    return -frequency * np.asarray(range_rate_km_s) * 1000 / LIGHT_SPEED
+
+
+def to_frf(frequency: np.ndarray | float, step: float = FSTEP) -> np.ndarray:
+    """ SX127x RegFrf value closest to `frequency` """
+    return np.rint(np.asarray(frequency) / step).astype(np.int64)
+
+
+@dataclass(frozen=True)
+class RetuneEvent:
+    timestamp: float
+    downlink_frf: int
+    uplink_frf: int
+    step: float = FSTEP
+
+    @property
+    def downlink_hz(self) -> float:
+        return self.downlink_frf * self.step
+
+    @property
+    def uplink_hz(self) -> float:
+        return self.uplink_frf * self.step
+
+
+class DopplerProfile:
+    """ Quantized ground station frequencies over a pass, stored only at the points where a retune is needed """
+
+    def __init__(self, timestamps: np.ndarray, downlink_frf: np.ndarray, uplink_frf: np.ndarray,
+                 step: float = FSTEP) -> None:
+        changed: np.ndarray = np.ones(len(timestamps), dtype=bool)
+        changed[1:] = (np.diff(downlink_frf) != 0) | (np.diff(uplink_frf) != 0)
+        self.step: float = step
+        self.timestamps: np.ndarray = np.asarray(timestamps)[changed]
+        self.downlink_frf: np.ndarray = np.asarray(downlink_frf)[changed]
+        self.uplink_frf: np.ndarray = np.asarray(uplink_frf)[changed]
+        self.samples: int = len(timestamps)
+
+    @classmethod
+    def from_path(cls, path: SatellitePath, downlink_frequency: float, uplink_frequency: float | None = None,
+                  step: float = FSTEP) -> DopplerProfile:
+        """ downlink: receive at f + shift; uplink: transmit at f - shift so the satellite hears f """
+        uplink_frequency = downlink_frequency if uplink_frequency is None else uplink_frequency
+        downlink: np.ndarray = downlink_frequency + doppler_shift(downlink_frequency, path.dist_rate)
+        uplink: np.ndarray = uplink_frequency - doppler_shift(uplink_frequency, path.dist_rate)
+        return cls(path.timestamps, to_frf(downlink, step), to_frf(uplink, step), step)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, index: int) -> RetuneEvent:
+        return RetuneEvent(float(self.timestamps[index]), int(self.downlink_frf[index]), int(self.uplink_frf[index]),
+                           self.step)
+
+    def __iter__(self) -> Iterator[RetuneEvent]:
+        return (self[i] for i in range(len(self)))
+
+    def at(self, timestamp: float) -> RetuneEvent:
+        """ frequencies in effect at `timestamp` """
+        return self[max(int(np.searchsorted(self.timestamps, timestamp, side='right')) - 1, 0)]
+
+    def stream(self, clock: Clock | None = None, start: float | None = None) -> Iterator[RetuneEvent]:
+        """ yields every retune event when it is due; starts with the one in effect at `start` (default now) """
+        clock = clock or Clock()
+        start = clock.time() if start is None else start
+        first: int = max(int(np.searchsorted(self.timestamps, start, side='right')) - 1, 0)
+        for i in range(first, len(self)):
+            delay: float = self.timestamps[i] - clock.time()
+            if delay > 0:
+                clock.sleep(delay)
+            yield self[i]
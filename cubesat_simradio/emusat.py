@@ -1,20 +1,41 @@
 from __future__ import annotations
 from ast import literal_eval
-from datetime import datetime, timedelta
+from collections import deque
 from enum import Enum
 from queue import Empty, Queue
-import time
 import threading
 import random
+from typing import TYPE_CHECKING
 from loguru import logger
 import numpy as np
-from skyfield.toposlib import GeographicPosition
 
-from cubesat_simradio.models import RadioModel, SessionModel, SX127x_Modulation
-from cubesat_simradio.emusats_configs import NORBI_CONFIG, NORBI2_CONFIG, STRATOSAT_CONFIG, DEFAULT_CONFIG, RadioConfig
-from cubesat_simradio.utils import Signal
-from cubesat_simradio.sat_path import SatellitePath, angle_points
+from cubesat_simradio.models import SX127x_Modulation
+from cubesat_simradio.onboard_time import onboard_seconds
+from cubesat_simradio.utils import Clock, Signal
 from cubesat_simradio.radio_packet import RadioPacket
+from cubesat_simradio.registers import (READ_REGISTERS_MSG_ID, WRITE_REGISTERS_MSG_ID, RegisterError, RegisterFile,
+                                        parse_read_message)
+from cubesat_simradio.reply_cache import ReplyCache
+from cubesat_simradio.crc import crc16, seal_frame
+from cubesat_simradio.channel import ChannelModel
+from cubesat_simradio.metrics import METRICS, MetricsRegistry
+from cubesat_simradio.telemetry import OrbitClock, TelemetryGenerator, load_layouts
+from cubesat_simradio.satellite_profiles import BROADCAST_ADDRESS, SatelliteProfile, get_registry
+
+if TYPE_CHECKING:
+    from skyfield.toposlib import GeographicPosition
+    from cubesat_simradio.emusats_configs import RadioConfig
+    from cubesat_simradio.sat_path import SatellitePath
+    from cubesat_simradio.timer_wheel import Timer, TimerWheel
+    from cubesat_simradio.schemas import RadioModel, SessionModel
+    from cubesat_simradio.tle_store import TleStore
+
+PSS_TMI_COMMANDS: dict[bytes, int] = {bytes.fromhex('90 04 00 35 80 00 00 00 00'): 0,
+                                      bytes.fromhex('30 0A 00 35 80 00 00 00 00'): 1,
+                                      bytes.fromhex('D0 0F 00 35 80 00 00 00 00'): 2,
+                                      bytes.fromhex('70 15 00 35 80 00 00 00 00'): 3}
+PSS_TMI_COMMAND_SIZE: int = 9  # one read item and the end term, some ground software appends 2 more bytes
+
 
 class EMUSAT:
     transmited = Signal(bytes)
@@ -24,52 +45,80 @@ class EMUSAT:
     session: SessionModel
     path: SatellitePath
     def __init__(self, name: str = 'NORBI', **kwargs) -> None:
+        self.clock: Clock = kwargs.get('clock', Clock())
+        self.transmited = Signal(bytes)
+        self.metrics: MetricsRegistry = kwargs.get('metrics', METRICS)
         self.name: str = name
         self.update_config(name)
         self.transaction_id: int = random.randint(0, 0xFFFF)
-        self.onboard_time: float = time.time()
+        self.onboard_time: float = self.clock.time()
         self.frame_num: int = random.randint(28853, 38543)
 
         self._routine_flag = False
 
         self._next_beacon_timestamp: float = 0
-        self._rx_queue: Queue[bytes] = Queue(1)
+        self._rx_queue: Queue[tuple[float, bytes | RadioPacket]] = Queue(1)
+        # with a shared timer wheel beacons, uplinks and replies run as its timers instead of a thread per satellite
+        self.timers: TimerWheel | None = kwargs.get('timers')
+        self._beacon_timer: Timer | None = None
 
         self.tx_loss_level: int = kwargs.get('tx_loss_level', 0)  # 0 to 100
         self.rx_loss_level: int = kwargs.get('rx_loss_level', 0)  # 0 to 100
+        self.uplink_channel: ChannelModel | None = kwargs.get('uplink_channel')
         # self.start_t_index = 0
         # self.finish_t_index = -1
         self.routes = {}
+        self.telemetry: dict[str, TelemetryGenerator] = kwargs.get('telemetry', {})
+        # retransmitted requests are answered with the same frame, reply_cache_ttl=0 disables it
+        self.reply_cache: ReplyCache = kwargs.get('reply_cache') or ReplyCache(kwargs.get('reply_cache_ttl', 10.0))
+        # board times of the latest sent beacons and TMI, register writes are signed with one of them
+        self.board_times: deque[int] = deque(maxlen=16)
+        self._registers: RegisterFile | None = kwargs.get('registers')
 
     def add_route(self, request_data: bytes, response_data: bytes):
         self.routes.update({request_data: response_data})
 
+    def enable_telemetry_generator(self, seed: int | None = None) -> None:
+        clock: OrbitClock = OrbitClock.from_tle(self.radio_config.tle) if self.radio_config.tle else OrbitClock()
+        templates = {'NORBI': self.generate_answer_tmi, 'NORBI-2': self.generate_answer_pss_tmi}
+        for formats in self.profile.telemetry:
+            for i, layout in enumerate(load_layouts(formats)):
+                self.telemetry[layout.name] = TelemetryGenerator(layout, templates[formats](i), clock=clock,
+                                                                 seed=seed)
+
+    def _generate_telemetry(self, layout_name: str, data: bytearray, onboard_time: int) -> bytearray:
+        generator: TelemetryGenerator | None = self.telemetry.get(layout_name)
+        if generator is None:
+            return data
+        generator.frame_counter.value = self.frame_num
+        frame: bytearray = bytearray(generator.generate(1, onboard_time)[0].tobytes())
+        frame[:15] = data[:15]
+        return frame
+
     def update_config(self, sat_name: str):
-        self.name = sat_name
-        if self.name.upper() == 'NORBI':
-            self.radio_config: RadioConfig = NORBI_CONFIG
-            self.addresses: tuple = (bytes([10, 6, 1, 201]), bytes([10, 6, 1, 202]))
-        elif self.name.upper() in ['NORBI2', 'NORBI-2', 'NORBY2', 'NORBY-2']:
-            self.name = 'NORBI-2'
-            self.radio_config = NORBI2_CONFIG
-            self.addresses: tuple = (bytes([10, 6, 1, 203]), bytes([10, 6, 1, 204]))
-        elif self.name.upper() == 'STRATOSAT-TK 1 (RS52S)':
-            self.radio_config = STRATOSAT_CONFIG
+        profile: SatelliteProfile | None = get_registry().get(sat_name)
+        if profile is None:
+            from cubesat_simradio.emusats_configs import DEFAULT_CONFIG  # pylint: disable=import-outside-toplevel
+            self.name = sat_name
+            self.profile: SatelliteProfile = SatelliteProfile(sat_name, {})
+            self.radio_config: RadioConfig = DEFAULT_CONFIG.model_copy()
         else:
-            self.radio_config = DEFAULT_CONFIG
+            self.name = profile.name
+            self.profile = profile
+            self.radio_config = profile.radio_config()
+        self.addresses: tuple[bytes, ...] = self.profile.addresses
         # if hasattr(self, 'path'):
         #     self.start_t_index = int(self.path.altitude.shape[0] * 0.85)
         #     self.finish_t_index = int(self.path.altitude.shape[0] * 0.15)
-        logger.success(f'config is updated: {self.name}\n{self.radio_config}')
+        logger.success('config is updated: {}\n{}', self.name, self.radio_config)
 
     def recalcute_path(self, gs_position: GeographicPosition):
-        norbi_path: SatellitePath = angle_points(NORBI_CONFIG.tle, 'NORBI', gs_position, self.session.start,
-                                                 self.session.finish)
-        norbi2_path: SatellitePath = angle_points(NORBI2_CONFIG.tle, 'NORBI-2', gs_position, self.session.start,
-                                                  self.session.finish)
-        stratosat_path: SatellitePath = angle_points(STRATOSAT_CONFIG.tle, 'STRATOSAT-TK 1 (RS52S)', gs_position,
-                                                     self.session.start, self.session.finish)
-        logger.debug(f'{norbi_path=}\n{norbi2_path=}\n{stratosat_path=}')
+        from cubesat_simradio.tle_store import get_tle_store  # pylint: disable=import-outside-toplevel
+        store: TleStore = get_tle_store()
+        for profile in get_registry():
+            if profile.name in store:
+                path: SatellitePath = store.path(profile.name, gs_position, self.session.start, self.session.finish)
+                logger.debug('{} path={}', profile.name, path)
 
     def get_actual_start_finish(self, path: SatellitePath):
         start = np.argmax(path.altitude > 0)
@@ -78,27 +127,31 @@ class EMUSAT:
             return path.t_points[start], path.t_points[finish]
         return None
 
-    def get_norbi2_time(self):
-        d0 = datetime(2000, 1, 1, 0, 0, 0, 0).timestamp()
-        d1 = (datetime.now() - timedelta(8568, 8, minutes=55, hours=8)).timestamp()
-        return int(d1 - d0)
+    def get_norbi2_time(self) -> int:
+        return onboard_seconds('norbi2', self.clock.time())
 
-    def get_norbi_time(self):
-        d0 = datetime(2000, 1, 1, 0, 0, 0, 0).timestamp()
-        d1 = (datetime.now() - timedelta(8135, 56, minutes=13, hours=14)).timestamp()
-        return int(d1 - d0)
+    def get_norbi_time(self) -> int:
+        return onboard_seconds('norbi', self.clock.time())
 
     def power_on(self) -> None:
         self.radio_config.mode = random.choice([SX127x_Modulation.LORA, SX127x_Modulation.FSK])
-        logger.debug(f'start emulator session with {self.name}')
-        self._next_beacon_timestamp = random.randint(10, self.BEACON_PERIOD) + time.time()
+        logger.debug('start emulator session with {}', self.name)
+        self._next_beacon_timestamp = random.randint(10, self.BEACON_PERIOD) + self.clock.time()
         self._routine_flag = True
+        if self.timers is not None:
+            self._beacon_timer = self.timers.call_at(self._next_beacon_timestamp, self._on_beacon_timer)
+            self.timers.start()
+            return
         self._routine_thread = threading.Thread(target=self._sat_process, name='NORBI process', daemon=True)
         self._routine_thread.start()
 
     def power_off(self) -> None:
         self._routine_flag = False
-        self._routine_thread.join(0.5)
+        if self._beacon_timer is not None:
+            self._beacon_timer.cancel()
+            self._beacon_timer = None
+        if self.timers is None:
+            self._routine_thread.join(0.5)
 
     def _sat_process(self) -> None:
         logger.debug('start sat process')
@@ -106,11 +159,24 @@ class EMUSAT:
             if self.is_time_for_beacon():
                 self.change_state()
             try:
-                data: bytes = self._rx_queue.get(timeout=0.5)
-                self._cmd_handler(data)
+                self._handle_uplink(*self._rx_queue.get(timeout=0.5))
             except Empty:
                 pass
-            time.sleep(0.2)
+            self.clock.sleep(0.2)
+
+    def _on_beacon_timer(self) -> None:
+        if self._routine_flag:
+            self.change_state()
+
+    def _handle_uplink(self, enqueued_at: float, data: bytes | RadioPacket) -> None:
+        self.metrics.observe_since('uplink_queue_wait_seconds', self.name, enqueued_at)
+        self._cmd_handler(data)
+
+    def _queue_uplink(self, data: bytes | RadioPacket) -> None:
+        if self.timers is not None:
+            self.timers.call_soon(self._handle_uplink, self.metrics.start(), data)
+        else:
+            self._rx_queue.put((self.metrics.start(), data), timeout=0.5)
 
     def change_state(self) -> None:
         self.refresh_beacon_timer()
@@ -120,7 +186,7 @@ class EMUSAT:
         elif self.radio_config.mode == SX127x_Modulation.FSK:
             self.radio_config.mode = SX127x_Modulation.LORA
             logger.debug('lora beacon')
-            if self.name == 'STRATOSAT-TK 1 (RS52S)':
+            if self.profile.beacon == 'stratosat':
                 beacon = self.get_stratosat_beacon()
             else:
                 beacon = self.get_beacon()
@@ -135,59 +201,148 @@ class EMUSAT:
         return val1 == val2
 
     def receive_data(self, data: bytes | list[int], radio_parameters: RadioModel | None = None) -> None:
+        frame: bytes | None = self.accept_uplink(data, radio_parameters)
+        if frame is not None:
+            self._queue_uplink(frame)
+
+    def accept_uplink(self, data: bytes | list[int], radio_parameters: RadioModel | None = None) -> bytes | None:
+        """ uplink frame with hardware CRC as the satellite radio gets it, None if lost or radio config differs """
         if 0 < random.random() < 1 - self.rx_loss_level / 100:
-            if not radio_parameters:
-                self._rx_queue.put(bytes(data) + b'\xff\xff', timeout=0.5)
+            frame: bytes | None = bytes(data) + crc16(bytes(data)[15:]).to_bytes(2, 'little')
+            if self.uplink_channel:
+                frame = self.uplink_channel.apply(frame)
+                if frame is None:
+                    self.metrics.inc('packets_lost', self.name)
+                    return None
             if radio_parameters:
                 diff_items: dict = {k: radio_parameters.model_dump()[k] for k in radio_parameters.model_dump()
                                     if k in self.radio_config.model_dump()
                                     and not self.__compare_models(self.radio_config.model_dump()[k],
                                                                   radio_parameters.model_dump()[k])}
-                if len(diff_items) == 0:
-                    hardware_crc = b'\xff\xff'
-                    self._rx_queue.put(bytes(data) + hardware_crc, timeout=0.5)
-                else:
-                    logger.warning(f'different attributes: {diff_items}')
-            return None
+                if len(diff_items) != 0:
+                    logger.warning('different attributes: {}', diff_items)
+                    return None
+            return frame
+        self.metrics.inc('packets_lost', self.name)
+        return None
+
+    def receive_packet(self, radio_packet: RadioPacket) -> None:
+        """ queues an uplink already parsed and validated by `UplinkRouter` """
+        self._queue_uplink(radio_packet)
 
-    def _cmd_handler(self, data: bytes) -> None:
+    def parse_uplink(self, data: bytes) -> RadioPacket | None:
+        """ transport packet of a received frame, None if its length or CRC is wrong """
         if len(data) < 15:
-            logger.error(f'got incorrect message len: {data}')
+            logger.error('got incorrect message len: {}', data)
+            self.metrics.inc('commands_rejected', self.name)
             return None
         radio_packet = RadioPacket(bytes(data))
         if radio_packet.packet_length != (len(data) - 3):
-            logger.error(f'got incorrect message packet length: {data}')
+            logger.error('got incorrect message packet length: {}', data)
+            self.metrics.inc('commands_rejected', self.name)
+            return None
+        if not radio_packet.is_crc_valid:
+            logger.error('got message with incorrect crc: {}', data)
+            self.metrics.inc('commands_rejected', self.name)
             return None
-        if radio_packet.rx_addr not in self.addresses:
-            logger.error(f'got incorrect message address: {data}')
+        return radio_packet
+
+    def is_addressed(self, radio_packet: RadioPacket) -> bool:
+        return radio_packet.rx_addr in self.addresses or (radio_packet.rx_addr == BROADCAST_ADDRESS
+                                                          and len(self.addresses) > 0)
+
+    def _cmd_handler(self, data: bytes | RadioPacket) -> None:
+        started: float = self.metrics.start()
+        radio_packet: RadioPacket | None = data if isinstance(data, RadioPacket) else self.parse_uplink(data)
+        if radio_packet is None:
             return None
-        if self.name in ['NORBI', 'NORBI-2']:
-            if radio_packet.msg_id in [1, 3, 5, 7, 9]:
-                self.send_data(self.generate_answer_tmi((radio_packet.msg_id - 1) // 2))
-            elif radio_packet.msg[:-2] == bytes.fromhex('90 04 00 35 80 00 00 00 00'):
-                self.send_data(self.generate_answer_pss_tmi(0))
-            elif radio_packet.msg[:-2] == bytes.fromhex('30 0A 00 35 80 00 00 00 00'):
-                self.send_data(self.generate_answer_pss_tmi(1))
-            elif radio_packet.msg[:-2] == bytes.fromhex('D0 0F 00 35 80 00 00 00 00'):
-                self.send_data(self.generate_answer_pss_tmi(2))
-            elif radio_packet.msg[:-2] == bytes.fromhex('70 15 00 35 80 00 00 00 00'):
-                self.send_data(self.generate_answer_pss_tmi(3))
+        if not self.is_addressed(radio_packet):
+            logger.error('got incorrect message address: {}', radio_packet.raw_data)
+            self.metrics.inc('commands_rejected', self.name)
+            return None
+        self.handle_packet(radio_packet, started)
+        return None
+
+    def handle_packet(self, radio_packet: RadioPacket, started: float = 0.0) -> None:
+        """ answers a valid packet addressed to this satellite """
+        now: float = self.clock.time()
+        request: bytes = radio_packet.raw_data[13:]  # message id, payload and CRC
+        response: bytes | None = self.reply_cache.get(radio_packet.tx_addr, radio_packet.transaction_num, request, now)
+        if response is not None:
+            self.metrics.inc('replies_cached', self.name)
+            self.metrics.inc('commands_handled', self.name)
+            self.send_data(response)
+            self.refresh_beacon_timer()
+            return
+        generation_started: float = self.metrics.start()
+        commands: frozenset[str] = self.profile.commands
+        if commands:
+            if 'tmi' in commands and radio_packet.msg_id in [1, 3, 5, 7, 9]:
+                response = self.generate_answer_tmi((radio_packet.msg_id - 1) // 2)
+            elif 'pss_tmi' in commands and radio_packet.msg[:PSS_TMI_COMMAND_SIZE] in PSS_TMI_COMMANDS:
+                response = self.answer_pss_tmi(radio_packet, PSS_TMI_COMMANDS[radio_packet.msg[:PSS_TMI_COMMAND_SIZE]])
+            elif 'registers' in commands and radio_packet.msg_id in (READ_REGISTERS_MSG_ID, WRITE_REGISTERS_MSG_ID):
+                response = self.answer_registers(radio_packet)
             elif radio_packet.msg in self.routes.keys():
-                response: bytes = self.routes.get(radio_packet.msg, b'')
-                self.send_data(response)
+                response = self.routes.get(radio_packet.msg, b'')
             else:
-                logger.error(f'got unknown cmd: {radio_packet.msg.hex(" ")}')
+                logger.error('got unknown cmd: {}', radio_packet.msg.hex(' '))
+        else:
+            logger.error('trying to send data to incorrect sat {}', self.name)
+        if response is not None:
+            self.metrics.observe_since('reply_generation_seconds', self.name, generation_started)
+            self.metrics.observe_since('satellite_handling_seconds', self.name, started)
+            self.metrics.inc('commands_handled', self.name)
+            self.reply_cache.put(radio_packet.tx_addr, radio_packet.transaction_num, request, response, now)
+            self.send_data(response)
         else:
-            logger.error(f'trying to send data to incorrect sat {self.name}')
+            self.metrics.inc('commands_rejected', self.name)
         self.refresh_beacon_timer()
-        logger.debug(data)
-        return None
+        logger.debug('{}', radio_packet.raw_data)
+
+    @property
+    def registers(self) -> RegisterFile:
+        """ onboard variables, PSS TMI are seeded at dev 3 var 5 where the PSS read commands point """
+        if self._registers is None:
+            self._registers = RegisterFile()
+            for tmi_num, command in enumerate(PSS_TMI_COMMANDS):
+                dev_id, var_id, offset, _ = next(parse_read_message(command))
+                self._registers.write(dev_id, var_id, offset, self.generate_answer_pss_tmi(tmi_num)[15:-2])
+        return self._registers
+
+    def answer_registers(self, radio_packet: RadioPacket) -> bytes | None:
+        """ BRK read (13) or write (15), answered with msg_id + 1 """
+        try:
+            if radio_packet.msg_id == READ_REGISTERS_MSG_ID:
+                payload: bytes = self.registers.read_message(radio_packet.msg)
+            else:
+                self.registers.write_message(radio_packet.msg, reversed(self.board_times))
+                payload = b''
+        except RegisterError as error:
+            logger.error('register command is rejected: {}', error)
+            return None
+        return self.make_reply(radio_packet, radio_packet.msg_id + 1, payload)
+
+    def make_reply(self, radio_packet: RadioPacket, msg_id: int, payload: bytes) -> bytes:
+        tx_addr: bytes = radio_packet.rx_addr if radio_packet.rx_addr != BROADCAST_ADDRESS else self.addresses[0]
+        data = bytearray(17 + len(payload))
+        data[0] = len(data) - 1
+        data[1:5] = radio_packet.tx_addr
+        data[5:9] = tx_addr
+        data[9:11] = radio_packet.transaction_num.to_bytes(2, 'big')
+        data[13:15] = msg_id.to_bytes(2, 'big')
+        data[15:-2] = payload
+        return bytes(seal_frame(data))
 
     def refresh_beacon_timer(self) -> None:
-        self._next_beacon_timestamp = time.time() + self.BEACON_PERIOD
+        self._next_beacon_timestamp = self.clock.time() + self.BEACON_PERIOD
+        if self.timers is not None and self._routine_flag:
+            if self._beacon_timer is not None:
+                self._beacon_timer.cancel()
+            self._beacon_timer = self.timers.call_at(self._next_beacon_timestamp, self._on_beacon_timer)
 
     def is_time_for_beacon(self) -> bool:
-        return self._next_beacon_timestamp - time.time() < 0
+        return self._next_beacon_timestamp - self.clock.time() < 0
 
     def send_data(self, data: bytes) -> None:
         self.frame_num += 1
@@ -195,8 +350,13 @@ class EMUSAT:
         #     return None
         # if self.path.t_points[self.start_t_index] < datetime.now(utc) < self.path.t_points[self.finish_t_index]:
         if 0 < random.random() < 1 - self.tx_loss_level / 100:
-            time.sleep(0.5)
+            if self.timers is not None:
+                self.timers.call_later(self.clock.delay(0.5), self.transmited.emit, data)
+                return
+            self.clock.sleep(0.5)
             self.transmited.emit(data)
+        else:
+            self.metrics.inc('packets_lost', self.name)
 
     def generate_answer_tmi(self, tmi_num: int) -> bytes:
         tmi_list: list[str] = [
@@ -247,10 +407,12 @@ class EMUSAT:
             ' 4C 06 F3 0F 46 A4',
         ]
         data = bytearray(bytes.fromhex(tmi_list[tmi_num]))
-        data[-2:] = random.randint(0x2334, 0xFEDA).to_bytes(2, 'little')
+        data = self._generate_telemetry(f'tmi{tmi_num}', data, self.get_norbi_time())
+        data[17:19] = tmi_num.to_bytes(2, 'little')  # frame identifier, the recorded TMI 8 carries 0x6082
         data[19:21] = self.frame_num.to_bytes(2, 'little')
         data[21:25] = self.get_norbi_time().to_bytes(4, 'little')
-        return bytes(data)
+        self.board_times.append(int.from_bytes(data[21:25], 'little'))
+        return bytes(seal_frame(data))
 
     def generate_answer_pss_tmi(self, tmi_num: int) -> bytes:
         tmi_pss: list[str] = [
@@ -276,9 +438,21 @@ class EMUSAT:
             ' 7F EF 46',
         ]
         data = bytearray(bytes.fromhex(tmi_pss[tmi_num]))
-        data[-2:] = random.randint(0x2334, 0xFEDA).to_bytes(2, 'little')
+        data = self._generate_telemetry(f'tmi_pss{tmi_num}', data, self.get_norbi2_time())
+        data[21:23] = self.frame_num.to_bytes(2, 'little')
         data[23:27] = self.get_norbi2_time().to_bytes(4, 'little')
-        return bytes(data)
+        self.board_times.append(int.from_bytes(data[23:27], 'little'))
+        return bytes(seal_frame(data))
+
+    def answer_pss_tmi(self, radio_packet: RadioPacket, tmi_num: int) -> bytes:
+        """ PSS TMI read: the register memory its command points at, refreshed from `generate_answer_pss_tmi` except
+        the bytes set by register writes. The command asks for 128 bytes, the reply keeps the recorded TMI size """
+        dev_id, var_id, offset, _ = next(parse_read_message(list(PSS_TMI_COMMANDS)[tmi_num]))
+        registers: RegisterFile = self.registers
+        tmi: bytes = self.generate_answer_pss_tmi(tmi_num)[15:-2]
+        registers.refresh(dev_id, var_id, offset, tmi)
+        return self.make_reply(radio_packet, READ_REGISTERS_MSG_ID + 1,
+                               bytes(registers.read(dev_id, var_id, offset, len(tmi))))
 
     def get_beacon(self) -> bytes:
         beacon: str = '8E FF FF FF FF 0A 06 01 CB 4C B5 00 00 00 00 F1 0F 00 00 66 6E 22 87 12 00 42 52 4B 20 4D 57' \
@@ -287,20 +461,20 @@ class EMUSAT:
                       '00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00' \
                       '00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 8E CA'
         data = bytearray(bytes.fromhex(beacon))
-        data[-2:] = random.randint(0x2334, 0xFEDA).to_bytes(2, 'little')
-        if self.name == 'NORBI':
+        data = self._generate_telemetry('tmi0', data, self.get_norbi_time())
+        if self.profile.onboard_time == 'norbi':
             data[21:25] = self.get_norbi_time().to_bytes(4, 'little')
-        elif self.name == 'NORBI-2':
+        elif self.profile.onboard_time == 'norbi2':
             data[21:25] = self.get_norbi2_time().to_bytes(4, 'little')
-        return bytes(data)
+        self.board_times.append(int.from_bytes(data[21:25], 'little'))
+        return bytes(seal_frame(data))
 
     def get_stratosat_beacon(self) -> bytes:
         data = bytearray(bytes.fromhex('99 FC 2E 22 6A 4D FE BF D2 4F 56 AD 40 CE 2C 10 C1 BE B6 34 3C BA 2E 49 8D 07'\
                                        'C8 15 D8 F2 A5 51 8F 02 D4 13 83 71 AF 5C 99 6F CF 9C 08 55 EC 96 C8 8E 0D 1A'\
                                        '24 1D B8 45 CF 95 02 98 D8 F0 A1 0F E7 46 37 C3 BD 7D ED D7 8E A1 84 17 0E A1'\
                                        '84 06 3C D5 6C D7 9F 82 C2 8B 37 D3 70 FF EE 89 42 C9 5B 67 C4 9C 59 67'))
-        data[-2:] = random.randint(0x2334, 0xFEDA).to_bytes(2, 'little')
-        return bytes(data)
+        return bytes(seal_frame(data))
 
 
 if __name__ == '__main__':
@@ -1,9 +1,9 @@
-import datetime
 import struct
 import os
 import pandas as pd
 import numpy as np
 
+from cubesat_simradio.onboard_time import struct_times, to_strings
 from cubesat_simradio.radio_packet import RadioPacket
 
 class FrameFormats:
@@ -19,12 +19,11 @@ tmi_formats: FrameFormats = FrameFormats()
 
 
 def convert_glonass_time(glonass_seconds: int) -> str:
-    return (datetime.datetime(2000, 1, 1, 0, 0, 0) + datetime.timedelta(seconds=glonass_seconds)).isoformat(' ',
-                                                                                                            'seconds')
+    return str(to_strings(glonass_seconds))
 
 
 def struct_time(data: bytes) -> str:
-    return datetime.datetime(2000 + data[0], *data[1:]).isoformat(' ', 'seconds')  # type: ignore
+    return str(struct_times(np.frombuffer(data, np.uint8)[np.newaxis])[0]).replace('T', ' ')
 
 
 # def field_format(field_name: str, field_type: str, field_size: int, value: bytes):
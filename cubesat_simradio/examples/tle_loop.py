@@ -4,8 +4,10 @@ import cubesat_simradio.examples.frame_parser as module
 import cubesat_simradio.examples.register_commands as brk_commands
 from cubesat_simradio.models import SX127x_HeaderMode
 from cubesat_simradio.radio_mock import RadioMock
+from cubesat_simradio.telemetry_archive import TelemetryArchive
 
 radio = RadioMock(rx_loss_level=55, tx_loss_level=5, interference_level=5)
+archive = TelemetryArchive('telemetry')
 
 
 def get_sat_name():
@@ -40,7 +42,7 @@ def receive_handler(packet):
             if radio_packet.rx_addr == 0xFFFFFFFF.to_bytes(4, 'big'):
                 global board_time
                 board_time = int.from_bytes(radio_packet.msg[6:10], "little")
-            # save_report('pss_tle', dataframe)
+            archive.append(packet.to_bytes(), sat_name)
         else:
             print('got corrupted packet')
     except Exception as err:
@@ -75,4 +77,7 @@ try:
             print(f'incorrect sat: {sat_name}')
             delay(60)
 except KeyboardInterrupt:
-    print('shutting down...')
\ No newline at end of file
+    print('shutting down...')
+finally:
+    radio.received.disconnect(receive_handler)
+    archive.close()
\ No newline at end of file
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import Enum
+from hashlib import blake2b
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from cubesat_simradio.metrics import METRICS, MetricsRegistry
+from cubesat_simradio.telemetry import HEADER_SIZE, frame_layout
+from cubesat_simradio.utils import Clock, Signal
+
+if TYPE_CHECKING:
+    from cubesat_simradio.models import LoRaRxPacket
+    from cubesat_simradio.telemetry import TmiLayout
+
+FRAME_NUM_MODULO: int = 0x10000
+
+
+class FrameStatus(Enum):
+    NEW = 0
+    BETTER = 1  # copy of an indexed frame with higher SNR, replaces it
+    DUPLICATE = 2
+
+
+@dataclass
+class IndexedFrame:
+    sat_name: str
+    frame_num: int
+    onboard_time: int
+    frame: bytes
+    snr: float
+    station: str
+    received: float
+    copies: int = 1
+
+
+def frame_key(sat_name: str, frame: bytes) -> int:
+    """ 64-bit hash of the satellite and the frame message: frame number, onboard time and payload """
+    digest = blake2b(sat_name.encode(), digest_size=8)
+    digest.update(frame[15:-2])
+    return int.from_bytes(digest.digest(), 'little')
+
+
+class FrameIndex:
+    """ Merges the frames of several ground stations as they arrive.
+
+    A frame is indexed by one 64-bit key of (satellite, frame number, onboard time, payload), so a copy from another
+    station is found in O(1) and only the highest SNR copy is kept. Frames leave the window `window_sec` after the
+    first copy or when more than `capacity` are indexed and `frame_released` emits their best copy.
+
+    Frame numbers are 16-bit counters: a step forward of up to `max_gap` reports the skipped numbers with `gap_found`
+    (satellite, first, last), a larger step is taken as a counter reset or a long outage. A late frame closes its gap,
+    gaps older than the window are dropped.
+
+    Only TMI frames are indexed: the 0x0FF1 marker and the satellite's layout give the offsets of the frame number and
+    the onboard time. Beacons of other formats, command replies and short frames have no frame counter and are left
+    out. """
+
+    def __init__(self, window_sec: float = 600.0, capacity: int = 65536, max_gap: int = 1024,
+                 clock: Clock | None = None, metrics: MetricsRegistry = METRICS) -> None:
+        self.window_sec: float = window_sec
+        self.capacity: int = capacity
+        self.max_gap: int = max_gap
+        self.clock: Clock = clock or Clock()
+        self.metrics: MetricsRegistry = metrics
+        self.frame_released: Signal = Signal(IndexedFrame)
+        self.gap_found: Signal = Signal(str, int, int)
+        self._frames: dict[int, IndexedFrame] = {}  # oldest first
+        self._last_frame_num: dict[str, int] = {}
+        self._missing: dict[str, dict[int, float]] = {}  # satellite: missing frame number -> detected at, oldest first
+        self._lock: Lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def add(self, frame: bytes | list[int], sat_name: str | None = None, snr: float = 0.0, station: str = '',
+            received: float | None = None) -> FrameStatus | None:
+        """ indexes a received TMI frame, None for frames without a frame counter, the satellite is found by address
+        when `sat_name` is not given """
+        frame = bytes(frame)
+        layout: TmiLayout | None
+        sat_name, layout = frame_layout(frame, sat_name or 'auto')
+        if layout is None:
+            return None
+        message: bytes = frame[HEADER_SIZE:]
+        now: float = self.clock.time() if received is None else received
+        key: int = frame_key(sat_name, frame)
+        released: list[IndexedFrame] = []
+        gap: tuple[int, int] | None = None
+        with self._lock:
+            entry: IndexedFrame | None = self._frames.get(key)
+            if entry is not None:
+                entry.copies += 1
+                self.metrics.inc('frames_duplicated', sat_name)
+                if snr <= entry.snr:
+                    return FrameStatus.DUPLICATE
+                entry.frame, entry.snr, entry.station = frame, snr, station
+                return FrameStatus.BETTER
+            frame_num: int = layout.read_uint(message, layout.frame_num_index)
+            self._frames[key] = IndexedFrame(sat_name, frame_num, layout.read_uint(message, layout.time_index), frame,
+                                             snr, station, now)
+            gap = self._track(sat_name, frame_num, now)
+            released = self._evict(now)
+        if gap is not None:
+            self.gap_found.emit(sat_name, *gap)
+        for entry in released:
+            self.frame_released.emit(entry)
+        return FrameStatus.NEW
+
+    def add_packet(self, packet: LoRaRxPacket, sat_name: str | None = None, station: str = '') -> FrameStatus | None:
+        """ `add` for a received radio packet, frames with CRC error are not indexed either """
+        if packet.is_crc_error:
+            return None
+        return self.add(packet.to_bytes(), sat_name, packet.snr, station)
+
+    def _track(self, sat_name: str, frame_num: int, now: float) -> tuple[int, int] | None:
+        """ updates the frame number sequence, returns a new gap as (first, last) missing frame number """
+        missing: dict[int, float] = self._missing.setdefault(sat_name, {})
+        while missing and next(iter(missing.values())) < now - self.window_sec:
+            del missing[next(iter(missing))]
+        last: int | None = self._last_frame_num.get(sat_name)
+        if last is None:
+            self._last_frame_num[sat_name] = frame_num
+            return None
+        step: int = (frame_num - last) % FRAME_NUM_MODULO
+        if step >= FRAME_NUM_MODULO // 2:
+            missing.pop(frame_num, None)  # late copy of a frame reported missing
+            return None
+        if step == 0:
+            return None
+        self._last_frame_num[sat_name] = frame_num
+        missing.pop(frame_num, None)
+        if step == 1 or step > self.max_gap:
+            return None
+        for skipped in range(last + 1, last + step):
+            missing[skipped % FRAME_NUM_MODULO] = now
+        self.metrics.inc('frames_missing', sat_name, step - 1)
+        return (last + 1) % FRAME_NUM_MODULO, (frame_num - 1) % FRAME_NUM_MODULO
+
+    def _evict(self, now: float) -> list[IndexedFrame]:
+        released: list[IndexedFrame] = []
+        while self._frames:
+            key: int = next(iter(self._frames))
+            if len(self._frames) <= self.capacity and self._frames[key].received >= now - self.window_sec:
+                break
+            released.append(self._frames.pop(key))
+        return released
+
+    def expire(self, now: float | None = None) -> int:
+        """ releases the frames that left the window without new arrivals, returns their number """
+        with self._lock:
+            released: list[IndexedFrame] = self._evict(self.clock.time() if now is None else now)
+        for entry in released:
+            self.frame_released.emit(entry)
+        return len(released)
+
+    def flush(self) -> int:
+        """ releases every indexed frame """
+        with self._lock:
+            released: list[IndexedFrame] = list(self._frames.values())
+            self._frames.clear()
+        for entry in released:
+            self.frame_released.emit(entry)
+        return len(released)
+
+    def gaps(self, sat_name: str) -> list[tuple[int, int]]:
+        """ frame numbers still missing as (first, last) ranges in detection order """
+        with self._lock:
+            numbers: list[int] = list(self._missing.get(sat_name, {}))
+        ranges: list[tuple[int, int]] = []
+        for number in numbers:
+            if ranges and (ranges[-1][1] + 1) % FRAME_NUM_MODULO == number:
+                ranges[-1] = (ranges[-1][0], number)
+            else:
+                ranges.append((number, number))
+        return ranges
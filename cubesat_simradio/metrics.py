@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from threading import Lock
+import time
+
+LATENCY_BUCKETS: tuple[float, ...] = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# name: (type, help, buckets)
+METRIC_DEFINITIONS: dict[str, tuple[str, str, tuple[float, ...]]] = {
+    'packets_sent': ('counter', 'packets sent by the ground station radio', ()),
+    'packets_received': ('counter', 'packets delivered to the ground station radio', ()),
+    'crc_errors': ('counter', 'received packets with CRC error', ()),
+    'packets_lost': ('counter', 'packets dropped by loss level or missed preamble', ()),
+    'commands_handled': ('counter', 'uplink commands answered by the satellite', ()),
+    'commands_rejected': ('counter', 'uplink commands rejected by the satellite', ()),
+    'replies_cached': ('counter', 'retransmitted uplink commands answered from the reply cache', ()),
+    'uplinks_unrouted': ('counter', 'uplinks the router could not address to any satellite', ()),
+    'uplinks_duplicated': ('counter', 'copies of an accepted uplink dropped by the router', ()),
+    'frames_duplicated': ('counter', 'downlink frame copies merged by the frame index', ()),
+    'frames_missing': ('counter', 'frame numbers skipped in the downlink sequence', ()),
+    'send_seconds': ('histogram', 'RadioMock.send_single duration', LATENCY_BUCKETS),
+    'airtime_seconds': ('histogram', 'calculated packet airtime', LATENCY_BUCKETS),
+    'uplink_queue_wait_seconds': ('histogram', 'time an uplink packet waits in the EMUSAT queue', LATENCY_BUCKETS),
+    'downlink_queue_wait_seconds': ('histogram', 'time a downlink packet waits in the RadioMock queue',
+                                    LATENCY_BUCKETS),
+    'satellite_handling_seconds': ('histogram', 'EMUSAT command handler duration', LATENCY_BUCKETS),
+    'reply_generation_seconds': ('histogram', 'EMUSAT reply frame generation duration', LATENCY_BUCKETS),
+    'rx_dispatch_seconds': ('histogram', 'RadioMock received signal dispatch duration', LATENCY_BUCKETS),
+}
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets: tuple[float, ...] = buckets
+        self.counts: list[int] = [0] * (len(buckets) + 1)
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[int]:
+        total: int = 0
+        result: list[int] = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class MetricsRegistry:
+    """ Counters and latency histograms per link; every call returns immediately while disabled """
+
+    def __init__(self, enabled: bool = False, prefix: str = 'simradio') -> None:
+        self.enabled: bool = enabled
+        self.prefix: str = prefix
+        self._counters: dict[tuple[str, str], float] = {}
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+        self._lock: Lock = Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def start(self) -> float:
+        """ timestamp for `observe_since`, 0 when disabled """
+        return time.perf_counter() if self.enabled else 0.0
+
+    def inc(self, name: str, link: str, amount: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[(name, link)] = self._counters.get((name, link), 0) + amount
+
+    def observe(self, name: str, link: str, value: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram: Histogram | None = self._histograms.get((name, link))
+            if histogram is None:
+                histogram = self._histograms[(name, link)] = Histogram(METRIC_DEFINITIONS[name][2])
+            histogram.observe(value)
+
+    def observe_since(self, name: str, link: str, started: float) -> None:
+        if started:
+            self.observe(name, link, time.perf_counter() - started)
+
+    def snapshot(self) -> dict[str, dict[str, dict]]:
+        with self._lock:
+            result: dict[str, dict[str, dict]] = {}
+            for (name, link), value in self._counters.items():
+                result.setdefault(link, {})[name] = value
+            for (name, link), histogram in self._histograms.items():
+                result.setdefault(link, {})[name] = {
+                    'count': histogram.count,
+                    'sum': histogram.sum,
+                    'buckets': dict(zip([*map(str, histogram.buckets), '+Inf'], histogram.cumulative()))
+                }
+            return result
+
+    def to_prometheus(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            for name, (metric_type, help_text, buckets) in METRIC_DEFINITIONS.items():
+                full_name: str = f'{self.prefix}_{name}'
+                if metric_type == 'counter':
+                    samples = [(link, value) for (metric, link), value in self._counters.items() if metric == name]
+                    if not samples:
+                        continue
+                    lines += [f'# HELP {full_name}_total {help_text}', f'# TYPE {full_name}_total counter']
+                    lines += [f'{full_name}_total{{link="{link}"}} {value}' for link, value in samples]
+                    continue
+                histograms = [(link, hist) for (metric, link), hist in self._histograms.items() if metric == name]
+                if not histograms:
+                    continue
+                lines += [f'# HELP {full_name} {help_text}', f'# TYPE {full_name} histogram']
+                for link, histogram in histograms:
+                    for bound, count in zip([*map(str, buckets), '+Inf'], histogram.cumulative()):
+                        lines.append(f'{full_name}_bucket{{link="{link}",le="{bound}"}} {count}')
+                    lines.append(f'{full_name}_sum{{link="{link}"}} {histogram.sum}')
+                    lines.append(f'{full_name}_count{{link="{link}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+METRICS: MetricsRegistry = MetricsRegistry()
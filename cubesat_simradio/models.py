@@ -1,9 +1,6 @@
 from dataclasses import dataclass
-from datetime import datetime
 from enum import Enum
 # from hashlib import _Hash, sha1
-from uuid import UUID
-from pydantic import BaseModel, Field
 
 @dataclass
 class LoRaPacket:
@@ -35,49 +32,6 @@ class LoRaTxPacket(LoRaPacket):
     def __str__(self) -> str:
         return f"{self.timestamp} tx > {self.data} (Tpkt: {self.Tpkt})"
 
-class SessionModel(BaseModel):
-    time_range_id: UUID = Field(alias='_id')
-    user_id: UUID
-    username: str
-    script_id: UUID | None
-    sat_name: str
-    is_user_tle: bool
-    station: str
-    registration_time: datetime
-    priority: int
-    start: datetime
-    duration_sec: int
-    finish: datetime
-    parts: int
-    max_elevation: float
-    initial_start: datetime
-    initial_duration_sec: int
-    class Config:
-        json_encoders = {
-            # custom output conversion for datetime
-            datetime: lambda dt: dt.isoformat(' ', 'seconds')
-        }
-
-class RadioModel(BaseModel):
-    mode: str
-    op_mode: str
-    frequency: int
-    spreading_factor: int
-    coding_rate: str
-    bandwidth: str
-    check_crc: bool
-    sync_word: int
-    tx_power: float
-    autogain_control: bool
-    lna_gain: int
-    lna_boost: bool
-    header_mode: str
-    ldro: bool
-
-    def __str__(self) -> str:
-        return super().__str__().replace(' ', '\n')
-
-
 class SX127x_Modulation(Enum):
     LORA = 0x80
     FSK = 0
@@ -102,4 +56,17 @@ class SX127x_CR(Enum):
     CR5 = 1 << 1
     CR6 = 2 << 1
     CR7 = 3 << 1
-    CR8 = 4 << 1
\ No newline at end of file
+    CR8 = 4 << 1
+
+class SX127x_DcFree(Enum):
+    OFF = 0
+    MANCHESTER = 1
+    WHITENING = 2
+
+
+def __getattr__(name: str):
+    """ pydantic models live in `schemas` and are imported on first access """
+    if name in ('SessionModel', 'RadioModel'):
+        from cubesat_simradio import schemas  # pylint: disable=import-outside-toplevel
+        return getattr(schemas, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import numpy as np
+
+GLONASS_EPOCH: np.datetime64 = np.datetime64('2000-01-01T00:00:00', 's')  # onboard time is uint32 seconds since
+EPOCH_TIMESTAMP: float = datetime(2000, 1, 1).timestamp()  # local time, as the onboard clocks were set
+# how far behind the wall clock the emulated onboard clocks run, by `SatelliteProfile.onboard_time`
+CLOCK_LAGS: dict[str, float] = {
+    'norbi': timedelta(8135, 56, minutes=13, hours=14).total_seconds(),
+    'norbi2': timedelta(8568, 8, minutes=55, hours=8).total_seconds(),
+}
+STRUCT_TIME_SIZE: int = 6  # year - 2000, month, day, hour, minute, second
+
+
+def onboard_seconds(clock_name: str, timestamp: float) -> int:
+    """ onboard time of the `CLOCK_LAGS` clock at a UNIX timestamp """
+    return int(timestamp - CLOCK_LAGS[clock_name] - EPOCH_TIMESTAMP)
+
+
+def to_datetime64(seconds: np.ndarray | int) -> np.ndarray:
+    """ onboard seconds -> datetime64[s] """
+    return GLONASS_EPOCH + np.asarray(seconds).astype(np.int64).astype('timedelta64[s]')
+
+
+def from_datetime64(values: np.ndarray | np.datetime64 | str | datetime) -> np.ndarray:
+    """ datetime64 (or anything `np.datetime64` accepts) -> int64 onboard seconds """
+    return (np.asarray(values, 'datetime64[s]') - GLONASS_EPOCH).astype(np.int64)
+
+
+def to_strings(seconds: np.ndarray | int) -> np.ndarray:
+    """ onboard seconds -> 'YYYY-MM-DD HH:MM:SS' strings, like `datetime.isoformat(' ', 'seconds')` """
+    return np.char.replace(np.datetime_as_string(to_datetime64(seconds), 's'), 'T', ' ')
+
+
+def struct_times(data: np.ndarray) -> np.ndarray:
+    """ (N, >= 6) uint8 `struct time_t` fields -> datetime64[s], NaT where the date is not valid """
+    fields: np.ndarray = np.asarray(data, np.int64).reshape(-1, data.shape[-1])[:, :STRUCT_TIME_SIZE]
+    year, month, day, hour, minute, second = fields.T
+    months: np.ndarray = (np.datetime64('2000', 'Y') + year).astype('datetime64[M]') + (month - 1)
+    days: np.ndarray = months.astype('datetime64[D]') + (day - 1)
+    result: np.ndarray = days.astype('datetime64[s]') + (hour * 3600 + minute * 60 + second)
+    valid: np.ndarray = ((month >= 1) & (month <= 12) & (day >= 1) & (days.astype('datetime64[M]') == months)
+                         & (hour < 24) & (minute < 60) & (second < 60))
+    result[~valid] = np.datetime64('NaT')
+    return result
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+import os
+from typing import Iterable, Iterator
+from uuid import UUID, uuid4
+
+from skyfield.api import EarthSatellite, load, wgs84
+from skyfield.timelib import Timescale
+
+from cubesat_simradio.models import SessionModel
+from cubesat_simradio.scheduler import Timeline
+
+
+@dataclass(frozen=True)
+class Station:
+    name: str
+    latitude: float
+    longitude: float
+    elevation_m: float = 0.0
+
+
+@dataclass(frozen=True)
+class PassCandidate:
+    sat_name: str
+    station: str
+    start: datetime
+    finish: datetime
+    max_elevation: float
+    culmination: datetime
+
+    @property
+    def duration_sec(self) -> int:
+        return int((self.finish - self.start).total_seconds())
+
+
+# per worker process state: timescale loaded once, satellites parsed once per TLE
+_timescale: Timescale | None = None
+_satellites: dict[str, EarthSatellite] = {}
+
+
+def init_worker() -> None:
+    global _timescale  # pylint: disable=global-statement
+    _timescale = load.timescale()
+    _satellites.clear()
+
+
+def get_satellite(tle: str) -> EarthSatellite:
+    if _timescale is None:
+        init_worker()
+    satellite: EarthSatellite | None = _satellites.get(tle)
+    if satellite is None:
+        lines: list[str] = tle.strip().split('\n')
+        satellite = _satellites[tle] = EarthSatellite(lines[1], lines[2], lines[0], _timescale)
+    return satellite
+
+
+def find_passes(sat_name: str, tle: str, station: Station, t_1: datetime, t_2: datetime,
+                min_elevation: float = 0.0) -> list[PassCandidate]:
+    """ passes above `min_elevation` within [t_1, t_2]; passes crossing the window edges are clipped to it """
+    satellite: EarthSatellite = get_satellite(tle)
+    assert _timescale is not None
+    observer = wgs84.latlon(station.latitude, station.longitude, station.elevation_m)
+    times, events = satellite.find_events(observer, _timescale.from_datetime(t_1), _timescale.from_datetime(t_2),
+                                          altitude_degrees=min_elevation)
+    if len(events) == 0:
+        return []
+    altitudes = (satellite - observer).at(times).altaz()[0].degrees
+    datetimes: list[datetime] = times.utc_datetime()
+    passes: list[PassCandidate] = []
+    start: datetime | None = t_1 if events[0] != 0 else None
+    max_elevation: float = float(altitudes[0]) if start else -90.0
+    culmination: datetime = t_1
+    for event, moment, altitude in zip(events, datetimes, altitudes):
+        if event == 0:
+            start, max_elevation = moment, float(altitude)
+        elif event == 1 and altitude > max_elevation:
+            max_elevation, culmination = float(altitude), moment
+        elif event == 2 and start is not None:
+            passes.append(PassCandidate(sat_name, station.name, start, moment, max_elevation, culmination))
+            start, max_elevation = None, -90.0
+    if start is not None:
+        passes.append(PassCandidate(sat_name, station.name, start, t_2, max_elevation, culmination))
+    return passes
+
+
+def merge_shard_edges(passes: Iterable[PassCandidate]) -> list[PassCandidate]:
+    """ joins parts of the same pass that were clipped at (satellite, station, day) shard boundaries """
+    merged: list[PassCandidate] = []
+    for candidate in sorted(passes, key=lambda p: (p.station, p.sat_name, p.start)):
+        last: PassCandidate | None = merged[-1] if merged else None
+        if last and (last.station, last.sat_name) == (candidate.station, candidate.sat_name) \
+                and last.finish >= candidate.start:
+            best: PassCandidate = last if last.max_elevation >= candidate.max_elevation else candidate
+            merged[-1] = replace(last, finish=max(last.finish, candidate.finish), max_elevation=best.max_elevation,
+                                 culmination=best.culmination)
+        else:
+            merged.append(candidate)
+    return merged
+
+
+def resolve_conflicts(passes: Iterable[PassCandidate], priorities: dict[str, int] | None = None,
+                      fixed: Iterable[SessionModel] = ()) -> list[PassCandidate]:
+    """ one satellite per station at a time: higher priority, then higher elevation pass wins """
+    priorities = priorities or {}
+    busy: dict[str, Timeline] = {}
+    for session in fixed:
+        busy.setdefault(session.station, Timeline()).reserve(session.start.timestamp(), session.finish.timestamp())
+    accepted: list[PassCandidate] = []
+    for candidate in sorted(passes, key=lambda p: (-priorities.get(p.sat_name, 0), -p.max_elevation, p.start)):
+        timeline: Timeline = busy.setdefault(candidate.station, Timeline())
+        start, finish = candidate.start.timestamp(), candidate.finish.timestamp()
+        if timeline.is_free(start, finish):
+            timeline.reserve(start, finish)
+            accepted.append(candidate)
+    return sorted(accepted, key=lambda p: p.start)
+
+
+def to_session(candidate: PassCandidate, user_id: UUID, username: str, priority: int = 0,
+               registration_time: datetime | None = None) -> SessionModel:
+    return SessionModel(_id=uuid4(), user_id=user_id, username=username, script_id=None,
+                        sat_name=candidate.sat_name, is_user_tle=False, station=candidate.station,
+                        registration_time=registration_time or datetime.now().astimezone(),
+                        priority=priority, start=candidate.start, duration_sec=candidate.duration_sec,
+                        finish=candidate.finish, parts=1, max_elevation=candidate.max_elevation,
+                        initial_start=candidate.start, initial_duration_sec=candidate.duration_sec)
+
+
+class PassPlanner:
+    """ Shards (satellite, station, day) pass searches over a process pool """
+
+    def __init__(self, workers: int | None = None, min_elevation: float = 0.0) -> None:
+        self.workers: int = workers or os.cpu_count() or 1
+        self.min_elevation: float = min_elevation
+
+    def work_units(self, satellites: dict[str, str], stations: list[Station], start: datetime,
+                   days: int) -> Iterator[tuple]:
+        for day in range(days):
+            t_1: datetime = start + timedelta(days=day)
+            for sat_name, tle in satellites.items():
+                for station in stations:
+                    yield sat_name, tle, station, t_1, t_1 + timedelta(days=1), self.min_elevation
+
+    def iter_passes(self, satellites: dict[str, str], stations: list[Station], start: datetime,
+                    days: int = 7) -> Iterator[list[PassCandidate]]:
+        """ yields pass lists of each work unit as soon as it is finished """
+        with ProcessPoolExecutor(self.workers, initializer=init_worker) as executor:
+            futures = [executor.submit(find_passes, *unit) for unit in self.work_units(satellites, stations, start,
+                                                                                      days)]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def find_all(self, satellites: dict[str, str], stations: list[Station], start: datetime,
+                 days: int = 7) -> list[PassCandidate]:
+        passes: list[PassCandidate] = []
+        for unit_passes in self.iter_passes(satellites, stations, start, days):
+            passes.extend(unit_passes)
+        return merge_shard_edges(passes)
+
+    def plan(self, satellites: dict[str, str], stations: list[Station], start: datetime, days: int = 7,
+             priorities: dict[str, int] | None = None, user_id: UUID | None = None,
+             username: str = 'pass_planner') -> list[SessionModel]:
+        priorities = priorities or {}
+        user_id = user_id or uuid4()
+        registration_time: datetime = datetime.now().astimezone()
+        schedule: list[PassCandidate] = resolve_conflicts(self.find_all(satellites, stations, start, days),
+                                                          priorities)
+        return [to_session(candidate, user_id, username, priorities.get(candidate.sat_name, 0), registration_time)
+                for candidate in schedule]
+
+    def replan(self, sessions: list[SessionModel], affected: list[SessionModel], satellites: dict[str, str],
+               stations: list[Station], priorities: dict[str, int] | None = None,
+               margin: timedelta = timedelta(minutes=15)) -> list[SessionModel]:
+        """ recomputes only the passes of `affected` sessions (e.g. `TleUpdate.affected_sessions`) """
+        priorities = priorities or {}
+        by_name: dict[str, Station] = {station.name: station for station in stations}
+        affected_ids: set = {session.time_range_id for session in affected}
+        kept: list[SessionModel] = [session for session in sessions if session.time_range_id not in affected_ids]
+        units = [(session.sat_name, satellites[session.sat_name], by_name[session.station],
+                  session.start - margin, session.finish + margin, self.min_elevation) for session in affected]
+        candidates: list[PassCandidate] = []
+        with ProcessPoolExecutor(min(self.workers, len(units) or 1), initializer=init_worker) as executor:
+            for session, future in zip(affected, [executor.submit(find_passes, *unit) for unit in units]):
+                candidates += [candidate for candidate in future.result()
+                               if candidate.start < session.finish and candidate.finish > session.start]
+        registration_time: datetime = datetime.now().astimezone()
+        replanned: list[SessionModel] = []
+        for candidate in resolve_conflicts(merge_shard_edges(candidates), priorities, kept):
+            previous: SessionModel = next(session for session in affected if session.sat_name == candidate.sat_name
+                                          and session.station == candidate.station
+                                          and candidate.start < session.finish and candidate.finish > session.start)
+            replanned.append(to_session(candidate, previous.user_id, previous.username, previous.priority,
+                                        registration_time))
+        return sorted(kept + replanned, key=lambda session: session.start)
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from hashlib import blake2b
+import multiprocessing
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import os
+import sys
+import time
+from typing import Literal
+import weakref
+import numpy as np
+
+from cubesat_simradio.sat_path import PATH_EXTRAS, SatellitePath
+
+PATH_FIELDS: tuple[str, ...] = ('altitude', 'azimuth', 'dist', 'alt_rate', 'az_rate', 'dist_rate', 'timestamps')
+BOOL_EXTRAS: tuple[str, ...] = ('sunlit',)
+INDEX_DTYPE = np.dtype([('key', '<u8'), ('length', '<i8'), ('refcount', '<i8'), ('generation', '<i8'),
+                        ('last_used', '<f8'), ('extras', '<u8')])  # extras: bit i set when PATH_EXTRAS[i] is stored
+
+
+def key_hash(key: str) -> int:
+    """ 64-bit key id, 0 marks a free slot """
+    return int.from_bytes(blake2b(key.encode(), digest_size=8).digest(), 'little') or 1
+
+
+def attach(name: str) -> SharedMemory:
+    """ attaches without tracking the segment, otherwise the resource tracker would unlink it at consumer exit;
+    call it with the cache lock held, the tracker may be shared with the owner """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)  # pylint: disable=unexpected-keyword-arg
+    shm = SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, 'shared_memory')  # type: ignore  # pylint: disable=W0212
+    return shm
+
+
+def extras_names(mask: int) -> tuple[str, ...]:
+    return tuple(name for i, name in enumerate(PATH_EXTRAS) if mask >> i & 1)
+
+
+def unlink(shm: SharedMemory) -> None:
+    """ `attach` in a process sharing the resource tracker drops the owner registration too, `unlink` must not
+    unregister a name the tracker no longer has """
+    resource_tracker.register(shm._name, 'shared_memory')  # type: ignore  # pylint: disable=W0212
+    shm.unlink()
+
+
+class SharedSatellitePath(SatellitePath):
+    """ Read-only `SatellitePath` over shared memory arrays; release it (or use `with`) when done """
+
+    def __init__(self, cache: SharedPathCache, slot: int, key: str, shm: SharedMemory, length: int,
+                 extras: tuple[str, ...] = ()) -> None:
+        self._cache: SharedPathCache | None = cache
+        self._slot: int = slot
+        self._shm: SharedMemory = shm
+        self.sat_name: str = key
+        data: np.ndarray = np.ndarray((len(PATH_FIELDS) + len(extras), length), dtype=np.float64, buffer=shm.buf)
+        data.flags.writeable = False
+        # numpy does not pin the mapping: it is closed once no array of the segment is left
+        weakref.finalize(data, shm.close)
+        (self.altitude, self.azimuth, self.dist, self.alt_rate, self.az_rate, self.dist_rate,
+         self._timestamps) = data[:len(PATH_FIELDS)]
+        # boolean extras are stored as 0/1 and read back as bool copies
+        self.extras: dict[str, np.ndarray] = {name: row != 0 if name in BOOL_EXTRAS else row
+                                              for name, row in zip(extras, data[len(PATH_FIELDS):])}
+        self._t_points: list[datetime] | None = None
+        self._index: int = 0
+        self.az_rotation_direction: Literal[1, -1] = -1 + 2 * (self.azimuth[1] > self.azimuth[0])  # type: ignore
+        self._max_altitude = np.max(self.altitude)
+
+    @property
+    def t_points(self) -> list[datetime]:  # type: ignore[override]
+        if self._t_points is None:
+            self._t_points = [datetime.fromtimestamp(t, timezone.utc) for t in self._timestamps]
+        return self._t_points
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps
+
+    def release(self) -> None:
+        """ gives the slot back and drops the path arrays, the segment is unmapped when no copy of them is left """
+        if self._cache is None:
+            return
+        self._cache.release(self._slot)
+        self._cache = None
+        empty: np.ndarray = np.empty(0)
+        (self.altitude, self.azimuth, self.dist, self.alt_rate, self.az_rate, self.dist_rate,
+         self._timestamps) = (empty,) * len(PATH_FIELDS)
+        self.extras = {}
+
+    def __enter__(self) -> SharedSatellitePath:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.release()
+
+
+class SharedPathCache:
+    """ Satellite paths computed once and shared by key between processes.
+
+    One index segment holds a slot table (key hash, length, refcount, generation, last use); every path lives in
+    its own segment named after the slot and generation. Slots with no readers are evicted least recently used
+    first. Pass the cache to workers through `ProcessPoolExecutor(initargs=...)` so the lock is inherited; with a
+    non default start method create the lock from the same context. """
+
+    def __init__(self, name: str | None = None, capacity: int = 64, lock=None) -> None:
+        self.capacity: int = capacity
+        self.lock = lock or multiprocessing.Lock()
+        self.is_owner: bool = name is None
+        self.name: str = name or f'simradio_paths_{os.getpid()}_{id(self):x}'
+        if self.is_owner:
+            self._index_shm: SharedMemory = SharedMemory(self.name, create=True, size=capacity * INDEX_DTYPE.itemsize)
+        else:
+            with self.lock:
+                self._index_shm = attach(self.name)
+        self.index: np.ndarray = np.ndarray((capacity,), dtype=INDEX_DTYPE, buffer=self._index_shm.buf)
+        if self.is_owner:
+            self.index[:] = 0
+        self._segments: dict[str, SharedMemory] = {}
+
+    def __getstate__(self) -> dict:
+        return {'name': self.name, 'capacity': self.capacity, 'lock': self.lock}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state['name'], state['capacity'], state['lock'])  # pylint: disable=unnecessary-dunder-call
+
+    def segment_name(self, slot: int) -> str:
+        generation: int = int(self.index['generation'][slot])
+        return f'{self.name}_{slot}_{generation}'
+
+    def _find(self, key: str) -> int:
+        slots: np.ndarray = np.flatnonzero(self.index['key'] == key_hash(key))
+        return int(slots[0]) if len(slots) else -1
+
+    def __contains__(self, key: str) -> bool:
+        with self.lock:
+            return self._find(key) >= 0
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.index['key']))
+
+    def put(self, key: str, path: SatellitePath) -> bool:
+        """ stores a path and its PATH_EXTRAS under `key`; False when every slot is in use """
+        extras: tuple[str, ...] = tuple(name for name in PATH_EXTRAS if name in path.extras)
+        data: np.ndarray = np.stack([np.asarray(path.timestamps if field == 'timestamps' else getattr(path, field),
+                                                dtype=np.float64) for field in PATH_FIELDS]
+                                    + [np.asarray(path.extras[name], dtype=np.float64) for name in extras])
+        with self.lock:
+            slot: int = self._find(key)
+            if slot >= 0:
+                return True
+            slot = self._free_slot()
+            if slot < 0:
+                return False
+            self.index['generation'][slot] += 1
+            shm = SharedMemory(self.segment_name(slot), create=True, size=data.nbytes)
+            if not self.is_owner:
+                # the owner unlinks it, not the resource tracker of this process
+                resource_tracker.unregister(shm._name, 'shared_memory')  # type: ignore  # pylint: disable=W0212
+            np.ndarray(data.shape, dtype=np.float64, buffer=shm.buf)[:] = data
+            self._segments[shm.name] = shm
+            self.index[slot] = (key_hash(key), data.shape[1], 0, self.index['generation'][slot], time.time(),
+                                sum(1 << PATH_EXTRAS.index(name) for name in extras))
+            return True
+
+    def _free_slot(self) -> int:
+        empty: np.ndarray = np.flatnonzero(self.index['key'] == 0)
+        if len(empty):
+            return int(empty[0])
+        unused: np.ndarray = np.flatnonzero(self.index['refcount'] == 0)
+        if not len(unused):
+            return -1
+        slot: int = int(unused[np.argmin(self.index['last_used'][unused])])
+        self._unlink(slot)
+        return slot
+
+    def _unlink(self, slot: int) -> None:
+        name: str = self.segment_name(slot)
+        shm: SharedMemory | None = self._segments.pop(name, None)
+        try:
+            if shm is None:
+                shm = SharedMemory(name=name)
+            shm.close()
+            unlink(shm)
+        except FileNotFoundError:
+            pass
+        self.index['key'][slot] = 0
+
+    def get(self, key: str) -> SharedSatellitePath | None:
+        with self.lock:
+            slot: int = self._find(key)
+            if slot < 0:
+                return None
+            self.index['refcount'][slot] += 1
+            self.index['last_used'][slot] = time.time()
+            shm: SharedMemory = attach(self.segment_name(slot))
+            length: int = int(self.index['length'][slot])
+            extras: tuple[str, ...] = extras_names(int(self.index['extras'][slot]))
+        return SharedSatellitePath(self, slot, key, shm, length, extras)
+
+    def release(self, slot: int) -> None:
+        with self.lock:
+            if self.index['refcount'][slot] > 0:
+                self.index['refcount'][slot] -= 1
+
+    def evict(self, key: str) -> bool:
+        """ drops a path nobody reads """
+        with self.lock:
+            slot: int = self._find(key)
+            if slot < 0 or self.index['refcount'][slot] > 0:
+                return False
+            self._unlink(slot)
+            return True
+
+    def close(self) -> None:
+        """ owner: unlinks every segment; consumer: detaches from the index """
+        with self.lock:
+            if self.is_owner:
+                for slot in np.flatnonzero(self.index['key']):
+                    self._unlink(int(slot))
+            del self.index
+            self._index_shm.close()
+            if self.is_owner:
+                unlink(self._index_shm)
@@ -3,18 +3,27 @@ from __future__ import annotations
 from ast import literal_eval
 from datetime import datetime
 from enum import Enum
-from queue import Empty, Queue
+from queue import Empty, Full, Queue
 import threading
 import time
 import random
-from typing import Callable
+from typing import TYPE_CHECKING, Callable
 from loguru import logger
 from pytz import utc
-from cubesat_simradio.models import (RadioModel, LoRaRxPacket, LoRaTxPacket, SX127x_BW, SX127x_CR, SX127x_HeaderMode,
-                                     SX127x_Modulation)
-from cubesat_simradio.utils import Signal
+from cubesat_simradio.models import (LoRaRxPacket, LoRaTxPacket, SX127x_BW, SX127x_CR, SX127x_DcFree,
+                                     SX127x_HeaderMode, SX127x_Modulation)
+from cubesat_simradio.utils import Clock, Signal
 from cubesat_simradio.emusat import EMUSAT
-from cubesat_simradio.sat_path import SatellitePath
+from cubesat_simradio.radio_packet import RadioPacket
+from cubesat_simradio.channel import ChannelModel
+from cubesat_simradio.metrics import METRICS, MetricsRegistry
+from cubesat_simradio.doppler import DopplerProfile, doppler_shift
+from cubesat_simradio.airtime import FSK_BITRATE, bandwidth_khz, fsk_packet_ms, lora_packet_ms
+
+if TYPE_CHECKING:
+    from cubesat_simradio.sat_path import SatellitePath
+    from cubesat_simradio.schemas import RadioModel
+    from cubesat_simradio.uplink_router import UplinkRouter
 
 
 class InterfaceMock:
@@ -27,6 +36,12 @@ class RadioMock:
     on_rx_timeout: Signal = Signal(str)
 
     def __init__(self, interference_level: int = 0, **kwargs) -> None:
+        self.clock: Clock = kwargs.get('clock', Clock())
+        self.transmited = Signal(LoRaTxPacket)
+        self.received = Signal(LoRaRxPacket)
+        self.tx_timeout = Signal(str)
+        self.on_rx_timeout = Signal(str)
+        self.metrics: MetricsRegistry = kwargs.get('metrics', METRICS)
         self.modulation: SX127x_Modulation = kwargs.get('modulation', SX127x_Modulation.LORA)
         self.coding_rate: SX127x_CR = kwargs.get('ecr', SX127x_CR.CR5)  # error coding rate
         self.bandwidth: SX127x_BW = kwargs.get('bw', SX127x_BW.BW250)  # bandwidth  BW250
@@ -35,7 +50,9 @@ class RadioMock:
         self.crc_mode: bool = kwargs.get('crc_mode', True)  # check crc
         self.tx_power: int = kwargs.get('tx_power', 12)  # dBm
         self.sync_word: int = kwargs.get('sync_word', 0x12)
-        self.preamble_length: int = kwargs.get('preamble_length', 8)
+        self.preamble_length: int = kwargs.get('preamble_length', 8)  # LoRa symbols, FSK bytes
+        self.bitrate: int = kwargs.get('bitrate', FSK_BITRATE)  # FSK only
+        self.dc_free: SX127x_DcFree = kwargs.get('dc_free', SX127x_DcFree.OFF)  # FSK only
         self.auto_gain_control: bool = kwargs.get('agc', True)  # auto gain control
         self.payload_length: int = kwargs.get('payload_size', 10)  # for implicit mode
         self.low_noize_amplifier: int = kwargs.get('low_noize_amplifier', 5)  # 1 - min; 6 - max
@@ -52,19 +69,42 @@ class RadioMock:
         self.__tx_buffer: list[LoRaTxPacket] = []
         self.__lock = threading.Lock()
         self.__waiting_answer: bool = False
+        # cleared while transmitting: the half-duplex radio holds received packets until TX is done
+        self.__tx_done: threading.Event = threading.Event()
+        self.__tx_done.set()
 
         self.interference_level: int = interference_level
+        self.channel: ChannelModel = kwargs.get('channel') or ChannelModel.from_interference(interference_level,
+                                                                                           self.spread_factor)
 
         self.sat_path: SatellitePath | None = None
+        # ground station Doppler compensation, Hz relative to `frequency`
+        self.rx_frequency_correction: int = 0
+        self.tx_frequency_correction: int = 0
+        # packets off by more than this from the receiver frequency are lost; None disables the check
+        self.doppler_tolerance_hz: float | None = kwargs.get('doppler_tolerance_hz')
 
-        self.rx_queue: Queue[bytes] = Queue(1)
+        self.rx_queue: Queue[tuple[float, bytes]] = Queue(1)
         self.__last_model: RadioModel = self.__to_model()
 
         self.satellite = EMUSAT(**kwargs)
-        self.satellite.transmited.connect(lambda data: self.rx_queue.put(data, timeout=0.5))
+        # with a router uplinks reach every satellite of the channel by address, not only `satellite`
+        self.router: UplinkRouter | None = kwargs.get('router')
+        if self.router is not None:
+            self.router.add(self.satellite)
+        for satellite in self.router.satellites.values() if self.router is not None else [self.satellite]:
+            satellite.transmited.connect(self._on_satellite_transmit)
         self.connect()
 
+    def _on_satellite_transmit(self, data: bytes) -> None:
+        """ may run on a timer wheel shared by the fleet, so a full queue drops the packet instead of blocking """
+        try:
+            self.rx_queue.put_nowait((self.metrics.start(), data))
+        except Full:
+            self.metrics.inc('packets_lost', self.satellite.name)
+
     def __to_model(self) -> RadioModel:
+        from cubesat_simradio.schemas import RadioModel  # pylint: disable=import-outside-toplevel,redefined-outer-name
         return RadioModel(mode=self.modulation.name, frequency=self.frequency, spreading_factor=self.spread_factor,
                           bandwidth=self.bandwidth.name, check_crc=self.crc_mode, sync_word=self.sync_word,
                           coding_rate=self.coding_rate.name, tx_power=self.tx_power, lna_boost=self.lna_boost,
@@ -82,7 +122,7 @@ class RadioMock:
         self.tx_timeout.listeners.clear()
 
     def init(self) -> None:
-        time.sleep(1)
+        self.clock.sleep(1)
         self.__last_model = self.__to_model()
 
     def start_rx_thread(self) -> None:
@@ -120,26 +160,55 @@ class RadioMock:
 
     def calculate_freq_error(self) -> int:
         if self.sat_path:
-            light_speed = 299_792_458  # m/s
-            range_rate = int(self.sat_path.find_nearest(self.sat_path.dist_rate, datetime.now().astimezone(utc)) * 1000)
-            return self.frequency - int((1 + range_rate / light_speed) * self.frequency)
+            range_rate: float = self.sat_path.dist_rate[self.sat_path.nearest_index(self.clock.time())]
+            return int(doppler_shift(self.frequency, range_rate))
         return 0
 
+    def set_frequency_correction(self, rx_hz: int, tx_hz: int) -> None:
+        self.rx_frequency_correction = rx_hz
+        self.tx_frequency_correction = tx_hz
+
+    def doppler_profile(self, uplink_frequency: float | None = None) -> DopplerProfile | None:
+        if self.sat_path is None:
+            return None
+        return DopplerProfile.from_path(self.sat_path, self.frequency, uplink_frequency)
+
+    def follow_doppler(self, profile: DopplerProfile) -> None:
+        """ retunes along the profile until it ends; run it in a separate thread """
+        for event in profile.stream(self.clock):
+            self.set_frequency_correction(round(event.downlink_hz - self.frequency),
+                                          round(event.uplink_hz - self.frequency))
+
+    def is_doppler_compensated(self, uplink: bool) -> bool:
+        if self.doppler_tolerance_hz is None or self.sat_path is None:
+            return True
+        shift: int = self.calculate_freq_error()
+        if uplink:
+            offset: int = shift + self.tx_frequency_correction
+        else:
+            offset = shift - self.rx_frequency_correction
+        if abs(offset) > self.doppler_tolerance_hz:
+            logger.debug('{} frequency offset {} Hz exceeds {} Hz', 'uplink' if uplink else 'downlink', offset,
+                         self.doppler_tolerance_hz)
+            return False
+        return True
+
     def calculate_packet(self, packet: list[int] | bytes, force_optimization=True) -> LoRaTxPacket:
-        sf: int = self.spread_factor
-        bw: int | float = literal_eval(self.bandwidth.name.replace('BW', '').replace('_', '.'))
-        cr: int = self.coding_rate.value >> 1
         if self.header_mode == SX127x_HeaderMode.IMPLICIT:
             payload_size = self.payload_length
         else:
             payload_size: int = len(packet)
-        t_sym: float = 2 ** sf / bw
-        optimization_flag: bool = True if force_optimization else t_sym > 16
-        preamble_time: float = (self.preamble_length + 4.25) * t_sym
-        tmp_poly: int = max((8 * payload_size - 4 * sf + 28 + 16 * self.crc_mode - 20 * self.header_mode.value), 0)
-        payload_symbol_nb: float = 8 + (tmp_poly / (4 * (sf - 2 * optimization_flag))) * (4 + cr)
-        payload_time: float = payload_symbol_nb * t_sym
-        packet_time: float = payload_time + preamble_time
+        if self.modulation == SX127x_Modulation.FSK:
+            optimization_flag: bool = False
+            packet_time: float = fsk_packet_ms(payload_size, self.bitrate, self.preamble_length, crc=self.crc_mode,
+                                               variable_length=not self._is_implicit_header(), dc_free=self.dc_free)
+        else:
+            sf: int = self.spread_factor
+            bw: float = bandwidth_khz(self.bandwidth)
+            t_sym: float = 2 ** sf / bw
+            optimization_flag = True if force_optimization else t_sym > 16
+            packet_time = lora_packet_ms(payload_size, sf, bw, self.coding_rate.value >> 1, self.preamble_length,
+                                         self.crc_mode, self._is_implicit_header(), optimization_flag)
         timestamp: datetime = datetime.now().astimezone(utc)
 
         return LoRaTxPacket(timestamp.isoformat(' ', 'seconds'),
@@ -149,32 +218,50 @@ class RadioMock:
     def send_single(self, data: list[int] | bytes) -> LoRaTxPacket:
         if not isinstance(data, (list, bytes)):
             raise ValueError('Incorrect data type. Possible types: list[int] or bytes')
-        if not self.__stop_rx_routine_flag:
-            self.stop_rx_thread()
+        self.__tx_done.clear()
+        try:
+            return self._transmit(data)
+        finally:
+            self.__tx_done.set()
+
+    def _transmit(self, data: list[int] | bytes) -> LoRaTxPacket:
+        started: float = self.metrics.start()
+        link: str = self.satellite.name
         buffer_size: int = 255
         tx_pkt: LoRaTxPacket = self.calculate_packet(data)
         self.__tx_buffer.append(tx_pkt)
-        logger.debug(tx_pkt)
+        self.metrics.observe('airtime_seconds', link, tx_pkt.Tpkt / 1000)
+        logger.debug('{}', tx_pkt)
+        compensated: bool = self.is_doppler_compensated(uplink=True)
+        if not compensated:
+            self.metrics.inc('packets_lost', link)
         if len(data) > buffer_size:
             chunks: list[list[int] | bytes] = [data[i:i + buffer_size] for i in range(0, len(data), buffer_size)]
-            logger.debug(f'big parcel: {len(data)=}')
+            logger.debug('big parcel: len(data)={}', len(data))
             for chunk in chunks:
                 tx_chunk: LoRaTxPacket = self.calculate_packet(chunk)
-                logger.debug(tx_chunk)
-                time.sleep((tx_chunk.Tpkt + 10) / 1000)
-                self.satellite.receive_data(chunk, self.__to_model())
+                logger.debug('{}', tx_chunk)
+                self.clock.sleep((tx_chunk.Tpkt + 10) / 1000)
+                if compensated:
+                    self._uplink(chunk)
 
         else:
-            time.sleep((tx_pkt.Tpkt) / 1000)
-            self.satellite.receive_data(data, self.__to_model())
+            self.clock.sleep((tx_pkt.Tpkt) / 1000)
+            if compensated:
+                self._uplink(data)
 
         with self.__lock:
             self.transmited.emit(tx_pkt)
-
-        if self.__stop_rx_routine_flag:
-            self.start_rx_thread()
+        self.metrics.inc('packets_sent', link)
+        self.metrics.observe_since('send_seconds', link, started)
         return tx_pkt
 
+    def _uplink(self, data: list[int] | bytes) -> None:
+        if self.router is not None:
+            self.router.receive(data, self.__to_model())
+        else:
+            self.satellite.receive_data(data, self.__to_model())
+
     def get_rssi_packet(self) -> int:
         return random.randint(-115, -112)
 
@@ -198,7 +285,7 @@ class RadioMock:
                 self.on_rx_timeout.emit('radio rx timeout')
                 logger.debug('rx_timeout')
                 return None
-            time.sleep(0.01)
+            self.clock.sleep(0.01)
         return self.get_rx_buffer()[-1]
 
     def send_repeat(self, data: list[int] | bytes,
@@ -231,9 +318,11 @@ class RadioMock:
 
     def check_rx_input(self) -> LoRaRxPacket | None:
         try:
-            data: bytes = self.rx_queue.get(timeout=0.5)
+            enqueued_at, data = self.rx_queue.get(timeout=0.5)
         except Empty:
             return None
+        self.__tx_done.wait()
+        self.metrics.observe_since('downlink_queue_wait_seconds', self.satellite.name, enqueued_at)
         diff_items: dict = {k: self.read_config().model_dump()[k] for k in self.read_config().model_dump()
                             if k in self.satellite.radio_config.model_dump()
                             and not self.__compare_models(self.satellite.radio_config.model_dump()[k],
@@ -241,8 +330,16 @@ class RadioMock:
         if len(diff_items) != 0:
             print(f'gs got data from sat but radio config is incorrect. Different attributes: {diff_items}')
             return None
-        dice: float = random.random()
-        crc_error: bool = 0 < dice < self.interference_level / 100 if self.crc_mode else True
+        self.channel.set_link(self.modulation, self.spread_factor, bandwidth_khz(self.bandwidth) * 1000, self.bitrate)
+        received: bytes | None = self.channel.apply(data)
+        if received is None or not self.is_doppler_compensated(uplink=False):
+            self.metrics.inc('packets_lost', self.satellite.name)
+            return None
+        data = received
+        crc_error: bool = not RadioPacket(data).is_crc_valid if self.crc_mode else True
+        self.metrics.inc('packets_received', self.satellite.name)
+        if crc_error:
+            self.metrics.inc('crc_errors', self.satellite.name)
         freq_error: int = self.calculate_freq_error()
         timestamp: str = datetime.now().astimezone(utc).isoformat(' ', 'seconds')
         return LoRaRxPacket(timestamp, ' '.join(f'{val:02X}' for val in data), len(data), freq_error,
@@ -267,14 +364,16 @@ class RadioMock:
         while not self.__stop_rx_routine_flag:
             pkt: LoRaRxPacket | None = self.check_rx_input()
             if pkt is not None:
-                time.sleep(0.3)
+                self.clock.sleep(0.3)
                 if len(pkt.data) > 0:
-                    logger.debug(pkt)
+                    logger.debug('{}', pkt)
                     self.__rx_buffer.append(pkt)
+                started: float = self.metrics.start()
                 with self.__lock:
                     self.__waiting_answer = False
                     self.received.emit(pkt)
-            time.sleep(0.5)
+                self.metrics.observe_since('rx_dispatch_seconds', self.satellite.name, started)
+            self.clock.sleep(0.5)
 
     def user_cli(self) -> None:
         try:
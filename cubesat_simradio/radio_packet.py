@@ -1,3 +1,6 @@
+from cubesat_simradio.crc import check_frame
+
+
 class RadioPacket:
     """ NORBI radio packet of transport layer
 
@@ -20,6 +23,10 @@ class RadioPacket:
         self.msg: bytes = raw_data[sum(self.sizes[:-2]):-2]
         self.crc16: bytes = raw_data[-self.sizes[-1]:]
 
+    @property
+    def is_crc_valid(self) -> bool:
+        return check_frame(self.raw_data)
+
     def split_by_sizes(self, buffer: bytes) -> list[bytes]:
         return [buffer[sum(self.sizes[:i]):sum(self.sizes[:i]) + s] for i, s in enumerate(self.sizes[:-2])]
 
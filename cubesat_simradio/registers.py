@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+from cubesat_simradio.examples.register_commands import calculate_crc, init_crc
+
+READ_REGISTERS_MSG_ID: int = 13
+WRITE_REGISTERS_MSG_ID: int = 15
+END_TERM: bytes = bytes(4)
+MAX_REPLY_SIZE: int = 238  # payload limit of a radio frame with its CRC16
+
+
+class RegisterError(ValueError):
+    pass
+
+
+def parse_var_id(data: bytes | memoryview) -> tuple[int, int, int]:
+    """ `BRK_VAR_ID.to_bytes` -> (dev_id, var_id, offset) """
+    value: int = int.from_bytes(data, 'little')
+    return value >> 28, (value >> 24) & 0x0F, (value & 0xFFFFFF) >> 3
+
+
+def parse_read_message(msg: bytes) -> Iterator[tuple[int, int, int, int]]:
+    """ (dev_id, var_id, offset, length) items of `read_registers_message` """
+    view = memoryview(msg)
+    position: int = 0
+    while view[position:position + 4] != END_TERM:
+        if position + 5 > len(view):
+            raise RegisterError('read message without end term')
+        yield *parse_var_id(view[position:position + 4]), view[position + 4]
+        position += 5
+
+
+def parse_write_message(msg: bytes) -> tuple[list[tuple[int, int, int, memoryview]], bytes, int]:
+    """ `write_registers_message` -> ([(dev_id, var_id, offset, value)], CRC covered part, CRC) """
+    view = memoryview(msg)
+    items: list[tuple[int, int, int, memoryview]] = []
+    position: int = 0
+    while view[position:position + 4] != END_TERM:
+        if position + 5 > len(view):
+            raise RegisterError('write message without end term')
+        length: int = view[position + 4]
+        value: memoryview = view[position + 5:position + 5 + length]
+        if len(value) != length:
+            raise RegisterError('write message value is truncated')
+        items.append((*parse_var_id(view[position:position + 4]), value))
+        position += 5 + length
+    position += 4
+    position += -position % 4
+    if len(view) < position + 4:
+        raise RegisterError('write message without CRC')
+    return items, msg[:position], int.from_bytes(view[position:position + 4], 'little')
+
+
+def message_crc(covered: bytes, board_time: int) -> int:
+    words: list[int] = [int.from_bytes(covered[i:i + 4], 'little') for i in range(0, len(covered), 4)]
+    return calculate_crc(init_crc(board_time), words)
+
+
+class RegisterFile:
+    """ Onboard variables as one contiguous bytearray per (dev_id, var_id), addressed by `BRK_VAR_ID` offset.
+    Bytes set by a ground write message are marked, `refresh` leaves them as written. """
+
+    def __init__(self, default_size: int = 1024) -> None:
+        self.default_size: int = default_size
+        self.variables: dict[tuple[int, int], bytearray] = {}
+        self.written: dict[tuple[int, int], bytearray] = {}  # 1 for every byte a write message has set
+
+    def variable(self, dev_id: int, var_id: int) -> bytearray:
+        memory: bytearray | None = self.variables.get((dev_id, var_id))
+        if memory is None:
+            memory = self.variables[(dev_id, var_id)] = bytearray(self.default_size)
+        return memory
+
+    def _bounds(self, dev_id: int, var_id: int, offset: int, length: int) -> bytearray:
+        memory: bytearray = self.variable(dev_id, var_id)
+        if offset + length > len(memory):
+            raise RegisterError(f'dev {dev_id} var {var_id}: {offset}+{length} is out of {len(memory)} bytes')
+        return memory
+
+    def read(self, dev_id: int, var_id: int, offset: int, length: int) -> memoryview:
+        """ view of the register memory, valid until the next write """
+        return memoryview(self._bounds(dev_id, var_id, offset, length))[offset:offset + length]
+
+    def write(self, dev_id: int, var_id: int, offset: int, value: bytes | memoryview) -> None:
+        self._bounds(dev_id, var_id, offset, len(value))[offset:offset + len(value)] = value
+
+    def refresh(self, dev_id: int, var_id: int, offset: int, value: bytes | memoryview) -> None:
+        """ onboard update: writes `value` except over the bytes set by a write message """
+        memory: bytearray = self._bounds(dev_id, var_id, offset, len(value))
+        mask: bytearray | None = self.written.get((dev_id, var_id))
+        if mask is None or not any(mask[offset:offset + len(value)]):
+            memory[offset:offset + len(value)] = value
+            return
+        for i, byte in enumerate(value, offset):
+            if not mask[i]:
+                memory[i] = byte
+
+    def read_message(self, msg: bytes) -> bytes:
+        """ reply payload of a read request: the requested ranges one after another """
+        items: list[tuple[int, int, int, int]] = list(parse_read_message(msg))
+        if sum(item[3] for item in items) > MAX_REPLY_SIZE:
+            raise RegisterError('read reply does not fit one frame')
+        return b''.join(self.read(*item) for item in items)
+
+    def write_message(self, msg: bytes, board_times: Iterable[int]) -> int:
+        """ applies a write request signed with one of `board_times`, returns the number of written bytes """
+        items, covered, crc = parse_write_message(msg)
+        if not any(message_crc(covered, board_time) == crc for board_time in board_times):
+            raise RegisterError('write message CRC does not match recent board time')
+        for dev_id, var_id, offset, value in items:
+            self._bounds(dev_id, var_id, offset, len(value))
+        for dev_id, var_id, offset, value in items:
+            self.write(dev_id, var_id, offset, value)
+            mask: bytearray = self.written.setdefault((dev_id, var_id), bytearray(len(self.variable(dev_id, var_id))))
+            mask[offset:offset + len(value)] = b'\x01' * len(value)
+        return sum(len(item[3]) for item in items)
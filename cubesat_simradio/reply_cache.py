@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from threading import Lock
+
+
+class ReplyCache:
+    """ Replies by (tx_addr, transaction_num) so a retransmitted request is answered with the same frame.
+
+    Every source keeps its `per_source` latest transactions, the least recently active sources are dropped above
+    `max_sources` and entries expire `ttl_sec` after the first answer. A request reusing the transaction number with
+    another payload is a new command and misses. `UplinkRouter` drops only copies of one transmission, so every
+    retransmission reaches the satellite and is answered here. """
+
+    def __init__(self, ttl_sec: float = 10.0, per_source: int = 16, max_sources: int = 256) -> None:
+        self.ttl_sec: float = ttl_sec
+        self.per_source: int = per_source
+        self.max_sources: int = max_sources
+        # tx_addr: transaction_num -> (expires at, request message, reply), oldest first
+        self._sources: dict[bytes, dict[int, tuple[float, bytes, bytes]]] = {}
+        self._lock: Lock = Lock()
+
+    def get(self, tx_addr: bytes, transaction_num: int, msg: bytes, now: float) -> bytes | None:
+        with self._lock:
+            entries: dict[int, tuple[float, bytes, bytes]] | None = self._sources.get(tx_addr)
+            if entries is None:
+                return None
+            entry: tuple[float, bytes, bytes] | None = entries.get(transaction_num)
+            if entry is None:
+                return None
+            expires, request, reply = entry
+            if expires <= now:
+                del entries[transaction_num]
+                return None
+            return reply if request == msg else None
+
+    def put(self, tx_addr: bytes, transaction_num: int, msg: bytes, reply: bytes, now: float) -> None:
+        if self.ttl_sec <= 0:
+            return
+        with self._lock:
+            entries: dict[int, tuple[float, bytes, bytes]] = self._sources.pop(tx_addr, {})
+            self._sources[tx_addr] = entries  # most recently active source last
+            entries.pop(transaction_num, None)
+            entries[transaction_num] = (now + self.ttl_sec, msg, reply)
+            while len(entries) > self.per_source or (entries and next(iter(entries.values()))[0] <= now):
+                del entries[next(iter(entries))]
+            while len(self._sources) > self.max_sources:
+                del self._sources[next(iter(self._sources))]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sources.clear()
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._sources.values())
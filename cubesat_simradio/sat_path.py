@@ -2,23 +2,25 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
 import os
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
 import numpy as np
 from pytz import utc
-from skyfield.api import load
-from skyfield.units import Angle, Distance, AngleRate, Velocity
-from skyfield.vectorlib import VectorSum
-from skyfield.positionlib import Geocentric
-from skyfield.sgp4lib import EarthSatellite
-from skyfield.timelib import Time, Timescale
-from skyfield.toposlib import wgs84, GeographicPosition
 
+if TYPE_CHECKING:
+    # skyfield is imported by the functions that propagate orbits, paths themselves are plain arrays
+    from skyfield.units import Angle, Distance, AngleRate, Velocity
+    from skyfield.positionlib import Geocentric
+    from skyfield.sgp4lib import EarthSatellite
+    from skyfield.timelib import Time, Timescale
+    from skyfield.toposlib import GeographicPosition
 
 
 class SatellitePath:
     def __init__(self, sat_name: str, altitude: Angle, azimute: Angle, distance: Distance,
-                 alt_rate: AngleRate, az_rate: AngleRate, dist_rate: Velocity, time_points: list[datetime]) -> None:
+                 alt_rate: AngleRate, az_rate: AngleRate, dist_rate: Velocity, time_points: list[datetime],
+                 extras: dict[str, np.ndarray] | None = None) -> None:
         self.sat_name: str = sat_name
+        self.extras: dict[str, np.ndarray] = extras or {}
         self.altitude: np.ndarray = altitude.degrees  # type: ignore
         self.azimuth: np.ndarray = azimute.degrees  # type: ignore
         self.dist: np.ndarray = distance.km  # type: ignore
@@ -31,9 +33,22 @@ class SatellitePath:
         self.az_rotation_direction: Literal[1, -1] = -1 + 2 * (self.azimuth[1] > self.azimuth[0])  # type: ignore
         self._max_altitude = np.max(self.altitude)  # type: ignore
 
+    @property
+    def timestamps(self) -> np.ndarray:
+        """ POSIX timestamps of `t_points`, computed once """
+        if getattr(self, '_timestamps', None) is None or len(self._timestamps) != len(self.t_points):
+            self._timestamps = np.fromiter((t.timestamp() for t in self.t_points), float, len(self.t_points))
+        return self._timestamps
+
+    def nearest_index(self, timestamp: float) -> int:
+        timestamps: np.ndarray = self.timestamps
+        idx: int = int(np.searchsorted(timestamps, timestamp))
+        if idx == len(timestamps) or (idx > 0 and timestamp - timestamps[idx - 1] < timestamps[idx] - timestamp):
+            idx -= 1
+        return idx
+
     def find_nearest(self, array: np.ndarray, timestamp: datetime) -> int | float:
-        idx: int = (np.abs(np.asarray(self.t_points) - timestamp)).argmin()
-        return array[idx]
+        return array[self.nearest_index(timestamp.timestamp())]
 
     def get_max_elevation(self) -> float:
         return self._max_altitude
@@ -84,6 +99,7 @@ class TestSatellitePath(SatellitePath):
 
     def __init__(self, test_size: int = 45) -> None:
         self.sat_name: str = 'test_sat'
+        self.extras: dict[str, np.ndarray] = {}
         self.altitude: np.ndarray = np.linspace(0.0, test_size, num=test_size)
         self.azimuth: np.ndarray = np.linspace(90.0, 90 + test_size, num=test_size)
         self.dist: np.ndarray = np.zeros(test_size)
@@ -98,18 +114,64 @@ class TestSatellitePath(SatellitePath):
 
 
 def angle_points(tle: str, sat: str, observer: GeographicPosition, t_1: datetime, t_2: datetime,
-                 sampling_rate=3.3333) -> SatellitePath:
-    timescale: Timescale = load.timescale()
-    time_points: Time = timescale.linspace(timescale.from_datetime(t_1), timescale.from_datetime(t_2),
-                                           int((t_2 - t_1).seconds * sampling_rate))
+                 sampling_rate=3.3333, extras: tuple[str, ...] = (), ephemeris=None) -> SatellitePath:
+    from skyfield.sgp4lib import EarthSatellite  # pylint: disable=import-outside-toplevel,redefined-outer-name
     tle_strings: list[str] = tle.split('\n')
     satellite: EarthSatellite = EarthSatellite(name=tle_strings[0], line1=tle_strings[1], line2=tle_strings[2])
+    return satellite_path(satellite, sat, observer, t_1, t_2, sampling_rate, extras=extras, ephemeris=ephemeris)
 
-    sat_position: VectorSum = satellite - observer
-    topocentric: Geocentric = sat_position.at(time_points)  # type: ignore
-    return SatellitePath(sat, *topocentric.frame_latlon_and_rates(observer), time_points.utc_datetime())  # type: ignore
+
+def satellite_path(satellite: EarthSatellite, sat: str, observer: GeographicPosition, t_1: datetime, t_2: datetime,
+                   sampling_rate=3.3333, timescale: Timescale | None = None, extras: tuple[str, ...] = (),
+                   ephemeris=None) -> SatellitePath:
+    """ `angle_points` for an already parsed satellite; `extras` are names from PATH_EXTRAS """
+    from skyfield.api import load  # pylint: disable=import-outside-toplevel
+    timescale = timescale or load.timescale()
+    time_points: Time = timescale.linspace(timescale.from_datetime(t_1), timescale.from_datetime(t_2),
+                                           int((t_2 - t_1).total_seconds() * sampling_rate))
+    geocentric: Geocentric = satellite.at(time_points)
+    topocentric = geocentric - observer.at(time_points)
+    return SatellitePath(sat, *topocentric.frame_latlon_and_rates(observer), time_points.utc_datetime(),  # type: ignore
+                         path_extras(extras, geocentric, observer, time_points, ephemeris))
+
+
+PATH_EXTRAS: tuple[str, ...] = ('sunlit', 'sun_elevation', 'latitude', 'longitude', 'height')
+_ephemeris = None
+
+
+def get_ephemeris():
+    """ de421 planetary ephemeris, downloaded by skyfield on first use """
+    global _ephemeris  # pylint: disable=global-statement
+    if _ephemeris is None:
+        from skyfield.api import load  # pylint: disable=import-outside-toplevel
+        _ephemeris = load('de421.bsp')
+    return _ephemeris
+
+
+def path_extras(names: tuple[str, ...], geocentric: Geocentric, observer: GeographicPosition, time_points: Time,
+                ephemeris=None) -> dict[str, np.ndarray]:
+    """ annotations from the already propagated satellite positions """
+    unknown: set[str] = set(names) - set(PATH_EXTRAS)
+    if unknown:
+        raise ValueError(f'unknown path extras: {sorted(unknown)}')
+    extras: dict[str, np.ndarray] = {}
+    if 'sunlit' in names or 'sun_elevation' in names:
+        ephemeris = ephemeris or get_ephemeris()
+    if 'sunlit' in names:
+        extras['sunlit'] = geocentric.is_sunlit(ephemeris)
+    if 'sun_elevation' in names:
+        station = (ephemeris['earth'] + observer).at(time_points)
+        extras['sun_elevation'] = station.observe(ephemeris['sun']).apparent().altaz()[0].degrees
+    if {'latitude', 'longitude', 'height'} & set(names):
+        from skyfield.toposlib import wgs84  # pylint: disable=import-outside-toplevel
+        latitude, longitude = wgs84.latlon_of(geocentric)
+        subpoint: dict[str, np.ndarray] = {'latitude': latitude.degrees, 'longitude': longitude.degrees,
+                                           'height': wgs84.height_of(geocentric).km}
+        extras.update({name: subpoint[name] for name in names if name in subpoint})
+    return extras
 
 if __name__ == '__main__':
+    from skyfield.toposlib import wgs84
     start_time_: datetime = datetime.now(tz=timezone.utc)
     # points: SatellitePath = angle_points('NORBI', wgs84.latlon(60.006770, 30.379205, 40),
     #                                      datetime.fromisoformat('2023-03-29T13:46:47.000+00:00'),
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import os
+import random
+import tomllib
+from typing import TYPE_CHECKING, Iterator
+
+from cubesat_simradio.models import SX127x_BW, SX127x_CR, SX127x_HeaderMode, SX127x_Modulation
+
+if TYPE_CHECKING:
+    from cubesat_simradio.emusats_configs import RadioConfig
+
+PROFILES_DIR: str = os.path.join(os.path.dirname(__file__), 'examples', 'satellite_profiles')
+BROADCAST_ADDRESS: bytes = bytes([0xFF, 0xFF, 0xFF, 0xFF])
+COMMAND_SETS: tuple[str, ...] = ('tmi', 'pss_tmi', 'registers')
+BEACONS: tuple[str, ...] = ('norbi', 'stratosat')
+ONBOARD_TIMES: tuple[str, ...] = ('', 'norbi', 'norbi2')  # '' keeps the beacon template time
+
+
+def parse_address(address: str) -> bytes:
+    """ '10.6.1.201' -> b'\\x0a\\x06\\x01\\xc9' """
+    parts: list[int] = [int(part, 0) for part in address.split('.')]
+    if len(parts) != 4 or not all(0 <= part <= 0xFF for part in parts):
+        raise ValueError(f'incorrect satellite address: {address}')
+    return bytes(parts)
+
+
+@dataclass(frozen=True)
+class SatelliteProfile:
+    """ Everything the emulator needs to know about one satellite """
+    name: str
+    radio: dict = field(hash=False)  # RadioConfig fields with enum names, mode 'random' picks LORA or FSK
+    aliases: frozenset[str] = frozenset()
+    addresses: tuple[bytes, ...] = ()
+    commands: frozenset[str] = frozenset()
+    telemetry: tuple[str, ...] = ()  # `load_layouts` names
+    beacon: str = 'norbi'
+    onboard_time: str = ''
+    tle: str = ''
+    tle_source: str = 'inline'  # or the TLE file path
+
+    @classmethod
+    def from_dict(cls, data: dict, base_dir: str = '.') -> SatelliteProfile:
+        tle: str = data.get('tle', '')
+        tle_source: str = 'inline'
+        if 'tle_file' in data:
+            tle_source = os.path.join(base_dir, data['tle_file'])
+            with open(tle_source, encoding='utf-8') as tle_file:
+                tle = tle_file.read().strip()
+        profile = cls(data['name'], dict(data['radio']), frozenset(data.get('aliases', ())),
+                      tuple(parse_address(address) for address in data.get('addresses', ())),
+                      frozenset(data.get('commands', ())), tuple(data.get('telemetry', ())),
+                      data.get('beacon', 'norbi'), data.get('onboard_time', ''), tle, tle_source)
+        profile.validate()
+        return profile
+
+    @classmethod
+    def from_toml(cls, path: str) -> SatelliteProfile:
+        with open(path, 'rb') as profile_file:
+            return cls.from_dict(tomllib.load(profile_file), os.path.dirname(path))
+
+    def validate(self) -> None:
+        unknown: set[str] = set(self.commands) - set(COMMAND_SETS)
+        if unknown:
+            raise ValueError(f'{self.name}: unknown command sets {sorted(unknown)}')
+        if self.beacon not in BEACONS:
+            raise ValueError(f'{self.name}: unknown beacon {self.beacon}')
+        if self.onboard_time not in ONBOARD_TIMES:
+            raise ValueError(f'{self.name}: unknown onboard time {self.onboard_time}')
+        if BROADCAST_ADDRESS in self.addresses:
+            raise ValueError(f'{self.name}: broadcast address can not be assigned')
+
+    def radio_config(self) -> RadioConfig:
+        """ new validated config, the registry itself does not need pydantic """
+        from cubesat_simradio.emusats_configs import RadioConfig  # pylint: disable=import-outside-toplevel
+        radio: dict = dict(self.radio)
+        mode: str = radio.pop('mode', 'random')
+        return RadioConfig(mode=random.choice([SX127x_Modulation.LORA, SX127x_Modulation.FSK]) if mode == 'random'
+                           else SX127x_Modulation[mode],
+                           bandwidth=SX127x_BW[radio.pop('bandwidth')],
+                           coding_rate=SX127x_CR[radio.pop('coding_rate')],
+                           header_mode=SX127x_HeaderMode[radio.pop('header_mode')],
+                           tle=self.tle, **radio)
+
+
+class SatelliteRegistry:
+    """ Satellite profiles with O(1) lookup by case insensitive name or alias and by uplink address """
+
+    def __init__(self, profiles: list[SatelliteProfile] | None = None) -> None:
+        self._profiles: dict[str, SatelliteProfile] = {}
+        self._aliases: dict[str, str] = {}
+        self._addresses: dict[bytes, str] = {}
+        for profile in profiles or []:
+            self.add(profile)
+
+    @classmethod
+    def from_dirs(cls, *dirs: str) -> SatelliteRegistry:
+        registry = cls()
+        for directory in dirs:
+            registry.load_dir(directory)
+        return registry
+
+    def load_dir(self, directory: str) -> int:
+        """ adds every *.toml profile of the directory, returns their number """
+        names: list[str] = sorted(name for name in os.listdir(directory) if name.endswith('.toml'))
+        for name in names:
+            self.add(SatelliteProfile.from_toml(os.path.join(directory, name)))
+        return len(names)
+
+    def add(self, profile: SatelliteProfile) -> None:
+        keys: set[str] = {profile.name.upper()} | {alias.upper() for alias in profile.aliases}
+        for key in keys:
+            if self._aliases.get(key, profile.name) != profile.name:
+                raise ValueError(f'{profile.name}: name {key} is already used by {self._aliases[key]}')
+        for address in profile.addresses:
+            if self._addresses.get(address, profile.name) != profile.name:
+                raise ValueError(f'{profile.name}: address {address.hex(".")} is already used by '
+                                 f'{self._addresses[address]}')
+        self.remove(profile.name)
+        self._profiles[profile.name] = profile
+        self._aliases.update(dict.fromkeys(keys, profile.name))
+        self._addresses.update(dict.fromkeys(profile.addresses, profile.name))
+
+    def remove(self, name: str) -> SatelliteProfile | None:
+        profile: SatelliteProfile | None = self.get(name)
+        if profile is None:
+            return None
+        del self._profiles[profile.name]
+        self._aliases = {key: value for key, value in self._aliases.items() if value != profile.name}
+        for address in profile.addresses:
+            self._addresses.pop(address, None)
+        return profile
+
+    def get(self, name: str) -> SatelliteProfile | None:
+        canonical: str | None = self._aliases.get(name.upper())
+        return None if canonical is None else self._profiles[canonical]
+
+    def __getitem__(self, name: str) -> SatelliteProfile:
+        profile: SatelliteProfile | None = self.get(name)
+        if profile is None:
+            raise KeyError(name)
+        return profile
+
+    def by_address(self, address: bytes) -> SatelliteProfile | None:
+        name: str | None = self._addresses.get(bytes(address))
+        return None if name is None else self._profiles[name]
+
+    @property
+    def address_index(self) -> dict[bytes, str]:
+        return dict(self._addresses)
+
+    def __contains__(self, name: str) -> bool:
+        return name.upper() in self._aliases
+
+    def __iter__(self) -> Iterator[SatelliteProfile]:
+        return iter(list(self._profiles.values()))
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+
+REGISTRY: SatelliteRegistry | None = None
+
+
+def get_registry() -> SatelliteRegistry:
+    """ process wide registry of the bundled profiles and SIMRADIO_PROFILES_DIR (os.pathsep separated) """
+    global REGISTRY  # pylint: disable=global-statement
+    if REGISTRY is None:
+        extra_dirs: list[str] = [path for path in os.environ.get('SIMRADIO_PROFILES_DIR', '').split(os.pathsep)
+                                 if path]
+        REGISTRY = SatelliteRegistry.from_dirs(PROFILES_DIR, *extra_dirs)
+    return REGISTRY
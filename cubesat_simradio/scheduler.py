@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+from uuid import uuid5
+from pydantic import TypeAdapter
+
+from cubesat_simradio.models import SessionModel
+
+SESSIONS_ADAPTER: TypeAdapter[list[SessionModel]] = TypeAdapter(list[SessionModel])
+
+
+def load_sessions(data: bytes | str | list[dict]) -> list[SessionModel]:
+    """ validates a whole JSON document or list of dicts in one pass """
+    if isinstance(data, (bytes, str)):
+        return SESSIONS_ADAPTER.validate_json(data)
+    return SESSIONS_ADAPTER.validate_python(data)
+
+
+def dump_sessions(sessions: list[SessionModel], by_alias: bool = True) -> bytes:
+    return SESSIONS_ADAPTER.dump_json(sessions, by_alias=by_alias)
+
+
+class Timeline:
+    """ Sorted non overlapping busy intervals (POSIX timestamps) of one station """
+
+    def __init__(self) -> None:
+        self.starts: list[float] = []
+        self.finishes: list[float] = []
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def is_free(self, start: float, finish: float) -> bool:
+        index: int = bisect_right(self.starts, start)
+        if index > 0 and self.finishes[index - 1] > start:
+            return False
+        return index == len(self.starts) or self.starts[index] >= finish
+
+    def free_gaps(self, start: float, finish: float) -> list[tuple[float, float]]:
+        """ free parts of [start, finish] """
+        gaps: list[tuple[float, float]] = []
+        index: int = bisect_right(self.finishes, start)
+        cursor: float = start
+        while index < len(self.starts) and self.starts[index] < finish:
+            if self.starts[index] > cursor:
+                gaps.append((cursor, self.starts[index]))
+            cursor = max(cursor, self.finishes[index])
+            index += 1
+        if cursor < finish:
+            gaps.append((cursor, finish))
+        return gaps
+
+    def reserve(self, start: float, finish: float) -> None:
+        index: int = bisect_left(self.starts, start)
+        self.starts.insert(index, start)
+        self.finishes.insert(index, finish)
+
+
+@dataclass
+class ScheduleResult:
+    sessions: list[SessionModel] = field(default_factory=list)
+    rejected: list[SessionModel] = field(default_factory=list)
+
+
+class Scheduler:
+    """ Allocates station time to requested sessions, higher priority and earlier registration first """
+
+    def __init__(self, allow_split: bool = True, min_part_sec: int = 60, max_parts: int = 4) -> None:
+        self.allow_split: bool = allow_split
+        self.min_part_sec: int = min_part_sec
+        self.max_parts: int = max_parts
+
+    @staticmethod
+    def visibility(passes: Iterable) -> dict[tuple[str, str], tuple[list[float], list[float]]]:
+        """ (sat_name, station): sorted pass starts and finishes; takes `PassCandidate`s or `SessionModel`s """
+        windows: dict[tuple[str, str], list[tuple[float, float]]] = {}
+        for candidate in passes:
+            windows.setdefault((candidate.sat_name, candidate.station), []).append(
+                (candidate.start.timestamp(), candidate.finish.timestamp()))
+        result: dict[tuple[str, str], tuple[list[float], list[float]]] = {}
+        for key, intervals in windows.items():
+            intervals.sort()
+            result[key] = ([start for start, _ in intervals], [finish for _, finish in intervals])
+        return result
+
+    def schedule(self, requests: Iterable[SessionModel], passes: Iterable | None = None,
+                 fixed: Iterable[SessionModel] = ()) -> ScheduleResult:
+        """ `requests` ask for [initial_start, initial_start + initial_duration_sec] in at most `parts` sessions; with
+        `passes` the window is clipped to the satellite visibility. `fixed` sessions are already booked and are never
+        moved """
+        timelines: dict[str, Timeline] = {}
+        for session in fixed:
+            timelines.setdefault(session.station, Timeline()).reserve(session.start.timestamp(),
+                                                                      session.finish.timestamp())
+        visible = self.visibility(passes) if passes is not None else None
+        result = ScheduleResult()
+        for request in sorted(requests, key=lambda s: (-s.priority, s.registration_time, s.initial_start)):
+            if request.parts < 1:
+                raise ValueError(f'session {request.time_range_id} asks for {request.parts} parts, expected at least 1')
+            start: float = request.initial_start.timestamp()
+            finish: float = start + request.initial_duration_sec
+            allowed: list[tuple[float, float]] = [(start, finish)]
+            if visible is not None:
+                allowed = self.clip(visible.get((request.sat_name, request.station), ([], [])), start, finish)
+            timeline: Timeline = timelines.setdefault(request.station, Timeline())
+            pieces: list[tuple[float, float]] = self.allocate(timeline, allowed, request.parts)
+            if not pieces:
+                result.rejected.append(request)
+                continue
+            for part_start, part_finish in pieces:
+                timeline.reserve(part_start, part_finish)
+            result.sessions += self.make_parts(request, pieces)
+        result.sessions.sort(key=lambda s: s.start)
+        return result
+
+    @staticmethod
+    def clip(windows: tuple[list[float], list[float]], start: float, finish: float) -> list[tuple[float, float]]:
+        starts, finishes = windows
+        clipped: list[tuple[float, float]] = []
+        index: int = bisect_right(finishes, start)
+        while index < len(starts) and starts[index] < finish:
+            clipped.append((max(start, starts[index]), min(finish, finishes[index])))
+            index += 1
+        return clipped
+
+    def allocate(self, timeline: Timeline, allowed: list[tuple[float, float]],
+                 max_parts: int | None = None) -> list[tuple[float, float]]:
+        """ the whole window when it is free, else its longest free parts of at least `min_part_sec`, no more than
+        `max_parts` (capped by the scheduler `max_parts`) """
+        max_parts = self.max_parts if max_parts is None else min(max_parts, self.max_parts)
+        if len(allowed) == 1 and timeline.is_free(*allowed[0]):
+            return allowed
+        if not self.allow_split:
+            return []
+        pieces: list[tuple[float, float]] = []
+        for start, finish in allowed:
+            pieces += [gap for gap in timeline.free_gaps(start, finish) if gap[1] - gap[0] >= self.min_part_sec]
+        if len(pieces) > max_parts:
+            pieces = sorted(sorted(pieces, key=lambda gap: gap[0] - gap[1])[:max_parts])
+        return pieces
+
+    @staticmethod
+    def make_parts(request: SessionModel, pieces: list[tuple[float, float]]) -> list[SessionModel]:
+        """ one session per part; inputs are already validated, so `model_construct` skips validation """
+        fields: dict = dict(vars(request))
+        sessions: list[SessionModel] = []
+        for number, (start, finish) in enumerate(pieces):
+            part_start = datetime.fromtimestamp(start, timezone.utc)
+            fields.update(time_range_id=request.time_range_id if len(pieces) == 1 else
+                          uuid5(request.time_range_id, str(number)), start=part_start,
+                          finish=part_start + timedelta(seconds=finish - start),
+                          duration_sec=int(finish - start), parts=len(pieces))
+            sessions.append(SessionModel.model_construct(**fields))
+        return sessions
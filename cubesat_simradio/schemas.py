@@ -0,0 +1,46 @@
+from datetime import datetime
+from uuid import UUID
+from pydantic import BaseModel, Field
+
+
+class SessionModel(BaseModel):
+    time_range_id: UUID = Field(alias='_id')
+    user_id: UUID
+    username: str
+    script_id: UUID | None
+    sat_name: str
+    is_user_tle: bool
+    station: str
+    registration_time: datetime
+    priority: int
+    start: datetime
+    duration_sec: int
+    finish: datetime
+    parts: int
+    max_elevation: float
+    initial_start: datetime
+    initial_duration_sec: int
+    class Config:
+        json_encoders = {
+            # custom output conversion for datetime
+            datetime: lambda dt: dt.isoformat(' ', 'seconds')
+        }
+
+class RadioModel(BaseModel):
+    mode: str
+    op_mode: str
+    frequency: int
+    spreading_factor: int
+    coding_rate: str
+    bandwidth: str
+    check_crc: bool
+    sync_word: int
+    tx_power: float
+    autogain_control: bool
+    lna_gain: int
+    lna_boost: bool
+    header_mode: str
+    ldro: bool
+
+    def __str__(self) -> str:
+        return super().__str__().replace(' ', '\n')
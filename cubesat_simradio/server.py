@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import asyncio
+from enum import Enum, IntEnum
+import json
+import random
+import struct
+from loguru import logger
+
+from cubesat_simradio.airtime import FSK_BITRATE, bandwidth_khz, fsk_packet_ms, lora_packet_ms
+from cubesat_simradio.channel import ChannelModel
+from cubesat_simradio.emusat import EMUSAT
+from cubesat_simradio.emusats_configs import RadioConfig
+from cubesat_simradio.metrics import METRICS, MetricsRegistry
+from cubesat_simradio.models import (RadioModel, SX127x_BW, SX127x_CR, SX127x_DcFree, SX127x_HeaderMode,
+                                     SX127x_Modulation)
+from cubesat_simradio.radio_packet import RadioPacket
+from cubesat_simradio.utils import ZeroDelayClock
+
+HEADER = struct.Struct('>BH')  # opcode, payload length
+RX_HEADER = struct.Struct('>bhBi')  # snr, rssi, crc error, frequency error
+MAX_PAYLOAD: int = 0xFFFF
+
+
+class Opcode(IntEnum):
+    HELLO = 0x00  # payload: satellite name, answered with CONFIG
+    CONFIGURE = 0x01  # payload: JSON with StationRadio attributes (enum names or values), answered with CONFIG
+    SEND = 0x02  # payload: packet, answered with TX_DONE
+    SAT_CONFIG = 0x03  # answered with CONFIG: the station radio with the modem settings of the satellite radio
+    PING = 0x04
+    CONFIG = 0x81  # payload: JSON RadioModel
+    TX_DONE = 0x82  # payload: float32 airtime ms
+    RX = 0x83  # payload: RX_HEADER + packet, pushed whenever the station radio receives something
+    PONG = 0x84
+    ERROR = 0xFF  # payload: utf-8 message
+
+
+def encode_frame(opcode: int, payload: bytes = b'') -> bytes:
+    return HEADER.pack(opcode, len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    opcode, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+    return opcode, await reader.readexactly(length) if length else b''
+
+
+def radio_mismatch(model: RadioModel, config: RadioConfig) -> dict:
+    """ station settings that differ from the satellite radio, same rule as `RadioMock.check_rx_input` """
+    station: dict = model.model_dump()
+    satellite: dict = config.model_dump()
+    return {key: value for key, value in station.items() if key in satellite
+            and (satellite[key].name if isinstance(satellite[key], Enum) else satellite[key]) != value}
+
+
+class StationRadio:
+    """ `RadioMock` settings of one client connection """
+
+    def __init__(self) -> None:
+        self.modulation: SX127x_Modulation = SX127x_Modulation.LORA
+        self.coding_rate: SX127x_CR = SX127x_CR.CR5
+        self.bandwidth: SX127x_BW = SX127x_BW.BW250
+        self.spread_factor: int = 10
+        self.frequency: int = 436_700_000
+        self.crc_mode: bool = True
+        self.tx_power: int = 12
+        self.sync_word: int = 0x12
+        self.preamble_length: int = 8
+        self.auto_gain_control: bool = True
+        self.payload_length: int = 10
+        self.low_noize_amplifier: int = 5
+        self.lna_boost: bool = False
+        self.header_mode: SX127x_HeaderMode = SX127x_HeaderMode.EXPLICIT
+        self.low_data_rate_optimize: bool = True
+        self.bitrate: int = FSK_BITRATE
+        self.dc_free: SX127x_DcFree = SX127x_DcFree.OFF
+
+    def configure(self, settings: dict) -> None:
+        enums: dict[str, type] = {'modulation': SX127x_Modulation, 'coding_rate': SX127x_CR, 'bandwidth': SX127x_BW,
+                                  'header_mode': SX127x_HeaderMode, 'dc_free': SX127x_DcFree}
+        for key, value in settings.items():
+            if not hasattr(self, key):
+                raise ValueError(f'unknown radio setting: {key}')
+            if key in enums:
+                value = enums[key][value] if isinstance(value, str) else enums[key](value)
+            else:
+                value = type(getattr(self, key))(value)
+            setattr(self, key, value)
+
+    def to_model(self) -> RadioModel:
+        return RadioModel(mode=self.modulation.name, frequency=self.frequency, spreading_factor=self.spread_factor,
+                          bandwidth=self.bandwidth.name, check_crc=self.crc_mode, sync_word=self.sync_word,
+                          coding_rate=self.coding_rate.name, tx_power=self.tx_power, lna_boost=self.lna_boost,
+                          lna_gain=self.low_noize_amplifier, header_mode=self.header_mode.name,
+                          autogain_control=self.auto_gain_control, ldro=self.low_data_rate_optimize,
+                          op_mode='RXCONT')
+
+    def satellite_model(self, config: RadioConfig) -> RadioModel:
+        """ `RadioModel` of the satellite radio, settings the satellite does not declare are taken from the station """
+        return self.to_model().model_copy(update={
+            'mode': config.mode.name, 'frequency': config.frequency, 'spreading_factor': config.spread_factor,
+            'bandwidth': config.bandwidth.name, 'check_crc': config.crc_mode, 'sync_word': config.sync_word,
+            'coding_rate': config.coding_rate.name, 'header_mode': config.header_mode.name, 'ldro': config.ldro})
+
+    def airtime_ms(self, payload_size: int) -> float:
+        if self.header_mode == SX127x_HeaderMode.IMPLICIT:
+            payload_size = self.payload_length
+        if self.modulation == SX127x_Modulation.FSK:
+            return fsk_packet_ms(payload_size, self.bitrate, self.preamble_length, crc=self.crc_mode,
+                                 variable_length=self.header_mode != SX127x_HeaderMode.IMPLICIT, dc_free=self.dc_free)
+        return lora_packet_ms(payload_size, self.spread_factor, bandwidth_khz(self.bandwidth),
+                              self.coding_rate.value >> 1, self.preamble_length, self.crc_mode,
+                              self.header_mode == SX127x_HeaderMode.IMPLICIT, True)
+
+
+class ClientSession:
+    """ One connection: station radio settings, its own threadless EMUSAT and a bounded outgoing queue """
+
+    def __init__(self, server: EmulatorServer, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.server: EmulatorServer = server
+        self.reader: asyncio.StreamReader = reader
+        self.writer: asyncio.StreamWriter = writer
+        self.radio = StationRadio()
+        self.outgoing: asyncio.Queue[bytes] = asyncio.Queue(server.queue_size)
+        self.satellite: EMUSAT | None = None
+        self.channel: ChannelModel = ChannelModel.from_interference(server.interference_level)
+        self._beacon_timer: asyncio.TimerHandle | None = None
+
+    def bind(self, sat_name: str) -> None:
+        self.close_satellite()
+        self.satellite = EMUSAT(sat_name, clock=ZeroDelayClock(), metrics=self.server.metrics)
+        self.satellite.radio_config.mode = random.choice([SX127x_Modulation.LORA, SX127x_Modulation.FSK])
+        self.satellite.transmited.connect(self.on_satellite_transmit)
+        self.satellite.refresh_beacon_timer()
+        self._schedule_beacon()
+
+    def _schedule_beacon(self) -> None:
+        assert self.satellite is not None
+        next_beacon: float = self.satellite._next_beacon_timestamp  # pylint: disable=protected-access
+        delay: float = max(next_beacon - self.satellite.clock.time(), 0.0)
+        self._beacon_timer = asyncio.get_running_loop().call_later(delay, self._beacon)
+
+    def _beacon(self) -> None:
+        if self.satellite is None:
+            return
+        if self.satellite.is_time_for_beacon():
+            self.satellite.change_state()
+        self._schedule_beacon()
+
+    def close_satellite(self) -> None:
+        if self._beacon_timer is not None:
+            self._beacon_timer.cancel()
+        if self.satellite is not None:
+            self.satellite.transmited.disconnect(self.on_satellite_transmit)
+        self.satellite = None
+
+    def on_satellite_transmit(self, data: bytes) -> None:
+        """ downlink through the channel to the station radio; dropped when the client does not keep up """
+        assert self.satellite is not None
+        link: str = self.satellite.name
+        if radio_mismatch(self.radio.to_model(), self.satellite.radio_config):
+            return
+        radio: StationRadio = self.radio
+        self.channel.set_link(radio.modulation, radio.spread_factor, bandwidth_khz(radio.bandwidth) * 1000,
+                              radio.bitrate)
+        received: bytes | None = self.channel.apply(data)
+        if received is None:
+            self.server.metrics.inc('packets_lost', link)
+            return
+        crc_error: bool = not RadioPacket(received).is_crc_valid if self.radio.crc_mode else True
+        self.server.metrics.inc('packets_received', link)
+        if crc_error:
+            self.server.metrics.inc('crc_errors', link)
+        payload: bytes = RX_HEADER.pack(random.randint(42, 52), random.randint(-115, -112), crc_error, 0) + received
+        try:
+            self.outgoing.put_nowait(encode_frame(Opcode.RX, payload))
+        except asyncio.QueueFull:
+            self.server.metrics.inc('packets_lost', link)
+
+    async def send(self, payload: bytes) -> None:
+        assert self.satellite is not None
+        airtime_ms: float = self.radio.airtime_ms(len(payload))
+        if self.server.realtime:
+            await asyncio.sleep(airtime_ms / 1000)
+        self.server.metrics.inc('packets_sent', self.satellite.name)
+        self.server.metrics.observe('airtime_seconds', self.satellite.name, airtime_ms / 1000)
+        await self.outgoing.put(encode_frame(Opcode.TX_DONE, struct.pack('>f', airtime_ms)))
+        frame: bytes | None = self.satellite.accept_uplink(payload, self.radio.to_model())
+        if frame is not None:
+            self.satellite._cmd_handler(frame)  # pylint: disable=protected-access
+
+    async def handle(self, opcode: int, payload: bytes) -> None:
+        if opcode == Opcode.HELLO:
+            self.bind(payload.decode() or self.server.default_sat)
+            await self.outgoing.put(encode_frame(Opcode.CONFIG, self.radio.to_model().model_dump_json().encode()))
+        elif opcode == Opcode.CONFIGURE:
+            self.radio.configure(json.loads(payload))
+            await self.outgoing.put(encode_frame(Opcode.CONFIG, self.radio.to_model().model_dump_json().encode()))
+        elif opcode == Opcode.SEND:
+            if self.satellite is None:
+                self.bind(self.server.default_sat)
+            await self.send(payload)
+        elif opcode == Opcode.SAT_CONFIG:
+            if self.satellite is None:
+                self.bind(self.server.default_sat)
+            assert self.satellite is not None
+            model: RadioModel = self.radio.satellite_model(self.satellite.radio_config)
+            await self.outgoing.put(encode_frame(Opcode.CONFIG, model.model_dump_json().encode()))
+        elif opcode == Opcode.PING:
+            await self.outgoing.put(encode_frame(Opcode.PONG, payload))
+        else:
+            raise ValueError(f'unknown opcode: {opcode:#04x}')
+
+    async def write_loop(self) -> None:
+        while True:
+            frame: bytes = await self.outgoing.get()
+            self.writer.write(frame)
+            if self.outgoing.empty():
+                await self.writer.drain()
+
+    async def run(self) -> None:
+        writer_task: asyncio.Task = asyncio.create_task(self.write_loop())
+        try:
+            while True:
+                opcode, payload = await read_frame(self.reader)
+                try:
+                    await self.handle(opcode, payload)
+                except (ValueError, KeyError, TypeError) as err:
+                    await self.outgoing.put(encode_frame(Opcode.ERROR, str(err).encode()[:MAX_PAYLOAD]))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.close_satellite()
+            writer_task.cancel()
+            self.writer.close()
+
+
+class EmulatorServer:
+    """ asyncio TCP or UNIX socket server, every connection gets its own emulated satellite.
+
+    Frames in both directions are `[opcode 1B][payload length 2B big endian][payload]`, see `Opcode`. Replies to
+    a client wait for free space in its queue, so a slow reader stops the server from reading its requests;
+    unsolicited RX frames are dropped and counted as lost instead. """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 5555, unix_path: str | None = None,
+                 queue_size: int = 64, max_sessions: int = 1024, realtime: bool = False,
+                 default_sat: str = 'NORBI', interference_level: int = 0,
+                 metrics: MetricsRegistry = METRICS) -> None:
+        self.host: str = host
+        self.port: int = port
+        self.unix_path: str | None = unix_path
+        self.queue_size: int = queue_size
+        self.max_sessions: int = max_sessions
+        self.realtime: bool = realtime
+        self.default_sat: str = default_sat
+        self.interference_level: int = interference_level
+        self.metrics: MetricsRegistry = metrics
+        self.sessions: set[ClientSession] = set()
+        self._server: asyncio.AbstractServer | None = None
+
+    async def _on_connect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if len(self.sessions) >= self.max_sessions:
+            writer.write(encode_frame(Opcode.ERROR, b'too many sessions'))
+            await writer.drain()
+            writer.close()
+            return
+        session = ClientSession(self, reader, writer)
+        self.sessions.add(session)
+        try:
+            await session.run()
+        finally:
+            self.sessions.discard(session)
+
+    async def start(self) -> asyncio.AbstractServer:
+        if self.unix_path:
+            self._server = await asyncio.start_unix_server(self._on_connect, self.unix_path)
+        else:
+            self._server = await asyncio.start_server(self._on_connect, self.host, self.port)
+        logger.info('emulator server listening on {}', self.unix_path or f'{self.host}:{self.port}')
+        return self._server
+
+    async def serve_forever(self) -> None:
+        server: asyncio.AbstractServer = self._server or await self.start()
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+
+
+class EmulatorClient:
+    """ Minimal asyncio client for load tests """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader: asyncio.StreamReader = reader
+        self.writer: asyncio.StreamWriter = writer
+
+    @classmethod
+    async def connect(cls, host: str = '127.0.0.1', port: int = 5555, unix_path: str | None = None) -> EmulatorClient:
+        if unix_path:
+            return cls(*await asyncio.open_unix_connection(unix_path))
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, opcode: int, payload: bytes = b'') -> None:
+        self.writer.write(encode_frame(opcode, payload))
+        await self.writer.drain()
+
+    async def read(self) -> tuple[int, bytes]:
+        return await read_frame(self.reader)
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import csv
+import math
+import os
+from typing import TYPE_CHECKING, Iterator
+import numpy as np
+
+from cubesat_simradio.crc import seal_frames
+from cubesat_simradio.radio_packet import RadioPacket
+from cubesat_simradio.satellite_profiles import SatelliteProfile, get_registry
+
+if TYPE_CHECKING:
+    from cubesat_simradio.sat_path import SatellitePath
+
+
+FORMATS_DIR: str = os.path.join(os.path.dirname(__file__), 'examples')
+HEADER_SIZE: int = 15  # RadioPacket header: length, rx addr, tx addr, transaction, res, msg id
+INT_CODES: dict[int, str] = {1: 'u1', 2: '<u2', 4: '<u4', 8: '<u8'}
+TMI_MARKER: bytes = bytes([0xF1, 0x0F])  # frame start mark 0x0FF1 at the start of every TMI message
+
+
+class TmiField:
+    def __init__(self, name: str, unit: str, size: int, data_type: str) -> None:
+        self.name: str = name.strip()
+        self.unit: str = unit.strip()
+        self.size: int = size
+        self.data_type: str = data_type.strip()
+        self.dtype: np.dtype = self._to_dtype()
+
+    def _to_dtype(self) -> np.dtype:
+        if self.data_type == 'double' and self.size == 8:
+            return np.dtype('<f8')
+        if '*' in self.data_type:
+            count, item_type = (part.strip() for part in self.data_type.split('*'))
+            item_code: str | None = INT_CODES.get(self.size // int(count))
+            if item_code and self.size % int(count) == 0:
+                if item_type.startswith('int'):
+                    item_code = item_code.replace('u', 'i')
+                return np.dtype((item_code, (int(count),)))
+        if self.size in INT_CODES and (self.data_type.startswith(('uint', 'int')) or self.data_type == 'целое'):
+            return np.dtype(INT_CODES[self.size].replace('u', 'i') if self.data_type.startswith('int')
+                            else INT_CODES[self.size])
+        return np.dtype((np.uint8, (self.size,)))  # hex, bit masks, strings and odd sized fields
+
+    @property
+    def is_raw(self) -> bool:
+        return self.dtype.subdtype is not None and '*' not in self.data_type
+
+    def __repr__(self) -> str:
+        return f'TmiField({self.name!r}, {self.unit!r}, {self.size}, {self.data_type!r})'
+
+
+class TmiLayout:
+    """ TMI frame layout loaded from `examples/*_TMI_formats/*.csv` as a packed NumPy structured dtype """
+
+    def __init__(self, name: str, fields: list[TmiField]) -> None:
+        self.name: str = name
+        self.fields: list[TmiField] = fields
+        self.dtype: np.dtype = np.dtype({'names': [f'f{i}' for i in range(len(fields))],
+                                         'formats': [field.dtype for field in fields]})
+        self.size: int = self.dtype.itemsize
+        self.frame_num_index: int = self.find('Номер кадра')
+        self.time_index: int = self.find('Время записи')
+
+    @classmethod
+    def from_csv(cls, path: str) -> TmiLayout:
+        with open(path, encoding='utf-8') as csv_file:
+            rows: list[list[str]] = list(csv.reader(csv_file))[1:]
+        fields: list[TmiField] = [TmiField(row[0], row[1], int(row[2]), row[3] if len(row) > 3 else '')
+                                  for row in rows if len(row) > 2 and row[2].strip()]
+        return cls(os.path.splitext(os.path.basename(path))[0], fields)
+
+    def index(self, key: int | str) -> int:
+        if isinstance(key, int):
+            return key
+        for i, field in enumerate(self.fields):
+            if field.name == key.strip():
+                return i
+        raise KeyError(f'{self.name} has no field {key!r}')
+
+    def find(self, prefix: str) -> int:
+        return next(i for i, field in enumerate(self.fields) if field.name.startswith(prefix))
+
+    def read_uint(self, message: bytes, index: int) -> int:
+        """ little-endian unsigned value of field `index` of a TMI message """
+        offset: int = self.dtype.fields[f'f{index}'][1]
+        return int.from_bytes(message[offset:offset + self.fields[index].size], 'little')
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+
+def load_layouts(sat_name: str = 'NORBI') -> list[TmiLayout]:
+    if sat_name == 'NORBI-2':
+        return [TmiLayout.from_csv(os.path.join(FORMATS_DIR, 'NORBI2_TMI_formats', f'tmi_pss{i}.csv'))
+                for i in range(4)]
+    return [TmiLayout.from_csv(os.path.join(FORMATS_DIR, 'NORBI_TMI_formats', f'tmi{i}.csv')) for i in range(9)]
+
+
+_layouts: dict[str, list[TmiLayout]] = {}
+
+
+def get_layouts(sat_name: str) -> list[TmiLayout]:
+    if sat_name not in _layouts:
+        _layouts[sat_name] = load_layouts(sat_name)
+    return _layouts[sat_name]
+
+
+def satellite_name(frame: bytes) -> str:
+    """ registry profile of the TX or else the RX address, the TX address string for unknown senders """
+    registry = get_registry()
+    profile: SatelliteProfile | None = registry.by_address(frame[5:9]) or registry.by_address(frame[1:5])
+    return profile.name if profile is not None else RadioPacket.address_to_string(frame[5:9])
+
+
+def frame_format(frame: bytes, sat_name: str) -> tuple[str, str, int]:
+    """ (satellite, layouts family, tmi number) with the same selection rules as `frame_parser`, the family is empty
+    and the tmi number -1 for satellites without NORBI telemetry, unknown senders among them """
+    if sat_name == 'auto':
+        sat_name = satellite_name(frame)
+    profile: SatelliteProfile | None = get_registry().get(sat_name)
+    if profile is None or 'NORBI' not in profile.telemetry:
+        return sat_name, '', -1
+    sat_name = profile.name
+    msg: bytes = frame[HEADER_SIZE:]
+    if sat_name == 'NORBI-2' and msg[4] <= 4:
+        return sat_name, 'NORBI-2', msg[4]
+    return sat_name, 'NORBI', int.from_bytes(msg[2:4], 'little')
+
+
+def frame_layout(frame: bytes, sat_name: str = 'auto') -> tuple[str, TmiLayout | None]:
+    """ (satellite, layout) of a TMI frame, the layout is None for frames without the TMI marker or a matching layout:
+    beacons of other formats, command replies and short frames """
+    if len(frame) <= HEADER_SIZE + 4 or frame[HEADER_SIZE:HEADER_SIZE + 2] != TMI_MARKER:
+        return sat_name if sat_name != 'auto' else satellite_name(frame), None
+    sat_name, family, tmi_num = frame_format(frame, sat_name)
+    layouts: list[TmiLayout] = get_layouts(family) if family else []
+    if not 0 <= tmi_num < len(layouts) or len(frame) != HEADER_SIZE + layouts[tmi_num].size:
+        return sat_name, None
+    return sat_name, layouts[tmi_num]
+
+
+class OrbitClock:
+    """ Orbital phase and eclipse state as functions of onboard time """
+
+    def __init__(self, period_sec: float = 5700.0, eclipse_fraction: float = 0.35, eclipse_center: float = 0.5,
+                 epoch: float = 0.0) -> None:
+        self.period_sec: float = period_sec
+        self.eclipse_fraction: float = eclipse_fraction
+        self.eclipse_center: float = eclipse_center
+        self.epoch: float = epoch
+
+    @classmethod
+    def from_tle(cls, tle: str, **kwargs) -> OrbitClock:
+        mean_motion: float = float(tle.split('\n')[2][52:63])  # revolutions per day
+        return cls(86400 / mean_motion, **kwargs)
+
+    @classmethod
+    def from_path(cls, path: SatellitePath, period_sec: float, **kwargs) -> OrbitClock:
+        """ eclipse fraction and epoch from the `sunlit` extra of a path covering at least one orbit """
+        sunlit: np.ndarray = path.extras['sunlit']
+        eclipse_fraction: float = 1.0 - float(np.mean(sunlit))
+        clock = cls(period_sec, eclipse_fraction, **kwargs)
+        entries: np.ndarray = np.flatnonzero(sunlit[:-1] & ~sunlit[1:]) + 1
+        if len(entries):
+            clock.epoch = path.timestamps[entries[0]] - (clock.eclipse_center - eclipse_fraction / 2) * period_sec
+        return clock
+
+    def phase(self, t: np.ndarray) -> np.ndarray:
+        return np.mod((t - self.epoch) / self.period_sec, 1.0)
+
+    def in_eclipse(self, t: np.ndarray) -> np.ndarray:
+        distance: np.ndarray = np.abs(self.phase(t) - self.eclipse_center)
+        return np.minimum(distance, 1 - distance) < self.eclipse_fraction / 2
+
+
+class FieldModel(ABC):
+    """ values of one TMI field over time """
+
+    @abstractmethod
+    def sample(self, t: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """ (len(t), *field shape) values at the times `t` """
+
+
+class Constant(FieldModel):
+    def __init__(self, value: float | np.ndarray) -> None:
+        self.value: float | np.ndarray = value
+
+    def sample(self, t: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        return np.broadcast_to(np.asarray(self.value, dtype=float), (t.shape[0], *np.shape(self.value)))
+
+
+class RandomWalk(FieldModel):
+    def __init__(self, start: float | np.ndarray, step: float, low: float = -math.inf,
+                 high: float = math.inf) -> None:
+        self.value: np.ndarray = np.asarray(start, dtype=float)
+        self.step: float = step
+        self.low: float = low
+        self.high: float = high
+
+    def sample(self, t: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        steps: np.ndarray = rng.normal(0, self.step, (t.shape[0], *self.value.shape))
+        values: np.ndarray = np.clip(self.value + np.cumsum(steps, axis=0), self.low, self.high)
+        if values.shape[0]:
+            self.value = values[-1]
+        return values
+
+
+class OrbitalSinusoid(FieldModel):
+    def __init__(self, mean: float, amplitude: float, clock: OrbitClock, phase: float = 0.0,
+                 eclipse_offset: float = 0.0, noise: float = 0.0) -> None:
+        self.mean: float = mean
+        self.amplitude: float = amplitude
+        self.clock: OrbitClock = clock
+        self.phase: float = phase
+        self.eclipse_offset: float = eclipse_offset
+        self.noise: float = noise
+
+    def sample(self, t: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        values: np.ndarray = self.mean + self.amplitude * np.sin(2 * np.pi * self.clock.phase(t) + self.phase)
+        if self.eclipse_offset:
+            values = values + self.eclipse_offset * self.clock.in_eclipse(t)
+        if self.noise:
+            values = values + rng.normal(0, self.noise, t.shape[0])
+        return values
+
+
+class Counter(FieldModel):
+    def __init__(self, start: int = 0, step: int = 1, modulo: int = 1 << 32) -> None:
+        self.value: int = start
+        self.step: int = step
+        self.modulo: int = modulo
+
+    def sample(self, t: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        values: np.ndarray = np.mod(self.value + self.step * np.arange(t.shape[0], dtype=np.int64), self.modulo)
+        self.value = (self.value + self.step * t.shape[0]) % self.modulo
+        return values
+
+
+def default_models(layout: TmiLayout, template: np.void, clock: OrbitClock) -> dict[int, FieldModel]:
+    """ Evolving models picked by field unit; everything else keeps its template value """
+    models: dict[int, FieldModel] = {}
+    for i, field in enumerate(layout.fields):
+        if i <= layout.time_index or field.is_raw:
+            continue
+        value: np.ndarray = np.asarray(template[f'f{i}'], dtype=float)
+        if field.unit == 'мВ':
+            models[i] = RandomWalk(value, 2.0, value * 0.9, value * 1.1)
+        elif field.unit == '°C':
+            models[i] = OrbitalSinusoid(float(value.mean()), 8.0, clock, eclipse_offset=-5.0, noise=0.3)
+        elif field.unit == 'мА' and 'панел' in field.name.lower():
+            models[i] = OrbitalSinusoid(float(abs(value.mean())), float(abs(value.mean())) / 2, clock,
+                                        eclipse_offset=-float(abs(value.mean())) * 1.5, noise=1.0)
+        elif 'dps' in field.unit or 'Тл' in field.unit:
+            models[i] = RandomWalk(value, 1.0)
+    return models
+
+
+class TelemetryGenerator:
+    """ Vectorized synthesizer of TMI radio frames (header + TMI) field by field from `FieldModel`s """
+
+    def __init__(self, layout: TmiLayout, template: bytes, models: dict[int | str, FieldModel] | None = None,
+                 clock: OrbitClock | None = None, frame_num: int = 0, seed: int | None = None) -> None:
+        if len(template) != HEADER_SIZE + layout.size:
+            raise ValueError(f'template length {len(template)} does not match layout {layout.name} '
+                             f'({HEADER_SIZE + layout.size} bytes)')
+        self.layout: TmiLayout = layout
+        self.header: np.ndarray = np.frombuffer(template[:HEADER_SIZE], dtype=np.uint8)
+        self.template: np.ndarray = np.frombuffer(template[HEADER_SIZE:], dtype=layout.dtype)
+        self.clock: OrbitClock = clock or OrbitClock()
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+        self.frame_counter: Counter = Counter(frame_num, modulo=1 << 16)
+        if models is None:
+            models = default_models(layout, self.template[0], self.clock)  # type: ignore
+        self.models: dict[int, FieldModel] = {layout.index(key): model for key, model in models.items()}
+
+    def generate(self, count: int, t_start: float, period_sec: float = 1.0) -> np.ndarray:
+        """ returns `count` frames as a (count, frame_len) uint8 array, t_start is onboard time in seconds """
+        t: np.ndarray = t_start + period_sec * np.arange(count, dtype=np.float64)
+        records: np.ndarray = np.repeat(self.template, count)
+        records[f'f{self.layout.frame_num_index}'] = self.frame_counter.sample(t, self.rng)
+        records[f'f{self.layout.time_index}'] = t.astype(np.uint64)
+        for i, model in self.models.items():
+            column: np.ndarray = records[f'f{i}']
+            values: np.ndarray = model.sample(t, self.rng)
+            if column.dtype.kind in 'iu':
+                info = np.iinfo(column.dtype)
+                values = np.clip(np.rint(values), info.min, info.max)
+            column[...] = values
+        frames: np.ndarray = np.empty((count, HEADER_SIZE + self.layout.size), dtype=np.uint8)
+        frames[:, :HEADER_SIZE] = self.header
+        frames[:, HEADER_SIZE:] = records.view(np.uint8).reshape(count, self.layout.size)
+        return seal_frames(frames)
+
+    def iter_batches(self, total: int, t_start: float, period_sec: float = 1.0,
+                     batch_size: int = 65536) -> Iterator[np.ndarray]:
+        for first in range(0, total, batch_size):
+            yield self.generate(min(batch_size, total - first), t_start + first * period_sec, period_sec)
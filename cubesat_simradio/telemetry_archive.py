@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import datetime
+import json
+import os
+from queue import Empty, Queue
+from threading import Lock, Thread
+import time
+from typing import Iterable
+from loguru import logger
+import numpy as np
+
+from cubesat_simradio.batch_decode import decode_block, unique_names
+from cubesat_simradio.crc import check_frames
+from cubesat_simradio.onboard_time import GLONASS_EPOCH, from_datetime64
+from cubesat_simradio.telemetry import HEADER_SIZE, TmiLayout, frame_format, get_layouts
+
+SECONDS_PER_DAY: int = 86400
+META_FILE: str = 'meta.json'
+# per row columns stored next to the TMI fields
+HEADER_COLUMNS: dict[str, np.dtype] = {'received': np.dtype('<f8'), 'crc_ok': np.dtype('?')}
+
+
+def column_dtype(layout: TmiLayout, name: str) -> np.dtype:
+    return HEADER_COLUMNS[name] if name in HEADER_COLUMNS else layout.dtype[name]
+
+
+def to_onboard_seconds(value: int | str | datetime.datetime | np.datetime64) -> int:
+    """ seconds since the GLONASS epoch, the onboard time of NORBI frames """
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(from_datetime64(value))
+
+
+class ArchivePartition:
+    """ One day of one TMI layout of one satellite: a raw little-endian file per layout field and header column.
+
+    `meta.json` holds the number of complete rows, so a batch cut by a crash is ignored on reopen. Frame numbers and
+    onboard times of the stored rows are kept in memory for deduplication: a row is skipped when a CRC-valid copy is
+    stored, a row with bad CRC also when a bad copy is stored, so a corrupted copy never blocks the valid one. Files
+    are append-only: a corrupted row stays stored after its valid copy and `select` leaves it out. """
+
+    def __init__(self, path: str, layout: TmiLayout) -> None:
+        self.path: str = path
+        self.layout: TmiLayout = layout
+        self.rows: int = 0
+        self.first_time: int = 0
+        self.last_time: int = 0
+        self._keys: tuple[set[int], set[int]] | None = None
+        meta_path: str = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding='utf-8') as meta_file:
+                meta: dict = json.load(meta_file)
+            self.rows, self.first_time, self.last_time = meta['rows'], meta['first_time'], meta['last_time']
+        self._truncate()
+
+    def column_dtype(self, name: str) -> np.dtype:
+        return column_dtype(self.layout, name)
+
+    def column_path(self, name: str) -> str:
+        return os.path.join(self.path, f'{name}.bin')
+
+    def column_names(self) -> list[str]:
+        return [*HEADER_COLUMNS, *self.layout.dtype.names]
+
+    def column(self, name: str) -> np.ndarray:
+        """ read-only memory map of the complete rows """
+        dtype: np.dtype = self.column_dtype(name)
+        if not self.rows:
+            return np.empty((0, *dtype.shape), dtype.base)
+        return np.memmap(self.column_path(name), dtype.base, 'r', shape=(self.rows, *dtype.shape))
+
+    def _truncate(self) -> None:
+        for name in self.column_names():
+            size: int = self.rows * self.column_dtype(name).itemsize
+            if os.path.exists(self.column_path(name)) and os.path.getsize(self.column_path(name)) > size:
+                os.truncate(self.column_path(name), size)
+
+    @staticmethod
+    def make_keys(frame_nums: np.ndarray, onboard_times: np.ndarray) -> np.ndarray:
+        return (onboard_times.astype(np.int64) << 16) | frame_nums.astype(np.int64) & 0xFFFF
+
+    def keys(self) -> tuple[set[int], set[int]]:
+        """ keys of the stored rows with valid and with bad CRC """
+        if self._keys is None:
+            keys: np.ndarray = self.make_keys(self.column(f'f{self.layout.frame_num_index}'),
+                                              self.column(f'f{self.layout.time_index}'))
+            valid: np.ndarray = np.asarray(self.column('crc_ok'), bool)
+            self._keys = set(keys[valid].tolist()), set(keys[~valid].tolist())
+        return self._keys
+
+    def append(self, records: np.ndarray, received: np.ndarray, crc_ok: np.ndarray) -> int:
+        """ appends the rows not stored yet, returns their number """
+        frame_nums: np.ndarray = records[f'f{self.layout.frame_num_index}']
+        onboard_times: np.ndarray = records[f'f{self.layout.time_index}']
+        valid_keys, corrupted_keys = self.keys()
+        new: list[int] = []
+        for i, (key, valid) in enumerate(zip(self.make_keys(frame_nums, onboard_times).tolist(), crc_ok.tolist())):
+            if key in valid_keys or (not valid and key in corrupted_keys):
+                continue
+            (valid_keys if valid else corrupted_keys).add(key)
+            new.append(i)
+        if not new:
+            return 0
+        os.makedirs(self.path, exist_ok=True)
+        columns: dict[str, np.ndarray] = {'received': received[new], 'crc_ok': crc_ok[new]}
+        selected: np.ndarray = records[new]
+        for name in self.layout.dtype.names:
+            columns[name] = selected[name]
+        for name, values in columns.items():
+            with open(self.column_path(name), 'ab') as column_file:
+                np.ascontiguousarray(values, self.column_dtype(name).base).tofile(column_file)
+        times: np.ndarray = onboard_times[new]
+        self.first_time = int(times.min()) if not self.rows else min(self.first_time, int(times.min()))
+        self.last_time = max(self.last_time, int(times.max()))
+        self.rows += len(new)
+        meta_path: str = os.path.join(self.path, META_FILE)
+        with open(f'{meta_path}.tmp', 'w', encoding='utf-8') as meta_file:
+            json.dump({'layout': self.layout.name, 'rows': self.rows, 'first_time': self.first_time,
+                       'last_time': self.last_time}, meta_file)
+        os.replace(f'{meta_path}.tmp', meta_path)
+        return len(new)
+
+    def select(self, start: int, end: int) -> np.ndarray:
+        """ indexes of the rows with onboard time in [start, end), without bad CRC rows superseded by a valid copy """
+        if not self.rows or self.last_time < start or self.first_time >= end:
+            return np.empty(0, np.int64)
+        onboard_times: np.ndarray = self.column(f'f{self.layout.time_index}')
+        rows: np.ndarray = np.flatnonzero((onboard_times >= start) & (onboard_times < end))
+        corrupted: np.ndarray = rows[~np.asarray(self.column('crc_ok')[rows], bool)]
+        if len(corrupted):
+            valid_keys: set[int] = self.keys()[0]
+            keys: np.ndarray = self.make_keys(self.column(f'f{self.layout.frame_num_index}')[corrupted],
+                                              onboard_times[corrupted])
+            superseded: np.ndarray = np.array([key in valid_keys for key in keys.tolist()], bool)
+            rows = np.setdiff1d(rows, corrupted[superseded], assume_unique=True)
+        return rows
+
+
+class TelemetryArchive:
+    """ Decoded telemetry of every pass under `root/<satellite>/<layout>/<YYYY-MM-DD>/`, one file per column.
+
+    `append` only queues the frame: a background thread groups queued frames by satellite, TMI layout and day of
+    onboard time and writes them in batches of up to `batch_size` rows, waiting at most `flush_interval_sec` for a
+    batch to fill. A frame with the frame number and onboard time of a stored one (another station, a later pass)
+    is skipped unless it is the first CRC-valid copy, and queries return only that copy, see `ArchivePartition`.
+    Call `close` (or use `with`) so the queued frames reach the disk. """
+
+    def __init__(self, root: str, batch_size: int = 512, flush_interval_sec: float = 1.0) -> None:
+        self.root: str = root
+        self.batch_size: int = batch_size
+        self.flush_interval_sec: float = flush_interval_sec
+        self.frames_written: int = 0
+        self.frames_skipped: int = 0
+        self._partitions: dict[tuple[str, str, int], ArchivePartition] = {}
+        self._lock: Lock = Lock()
+        self._queue: Queue[tuple[bytes, str, float] | None] = Queue()
+        self._writer: Thread | None = None
+        os.makedirs(root, exist_ok=True)
+
+    def append(self, frame: bytes | list[int], sat_name: str = 'auto', received: float | None = None) -> None:
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = Thread(target=self._write_loop, name='telemetry archive', daemon=True)
+                    self._writer.start()
+        self._queue.put((bytes(frame), sat_name, time.time() if received is None else received))
+
+    def extend(self, frames: Iterable[bytes | list[int]], sat_name: str = 'auto') -> None:
+        for frame in frames:
+            self.append(frame, sat_name)
+
+    def flush(self) -> None:
+        """ waits until every queued frame is on disk """
+        self._queue.join()
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+
+    def __enter__(self) -> TelemetryArchive:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _write_loop(self) -> None:
+        while True:
+            item: tuple[bytes, str, float] | None = self._queue.get()
+            batch: list[tuple[bytes, str, float]] = []
+            deadline: float = time.monotonic() + self.flush_interval_sec
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except Empty:
+                    break
+            try:
+                self.write(batch)
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                logger.exception('telemetry archive failed to write {} frames: {}', len(batch), err)
+            for _ in range(len(batch) + (item is None)):
+                self._queue.task_done()
+            if item is None:
+                return
+
+    def partition(self, sat_name: str, layout: TmiLayout, day: int) -> ArchivePartition:
+        key: tuple[str, str, int] = (sat_name, layout.name, day)
+        partition: ArchivePartition | None = self._partitions.get(key)
+        if partition is None:
+            date: str = str((GLONASS_EPOCH + np.timedelta64(day, 'D')).astype('datetime64[D]'))
+            partition = self._partitions[key] = ArchivePartition(
+                os.path.join(self.root, sat_name, layout.name, date), layout)
+        return partition
+
+    def write(self, frames: list[tuple[bytes, str, float]]) -> int:
+        """ stores (frame, satellite name, receive time) items in the calling thread, returns the new rows """
+        groups: dict[tuple[str, str, int], list[int]] = {}
+        for i, (frame, sat_name, _) in enumerate(frames):
+            if len(frame) > HEADER_SIZE + 4:
+                groups.setdefault(frame_format(frame, sat_name), []).append(i)
+        written: int = 0
+        candidates: int = 0
+        with self._lock:
+            for (sat, family, tmi_num), indexes in groups.items():
+                candidates += len(indexes)
+                if not family:
+                    continue
+                layouts: list[TmiLayout] = get_layouts(family)
+                if tmi_num >= len(layouts):
+                    continue
+                layout: TmiLayout = layouts[tmi_num]
+                indexes = [i for i in indexes if len(frames[i][0]) == HEADER_SIZE + layout.size]
+                if not indexes:
+                    continue
+                raw: np.ndarray = np.frombuffer(b''.join(frames[i][0] for i in indexes), np.uint8)
+                raw = raw.reshape(len(indexes), HEADER_SIZE + layout.size)
+                records: np.ndarray = np.ascontiguousarray(raw[:, HEADER_SIZE:]).view(layout.dtype).reshape(-1)
+                received: np.ndarray = np.array([frames[i][2] for i in indexes], np.float64)
+                crc_ok: np.ndarray = check_frames([frames[i][0] for i in indexes])
+                days: np.ndarray = records[f'f{layout.time_index}'] // SECONDS_PER_DAY
+                for day in np.unique(days).tolist():
+                    rows: np.ndarray = np.flatnonzero(days == day)
+                    written += self.partition(sat, layout, day).append(records[rows], received[rows], crc_ok[rows])
+            self.frames_written += written
+            self.frames_skipped += candidates - written
+        return written
+
+    def find_layout(self, sat_name: str, layout_name: str) -> TmiLayout:
+        family: str = 'NORBI-2' if layout_name.startswith('tmi_pss') else 'NORBI'
+        for layout in get_layouts(family):
+            if layout.name == layout_name:
+                return layout
+        raise KeyError(f'{sat_name} has no TMI layout {layout_name!r}')
+
+    def partitions(self, sat_name: str, layout_name: str, start: int = 0,
+                   end: int = 2 ** 32) -> list[ArchivePartition]:
+        """ stored partitions overlapping onboard time [start, end), oldest first """
+        layout: TmiLayout = self.find_layout(sat_name, layout_name)
+        layout_dir: str = os.path.join(self.root, sat_name, layout_name)
+        if not os.path.isdir(layout_dir):
+            return []
+        result: list[ArchivePartition] = []
+        with self._lock:
+            for date in sorted(os.listdir(layout_dir)):
+                day: int = to_onboard_seconds(date) // SECONDS_PER_DAY
+                if start // SECONDS_PER_DAY <= day <= (end - 1) // SECONDS_PER_DAY:
+                    result.append(self.partition(sat_name, layout, day))
+        return result
+
+    def select(self, sat_name: str, layout_name: str, start: int | str | datetime.datetime | None = None,
+               end: int | str | datetime.datetime | None = None,
+               columns: Iterable[str] | None = None) -> dict[str, np.ndarray]:
+        """ raw stored columns (`received`, `crc_ok` and TMI field names) of the rows with onboard time in
+        [start, end) ordered by onboard time and frame number; only the files of `columns` are read """
+        layout: TmiLayout = self.find_layout(sat_name, layout_name)
+        start_time: int = 0 if start is None else to_onboard_seconds(start)
+        end_time: int = 2 ** 32 if end is None else to_onboard_seconds(end)
+        field_names: dict[str, str] = {name: f'f{i}' for i, name in enumerate(unique_names(layout))}
+        names: list[str] = list(columns) if columns is not None else [*HEADER_COLUMNS, *field_names]
+        stored: dict[str, str] = {name: field_names.get(name, name) for name in names}
+        order_names: list[str] = [f'f{layout.frame_num_index}', f'f{layout.time_index}']
+        parts: dict[str, list[np.ndarray]] = {name: [] for name in [*stored.values(), *order_names]}
+        for partition in self.partitions(sat_name, layout_name, start_time, end_time):
+            rows: np.ndarray = partition.select(start_time, end_time)
+            for name, values in parts.items():
+                values.append(partition.column(name)[rows])
+        if not parts[order_names[0]]:
+            return {name: np.empty((0, *column_dtype(layout, column).shape), column_dtype(layout, column).base)
+                    for name, column in stored.items()}
+        merged: dict[str, np.ndarray] = {name: np.concatenate(values) for name, values in parts.items()}
+        order: np.ndarray = np.lexsort((merged[order_names[0]], merged[order_names[1]]))
+        return {name: merged[column][order] for name, column in stored.items()}
+
+    def query(self, sat_name: str, layout_name: str, start: int | str | datetime.datetime | None = None,
+              end: int | str | datetime.datetime | None = None):
+        """ rows with onboard time in [start, end) decoded like `batch_decode` output, as a pandas DataFrame """
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        layout: TmiLayout = self.find_layout(sat_name, layout_name)
+        stored: dict[str, np.ndarray] = self.select(sat_name, layout_name, start, end,
+                                                    [*HEADER_COLUMNS, *unique_names(layout)])
+        records: np.ndarray = np.empty(len(stored['received']), layout.dtype)
+        for i, name in enumerate(unique_names(layout)):
+            records[f'f{i}'] = stored[name]
+        columns = decode_block(layout, records.view(np.uint8).reshape(len(records), layout.size))
+        return pd.DataFrame({'received': pd.to_datetime(stored['received'], unit='s'), 'crc_ok': stored['crc_ok'],
+                             **columns})
+
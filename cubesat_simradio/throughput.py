@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING
+import numpy as np
+
+from cubesat_simradio.airtime import FSK_BITRATE, bandwidth_khz, config_airtime_ms
+from cubesat_simradio.channel import fsk_ber, lora_ber
+from cubesat_simradio.models import SX127x_Modulation
+
+if TYPE_CHECKING:
+    from cubesat_simradio.emusats_configs import RadioConfig
+    from cubesat_simradio.sat_path import SatellitePath
+
+ELEVATION_BINS: np.ndarray = np.arange(0, 91, 10)
+Z_95: float = 1.959964
+SNR_GRID: np.ndarray = np.arange(-40.0, 30.0, 0.05)
+
+
+@lru_cache(maxsize=16)
+def ber_table(spread_factor: int) -> np.ndarray:
+    """ `lora_ber` over SNR_GRID for interpolation """
+    return np.array([lora_ber(snr, spread_factor) for snr in SNR_GRID])
+
+
+@lru_cache(maxsize=16)
+def fsk_ber_table(bandwidth_hz: float, bitrate: float) -> np.ndarray:
+    """ `fsk_ber` over SNR_GRID for interpolation """
+    return np.array([fsk_ber(snr, bandwidth_hz, bitrate) for snr in SNR_GRID])
+
+
+@dataclass
+class ThroughputEstimate:
+    """ expected values with 95% normal approximation bounds; arrays for `estimate_batch` """
+    frames: float | np.ndarray
+    frames_low: float | np.ndarray
+    frames_high: float | np.ndarray
+    bytes: float | np.ndarray
+    bytes_low: float | np.ndarray
+    bytes_high: float | np.ndarray
+    exchanges: float | np.ndarray
+    visible_sec: float | np.ndarray
+    loss_by_elevation: np.ndarray  # exchange loss per ELEVATION_BINS bin over all passes, nan if never reached
+
+
+class ThroughputEstimator:
+    """ Analytic request/answer downlink model over a pass time grid """
+
+    def __init__(self, config: RadioConfig, elevation_mask: float = 10.0, request_size: int = 15,
+                 frame_size: int = 143, payload_size: int = 128, turnaround_sec: float = 0.3,
+                 beacon_period_sec: float = 60.0, beacon_size: int = 143, snr_at_1000km_db: float = -8.0,
+                 loss_by_elevation: np.ndarray | None = None) -> None:
+        self.config: RadioConfig = config
+        self.elevation_mask: float = elevation_mask
+        self.payload_size: int = payload_size
+        self.snr_at_1000km_db: float = snr_at_1000km_db
+        self.loss_by_elevation: np.ndarray | None = loss_by_elevation
+        airtime = {size: config_airtime_ms(size, config.spread_factor, config.bandwidth, config.coding_rate,
+                                           config.mode, crc=config.crc_mode, low_data_rate_optimize=config.ldro) / 1000
+                   for size in {request_size, frame_size, beacon_size}}
+        self.ber_curve: np.ndarray = ber_table(config.spread_factor) if config.mode == SX127x_Modulation.LORA \
+            else fsk_ber_table(bandwidth_khz(config.bandwidth) * 1000, FSK_BITRATE)
+        self.cycle_sec: float = airtime[request_size] + turnaround_sec + airtime[frame_size]
+        self.exchange_bits: int = 8 * (request_size + frame_size)
+        # an exchange fails when the satellite beacon starts during it or it starts during the beacon
+        self.beacon_collision: float = min(1.0, (self.cycle_sec + airtime[beacon_size]) / beacon_period_sec) \
+            if beacon_period_sec > 0 else 0.0
+
+    def success_probability(self, altitude: np.ndarray, distance_km: np.ndarray) -> np.ndarray:
+        """ probability that both request and answer pass the channel """
+        if self.loss_by_elevation is not None:
+            bins: np.ndarray = np.clip(np.digitize(altitude, ELEVATION_BINS) - 1, 0, len(ELEVATION_BINS) - 2)
+            return 1.0 - np.asarray(self.loss_by_elevation)[bins]
+        snr: np.ndarray = self.snr_at_1000km_db - 20 * np.log10(np.maximum(distance_km, 1.0) / 1000)
+        ber: np.ndarray = np.interp(snr, SNR_GRID, self.ber_curve)
+        return (1.0 - ber) ** self.exchange_bits
+
+    def estimate_batch(self, altitude: np.ndarray, distance_km: np.ndarray, step_sec: float | np.ndarray,
+                       ) -> ThroughputEstimate:
+        """ (passes, time points) arrays; `step_sec` scalar or per pass """
+        altitude = np.atleast_2d(altitude)
+        distance_km = np.atleast_2d(distance_km)
+        step: np.ndarray = np.broadcast_to(np.asarray(step_sec, dtype=float).reshape(-1, 1), (altitude.shape[0], 1))
+        visible: np.ndarray = altitude >= self.elevation_mask
+        exchanges: np.ndarray = visible * (step / self.cycle_sec)
+        success: np.ndarray = self.success_probability(altitude, distance_km) * (1.0 - self.beacon_collision)
+        frames: np.ndarray = (exchanges * success).sum(axis=1)
+        spread: np.ndarray = Z_95 * np.sqrt((exchanges * success * (1.0 - success)).sum(axis=1))
+        bins: np.ndarray = np.digitize(altitude, ELEVATION_BINS) - 1
+        loss: np.ndarray = np.full(len(ELEVATION_BINS) - 1, np.nan)
+        for i in range(len(loss)):
+            weights: np.ndarray = exchanges[bins == i]
+            if weights.sum() > 0:
+                loss[i] = 1.0 - np.average(success[bins == i], weights=weights)
+        frames_low: np.ndarray = np.maximum(frames - spread, 0.0)
+        frames_high: np.ndarray = frames + spread
+        return ThroughputEstimate(frames, frames_low, frames_high, frames * self.payload_size,
+                                  frames_low * self.payload_size, frames_high * self.payload_size,
+                                  exchanges.sum(axis=1), (visible * step).sum(axis=1), loss)
+
+    def estimate(self, path: SatellitePath) -> ThroughputEstimate:
+        timestamps: np.ndarray = path.timestamps
+        step: float = (timestamps[-1] - timestamps[0]) / max(len(timestamps) - 1, 1)
+        batch: ThroughputEstimate = self.estimate_batch(path.altitude, path.dist, step)
+        return ThroughputEstimate(*(float(value[0]) for value in (
+            batch.frames, batch.frames_low, batch.frames_high, batch.bytes, batch.bytes_low, batch.bytes_high,
+            batch.exchanges, batch.visible_sec)), batch.loss_by_elevation)
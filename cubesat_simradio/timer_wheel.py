@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import math
+import threading
+from typing import Callable
+from loguru import logger
+
+from cubesat_simradio.utils import Clock
+
+
+class Timer:
+    """ callback scheduled on a `TimerWheel` """
+    __slots__ = ('deadline', 'tick', 'callback', 'args', '_wheel', '_slot')
+
+    def __init__(self, wheel: TimerWheel, deadline: float, tick: int, callback: Callable, args: tuple) -> None:
+        self.deadline: float = deadline
+        self.tick: int = tick
+        self.callback: Callable = callback
+        self.args: tuple = args
+        self._wheel: TimerWheel = wheel
+        self._slot: dict[Timer, None] | None = None
+
+    @property
+    def active(self) -> bool:
+        return self._slot is not None
+
+    def cancel(self) -> bool:
+        """ removes the timer from its wheel, False if it has already fired or been cancelled """
+        return self._wheel.cancel(self)
+
+
+class TimerWheel:
+    """ Hierarchical timing wheel running the timers of a whole fleet on one thread.
+
+    Time is cut into `tick_sec` ticks. Level 0 has a slot per tick for the next 2**slot_bits ticks, every next level
+    has a slot per full turn of the level below, so `levels` levels cover 2**(slot_bits * levels) ticks and later
+    timers wait in the last level. A slot is an insertion-ordered dict: scheduling and cancelling are O(1), timers
+    due on the same tick fire in scheduling order. When a level turns, the slot of the next level is cascaded down.
+    Timers already due when scheduled skip the slots: they wait in a ready queue that the next pass runs first.
+
+    `start` runs the wheel on a daemon thread that sleeps until the nearest deadline, so an idle fleet costs one
+    wakeup per timer and not a polling loop per satellite. Without the thread `advance` runs the due timers. """
+
+    def __init__(self, tick_sec: float = 0.01, slot_bits: int = 8, levels: int = 4, clock: Clock | None = None,
+                 name: str = 'timer wheel') -> None:
+        self.tick_sec: float = tick_sec
+        self.clock: Clock = clock or Clock()
+        self.name: str = name
+        self._bits: int = slot_bits
+        self._mask: int = (1 << slot_bits) - 1
+        self._levels: list[list[dict[Timer, None]]] = [[{} for _ in range(1 << slot_bits)] for _ in range(levels)]
+        self._ready: dict[Timer, None] = {}  # due at scheduling, run without waiting for a tick
+        self._span: int = 1 << (slot_bits * levels)  # ticks covered by the wheel
+        self._origin: float = self.clock.time()
+        self._base: int = 0  # next tick to expire
+        self._count: int = 0
+        self._condition: threading.Condition = threading.Condition(threading.Lock())
+        self._wake_tick: int | None = None  # tick the thread sleeps until, None while it runs or waits for timers
+        self._running: bool = False
+        self._thread: threading.Thread | None = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self) -> TimerWheel:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def call_at(self, deadline: float, callback: Callable, *args) -> Timer:
+        """ runs `callback(*args)` at the clock time `deadline` or on the first tick after it """
+        tick: int = max(math.ceil((deadline - self._origin) / self.tick_sec), 0)
+        timer = Timer(self, deadline, tick, callback, args)
+        due: bool = deadline <= self.clock.time()
+        with self._condition:
+            if due:
+                self._ready[timer] = None
+                timer._slot = self._ready  # pylint: disable=protected-access
+            else:
+                self._place(timer)
+            self._count += 1
+            if self._wake_tick is not None and (due or tick < self._wake_tick):
+                self._condition.notify()
+        return timer
+
+    def call_later(self, delay: float, callback: Callable, *args) -> Timer:
+        return self.call_at(self.clock.time() + delay, callback, *args)
+
+    def call_soon(self, callback: Callable, *args) -> Timer:
+        return self.call_at(self.clock.time(), callback, *args)
+
+    def cancel(self, timer: Timer) -> bool:
+        with self._condition:
+            if timer._slot is None:  # pylint: disable=protected-access
+                return False
+            del timer._slot[timer]  # pylint: disable=protected-access
+            timer._slot = None  # pylint: disable=protected-access
+            self._count -= 1
+            return True
+
+    def _place(self, timer: Timer) -> None:
+        tick: int = min(max(timer.tick, self._base), self._base + self._span - 1)
+        delta: int = tick - self._base
+        level: int = 0
+        while delta >> (self._bits * (level + 1)):
+            level += 1
+        slot: dict[Timer, None] = self._levels[level][(tick >> (self._bits * level)) & self._mask]
+        slot[timer] = None
+        timer._slot = slot  # pylint: disable=protected-access
+
+    def _expire(self, now: float) -> list[Timer]:
+        """ moves the wheel up to `now` and takes out the due timers """
+        target: int = math.floor((now - self._origin) / self.tick_sec + 1e-9)
+        due: list[Timer] = list(self._ready)
+        for timer in due:
+            timer._slot = None  # pylint: disable=protected-access
+        self._ready = {}
+        while self._base <= target:
+            if self._count == len(due):  # nothing left to cascade or expire
+                self._base = target + 1
+                break
+            tick: int = self._base
+            level: int = 1
+            while level < len(self._levels) and not tick & ((1 << (self._bits * level)) - 1):
+                level += 1
+            for upper in range(level - 1, 0, -1):  # a turn of level 0 cascades the slots that begin at this tick
+                index: int = (tick >> (self._bits * upper)) & self._mask
+                slot: dict[Timer, None] = self._levels[upper][index]
+                if slot:
+                    self._levels[upper][index] = {}
+                    for timer in slot:
+                        self._place(timer)
+            slot = self._levels[0][tick & self._mask]
+            if slot:
+                self._levels[0][tick & self._mask] = {}
+                for timer in slot:
+                    timer._slot = None  # pylint: disable=protected-access
+                due.extend(slot)
+            self._base = tick + 1
+        self._count -= len(due)
+        return due
+
+    def _next_tick(self) -> int | None:
+        """ earliest tick of the scheduled timers, None when there are none """
+        if not self._count:
+            return None
+        size: int = self._mask + 1
+        ticks: list[int] = []
+        for level, slots in enumerate(self._levels):
+            current: int = (self._base >> (self._bits * level)) & self._mask
+            # the current slot of an upper level is cascaded at its first tick, after that it holds the next turn
+            if level and self._base & ((1 << (self._bits * level)) - 1):
+                current += 1
+            for index in range(current, current + size):
+                slot: dict[Timer, None] = slots[index & self._mask]
+                if slot:
+                    ticks.append(min(timer.tick for timer in slot))
+                    break
+        return max(min(ticks), self._base)
+
+    def next_deadline(self) -> float | None:
+        """ clock time of the earliest timer """
+        with self._condition:
+            if self._ready:
+                return min(timer.deadline for timer in self._ready)
+            tick: int | None = self._next_tick()
+        return None if tick is None else self._origin + tick * self.tick_sec
+
+    def advance(self, now: float | None = None) -> int:
+        """ runs the timers due at `now` (clock time by default), those scheduled already due first, then in deadline
+        order, returns their number """
+        with self._condition:
+            due: list[Timer] = self._expire(self.clock.time() if now is None else now)
+        for timer in due:
+            try:
+                timer.callback(*timer.args)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception('{}: timer callback {} failed', self.name, timer.callback)
+        return len(due)
+
+    def start(self) -> None:
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float | None = 1.0) -> None:
+        """ stops the thread, scheduled timers stay on the wheel """
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            self.advance()
+            with self._condition:
+                if not self._running:
+                    return
+                if self._ready:
+                    continue
+                self._wake_tick = self._next_tick()
+                if self._wake_tick is None:
+                    self._wake_tick = self._base + self._span
+                    self._condition.wait()
+                else:
+                    self._condition.wait(max(self._origin + self._wake_tick * self.tick_sec - self.clock.time(), 0.0))
+                self._wake_tick = None
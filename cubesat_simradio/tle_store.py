@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import TYPE_CHECKING
+from uuid import UUID
+import numpy as np
+from loguru import logger
+from skyfield.api import EarthSatellite, load
+from skyfield.timelib import Timescale
+from skyfield.toposlib import GeographicPosition
+
+from cubesat_simradio.sat_path import SatellitePath, satellite_path
+
+if TYPE_CHECKING:
+    from cubesat_simradio.schemas import SessionModel
+
+# sat_name, latitude, longitude, elevation, t_1, t_2, sampling_rate
+PathKey = tuple[str, float, float, float, datetime, datetime, float]
+
+
+@dataclass
+class TleRecord:
+    sat_name: str
+    tle: str
+    satellite: EarthSatellite
+
+    @property
+    def epoch(self) -> datetime:
+        return self.satellite.epoch.utc_datetime()
+
+
+@dataclass
+class TleUpdate:
+    sat_name: str
+    old_epoch: datetime | None
+    new_epoch: datetime
+    recomputed_paths: list[PathKey] = field(default_factory=list)
+    kept_paths: int = 0
+    affected_sessions: list[SessionModel] = field(default_factory=list)
+    max_error_km: float = 0.0
+
+
+def parse_tle(tle: str, timescale: Timescale) -> EarthSatellite:
+    lines: list[str] = tle.strip().split('\n')
+    return EarthSatellite(lines[1], lines[2], lines[0], timescale)
+
+
+class TleStore:
+    """ Latest TLE per satellite with cached paths that are recomputed only when a new TLE moves them """
+
+    def __init__(self, tolerance_km: float = 1.0, check_step_sec: float = 60.0,
+                 timescale: Timescale | None = None) -> None:
+        self.tolerance_km: float = tolerance_km
+        self.check_step_sec: float = check_step_sec
+        self.timescale: Timescale = timescale or load.timescale()
+        self._records: dict[str, TleRecord] = {}
+        self._paths: dict[PathKey, tuple[GeographicPosition, SatellitePath]] = {}
+        self._sessions: dict[UUID, SessionModel] = {}
+        self._lock: Lock = Lock()
+
+    @classmethod
+    def from_configs(cls, **kwargs) -> TleStore:
+        """ seeded with the TLEs of the satellite profiles """
+        from cubesat_simradio.satellite_profiles import get_registry  # pylint: disable=import-outside-toplevel
+        store = cls(**kwargs)
+        for profile in get_registry():
+            if profile.tle:
+                store.update(profile.name, profile.tle)
+        return store
+
+    def __contains__(self, sat_name: str) -> bool:
+        return sat_name in self._records
+
+    def get(self, sat_name: str) -> str:
+        return self._records[sat_name].tle
+
+    def epoch(self, sat_name: str) -> datetime:
+        return self._records[sat_name].epoch
+
+    def path(self, sat_name: str, observer: GeographicPosition, t_1: datetime, t_2: datetime,
+             sampling_rate: float = 3.3333) -> SatellitePath:
+        """ cached `angle_points` with the current TLE of the satellite """
+        key: PathKey = (sat_name, observer.latitude.degrees, observer.longitude.degrees, observer.elevation.m,
+                        t_1, t_2, sampling_rate)
+        with self._lock:
+            cached = self._paths.get(key)
+            if cached is not None:
+                return cached[1]
+            satellite: EarthSatellite = self._records[sat_name].satellite
+        path: SatellitePath = satellite_path(satellite, sat_name, observer, t_1, t_2, sampling_rate, self.timescale)
+        with self._lock:
+            self._paths[key] = (observer, path)
+        return path
+
+    def track_session(self, session: SessionModel) -> None:
+        with self._lock:
+            self._sessions[session.time_range_id] = session
+
+    def forget_session(self, session_id: UUID) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def update(self, sat_name: str, tle: str) -> TleUpdate:
+        """ stores a newer TLE, recomputes cached paths and reports sessions moved beyond `tolerance_km` """
+        satellite: EarthSatellite = parse_tle(tle, self.timescale)
+        new_epoch: datetime = satellite.epoch.utc_datetime()
+        with self._lock:
+            old: TleRecord | None = self._records.get(sat_name)
+            if old is not None and new_epoch <= old.epoch:
+                logger.debug('ignore {} TLE with epoch {} older than {}', sat_name, new_epoch, old.epoch)
+                return TleUpdate(sat_name, old.epoch, old.epoch,
+                                 kept_paths=sum(key[0] == sat_name for key in self._paths))
+            self._records[sat_name] = TleRecord(sat_name, tle, satellite)
+            if old is None:
+                return TleUpdate(sat_name, None, new_epoch)
+            path_keys: list[PathKey] = [key for key in self._paths if key[0] == sat_name]
+            sessions: list[SessionModel] = [s for s in self._sessions.values() if s.sat_name == sat_name]
+        windows: list[tuple[datetime, datetime]] = [(key[4], key[5]) for key in path_keys]
+        windows += [(session.start, session.finish) for session in sessions]
+        errors: np.ndarray = self.position_errors(old.satellite, satellite, windows)
+        update = TleUpdate(sat_name, old.epoch, new_epoch, max_error_km=float(errors.max(initial=0.0)))
+        moved: np.ndarray = errors > self.tolerance_km
+        update.affected_sessions = [session for session, is_moved in zip(sessions, moved[len(path_keys):])
+                                    if is_moved]
+        for key, is_moved in zip(path_keys, moved[:len(path_keys)]):
+            if not is_moved:
+                update.kept_paths += 1
+                continue
+            with self._lock:
+                observer, _ = self._paths.pop(key)
+            self.path(sat_name, observer, key[4], key[5], key[6])
+            update.recomputed_paths.append(key)
+        logger.debug('{} TLE {} -> {}: {} paths recomputed, {} kept, {} sessions affected', sat_name, old.epoch,
+                     new_epoch, len(update.recomputed_paths), update.kept_paths, len(update.affected_sessions))
+        return update
+
+    def position_errors(self, old: EarthSatellite, new: EarthSatellite,
+                        windows: list[tuple[datetime, datetime]]) -> np.ndarray:
+        """ max distance in km between old and new TLE positions in each window, sampled every `check_step_sec` """
+        if not windows:
+            return np.zeros(0)
+        offsets: list[int] = []
+        moments: list[datetime] = []
+        for t_1, t_2 in windows:
+            offsets.append(len(moments))
+            steps: int = max(int((t_2 - t_1).total_seconds() // self.check_step_sec), 0)
+            moments += [t_1 + timedelta(seconds=i * self.check_step_sec) for i in range(steps + 1)] + [t_2]
+        times = self.timescale.from_datetimes(moments)
+        distance: np.ndarray = np.linalg.norm(old.at(times).position.km - new.at(times).position.km, axis=0)
+        return np.maximum.reduceat(distance, offsets)
+
+
+TLE_STORE: TleStore | None = None
+
+
+def get_tle_store() -> TleStore:
+    """ process wide store seeded with the satellite profile TLEs """
+    global TLE_STORE  # pylint: disable=global-statement
+    if TLE_STORE is None:
+        TLE_STORE = TleStore.from_configs()
+    return TLE_STORE
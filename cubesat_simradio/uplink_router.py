@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable
+from loguru import logger
+
+from cubesat_simradio.crc import crc16
+from cubesat_simradio.emusat import EMUSAT
+from cubesat_simradio.metrics import METRICS, MetricsRegistry
+from cubesat_simradio.radio_packet import RadioPacket
+from cubesat_simradio.satellite_profiles import BROADCAST_ADDRESS
+from cubesat_simradio.utils import Clock
+
+if TYPE_CHECKING:
+    from cubesat_simradio.schemas import RadioModel
+
+ROUTER_LINK: str = 'router'
+
+
+class UplinkRouter:
+    """ One receiver for a fleet sharing a channel.
+
+    The NORBI header is parsed once per uplink and the packet goes only to the satellite owning `rx_addr` (to every
+    addressed satellite for broadcast).
+
+    Copies of one transmission, e.g. from several ground receivers feeding one router, reach a satellite once: a
+    packet with the TX address, transaction number and message of a packet the satellite accepted less than
+    `dedup_window_sec` ago is dropped. The window is shorter than the 0.5 s satellite transmit delay, so a ground
+    retransmission, sent no earlier than the reply is due, always reaches the satellite and is answered from its
+    `ReplyCache`. A lost copy is not remembered, and a new message reusing the transaction number is a new command. """
+
+    def __init__(self, satellites: Iterable[EMUSAT] = (), clock: Clock | None = None, dedup_window_sec: float = 0.25,
+                 dedup_size: int = 256, metrics: MetricsRegistry = METRICS) -> None:
+        self.clock: Clock = clock or Clock()
+        self.dedup_window_sec: float = dedup_window_sec
+        self.dedup_size: int = dedup_size
+        self.metrics: MetricsRegistry = metrics
+        self.satellites: dict[str, EMUSAT] = {}
+        self._by_address: dict[bytes, EMUSAT] = {}
+        # satellite name: (tx_addr, transaction_num, message) -> accept time, oldest first
+        self._recent: dict[str, dict[tuple[bytes, int, bytes], float]] = {}
+        for satellite in satellites:
+            self.add(satellite)
+
+    def add(self, satellite: EMUSAT) -> None:
+        for address in satellite.addresses:
+            owner: EMUSAT | None = self._by_address.get(address)
+            if owner is not None and owner.name != satellite.name:
+                raise ValueError(f'{satellite.name}: address {RadioPacket.address_to_string(address)} is already '
+                                 f'used by {owner.name}')
+        self.remove(satellite.name)
+        self.satellites[satellite.name] = satellite
+        self._by_address.update(dict.fromkeys(satellite.addresses, satellite))
+        self._recent[satellite.name] = {}
+
+    def remove(self, name: str) -> EMUSAT | None:
+        satellite: EMUSAT | None = self.satellites.pop(name, None)
+        if satellite is not None:
+            for address in satellite.addresses:
+                self._by_address.pop(address, None)
+            del self._recent[name]
+        return satellite
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.satellites
+
+    def __len__(self) -> int:
+        return len(self.satellites)
+
+    def targets(self, rx_addr: bytes) -> list[EMUSAT]:
+        if rx_addr == BROADCAST_ADDRESS:
+            return [satellite for satellite in self.satellites.values() if satellite.addresses]
+        satellite: EMUSAT | None = self._by_address.get(rx_addr)
+        return [] if satellite is None else [satellite]
+
+    @staticmethod
+    def dedup_key(radio_packet: RadioPacket) -> tuple[bytes, int, bytes]:
+        """ (tx_addr, transaction_num, message id, payload and CRC), the request key of `ReplyCache` """
+        return radio_packet.tx_addr, radio_packet.transaction_num, radio_packet.raw_data[13:]
+
+    def is_duplicate(self, satellite: EMUSAT, radio_packet: RadioPacket, now: float) -> bool:
+        """ True for a copy of a packet the satellite accepted within `dedup_window_sec` """
+        seen: float | None = self._recent[satellite.name].get(self.dedup_key(radio_packet))
+        return seen is not None and now - seen < self.dedup_window_sec
+
+    def remember(self, satellite: EMUSAT, radio_packet: RadioPacket, now: float) -> None:
+        """ records a packet accepted by the satellite """
+        recent: dict[tuple[bytes, int, bytes], float] = self._recent[satellite.name]
+        key: tuple[bytes, int, bytes] = self.dedup_key(radio_packet)
+        recent.pop(key, None)
+        recent[key] = now
+        while len(recent) > self.dedup_size:
+            del recent[next(iter(recent))]
+
+    def route(self, data: bytes | list[int], radio_parameters: RadioModel | None = None,
+              ) -> list[tuple[EMUSAT, RadioPacket]]:
+        """ valid packets per satellite after loss, channel and radio config of each satellite """
+        data = bytes(data)
+        if len(data) < 15:
+            logger.error('got incorrect message len: {}', data)
+            self.metrics.inc('uplinks_unrouted', ROUTER_LINK)
+            return []
+        frame: bytes = data + crc16(data[15:]).to_bytes(2, 'little')
+        radio_packet = RadioPacket(frame)
+        satellites: list[EMUSAT] = self.targets(radio_packet.rx_addr)
+        if not satellites:
+            logger.error('no satellite with address {}', RadioPacket.address_to_string(radio_packet.rx_addr))
+            self.metrics.inc('uplinks_unrouted', ROUTER_LINK)
+            return []
+        if radio_packet.packet_length != len(frame) - 3:
+            logger.error('got incorrect message packet length: {}', data)
+            self.metrics.inc('uplinks_unrouted', ROUTER_LINK)
+            return []
+        now: float = self.clock.time()
+        routed: list[tuple[EMUSAT, RadioPacket]] = []
+        for satellite in satellites:
+            if self.is_duplicate(satellite, radio_packet, now):
+                self.metrics.inc('uplinks_duplicated', satellite.name)
+                continue
+            received: bytes | None = satellite.accept_uplink(data, radio_parameters)
+            if received is None:
+                continue
+            if received != frame:
+                # corrupted by the satellite channel, validated as the satellite radio would do
+                corrupted: RadioPacket | None = satellite.parse_uplink(received)
+                if corrupted is None or not satellite.is_addressed(corrupted):
+                    continue
+                routed.append((satellite, corrupted))
+            else:
+                routed.append((satellite, radio_packet))
+            self.remember(satellite, routed[-1][1], now)
+        return routed
+
+    def dispatch(self, data: bytes | list[int], radio_parameters: RadioModel | None = None) -> int:
+        """ handles the uplink in the calling thread, returns the number of satellites that got it """
+        started: float = self.metrics.start()
+        routed: list[tuple[EMUSAT, RadioPacket]] = self.route(data, radio_parameters)
+        for satellite, radio_packet in routed:
+            satellite.handle_packet(radio_packet, started)
+        return len(routed)
+
+    def receive(self, data: bytes | list[int], radio_parameters: RadioModel | None = None) -> int:
+        """ queues the uplink to the powered on satellites like `EMUSAT.receive_data` """
+        routed: list[tuple[EMUSAT, RadioPacket]] = self.route(data, radio_parameters)
+        for satellite, radio_packet in routed:
+            satellite.receive_packet(radio_packet)
+        return len(routed)
@@ -1,9 +1,12 @@
+import time
 from threading import RLock
 from typing import Callable, Type
 
+
 class Signal:
 
     lock: RLock = RLock()
+
     def __init__(self, *args: Type) -> None:
         self.listeners: list[Callable] = []
         self.args: tuple[Type, ...] = args
@@ -25,3 +28,24 @@ class Signal:
                 raise TypeError(f'This signal should emit next types: {self.args}, but you try to emit {args}.')
             _ = [callback(*args) for callback in self.listeners]
 
+
+class Clock:
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+    def delay(self, seconds: float) -> float:
+        """ real duration of an emulated delay, for callers that schedule a timer instead of sleeping """
+        return seconds
+
+
+class ZeroDelayClock(Clock):
+    """ skips emulated delays (airtime, polling periods) but still yields to other threads """
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(0)
+
+    def delay(self, seconds: float) -> float:
+        return 0.0